@@ -1,29 +1,26 @@
 # backend/__init__.py
 from flask import Flask
-from dotenv import load_dotenv
 import os, re
 from zoneinfo import ZoneInfo
 from flask_cors import CORS
 
-from .config import Config
-from .db import init_db, Base
-from .models import Match
+from .config import get_config
+from .db import init_db, init_app as init_db_app
+from .migrations import migrate_if_needed
 from .routes import register_blueprints
 from .routes.auth import login_manager
 # from .scheduler import start_scheduler  # import lazily inside the flag below
 
 __all__ = ["create_app"]
 
-load_dotenv(override=True)
-
 def create_app():
-    cfg = Config.from_env()
+    cfg = get_config()
 
     app = Flask(__name__)
     app.url_map.strict_slashes = False  # avoid 301/308 on trailing slash during preflight
 
     # timezone + core config
-    app.LOCAL_TZ = ZoneInfo(cfg.timezone or "Asia/Singapore")
+    app.LOCAL_TZ = cfg.local_tz or ZoneInfo("Asia/Singapore")
     app.config.update(
         DEV_PRED_BYPASS=os.getenv("DEV_PRED_BYPASS", "0") in ("1","true","True"),
         TIMEZONE=cfg.timezone,
@@ -37,9 +34,13 @@ def create_app():
         SESSION_COOKIE_SAMESITE="None",
     )
 
-    # DB init + create tables
+    # DB init. Schema upgrades belong to the release step (`python -m backend.migrations`);
+    # AUTO_MIGRATE=auto (default) still applies them on boot when the models changed,
+    # AUTO_MIGRATE=0 skips the check entirely.
     engine, _ = init_db(cfg.database_url)
-    Base.metadata.create_all(engine)
+    init_db_app(app)
+    if os.getenv("AUTO_MIGRATE", "auto").lower() not in ("0", "false", "no"):
+        migrate_if_needed(engine)
 
     # routes
     login_manager.init_app(app)
@@ -0,0 +1,73 @@
+# backend/authz.py
+"""
+Shared group-membership checks for the route modules.
+
+A (group, user) membership row is fetched with one query, memoized on `flask.g`
+for the rest of the request and kept in `membership_cache` across requests, tagged
+with the group's `members` data version. A cached row is used only while that version
+is unchanged, so a change made by another process applies on its next request. Every
+route that changes group_members bumps the version in its transaction and then calls
+`invalidate_membership`.
+"""
+from flask import g, has_app_context
+from sqlalchemy import text
+
+from . import versions
+from .cache import membership_cache
+
+_NOT_MEMBER = False   # cached marker for "no row"
+
+MEMBERSHIP_SQL = text("select status, is_admin from group_members where group_id=:g and user_id=:u")
+
+
+def _request_memo():
+    if not has_app_context():
+        return None
+    memo = getattr(g, "_memberships", None)
+    if memo is None:
+        memo = g._memberships = {}
+    return memo
+
+
+def membership(s, group_id: int, user_id: int):
+    """{"status": ..., "is_admin": ...} for the user's row in the group, or None."""
+    key = (int(group_id), int(user_id))
+    memo = _request_memo()
+    if memo is not None and key in memo:
+        return memo[key] or None
+
+    # read before the row: a change committed in between leaves the entry behind, not ahead
+    (version,) = versions.get(s, [versions.members_key(key[0])])
+    cached = membership_cache.get(key)
+    if cached is not None and cached[0] == version:
+        row = cached[1]
+    else:
+        r = s.execute(MEMBERSHIP_SQL, {"g": key[0], "u": key[1]}).mappings().first()
+        row = {"status": r["status"], "is_admin": bool(r["is_admin"])} if r else _NOT_MEMBER
+        membership_cache.set(key, (version, row))
+    if memo is not None:
+        memo[key] = row
+    return row or None
+
+
+def is_member(s, group_id: int, user_id: int) -> bool:
+    m = membership(s, group_id, user_id)
+    return bool(m and m["status"] == "approved")
+
+
+def is_admin(s, group_id: int, user_id: int) -> bool:
+    m = membership(s, group_id, user_id)
+    return bool(m and m["status"] == "approved" and m["is_admin"])
+
+
+def invalidate_membership(group_id: int, user_id: int | None = None):
+    """Drop cached rows for one member, or for the whole group when user_id is None."""
+    group_id = int(group_id)
+    if user_id is None:
+        membership_cache.invalidate_where(lambda k: k[0] == group_id)
+    else:
+        membership_cache.invalidate((group_id, int(user_id)))
+    memo = _request_memo()
+    if memo:
+        for k in [k for k in memo if k[0] == group_id and (user_id is None or k[1] == int(user_id))]:
+            del memo[k]
@@ -0,0 +1,151 @@
+# backend/backfill.py
+"""
+Bootstrap / backfill `matches` for a whole season or any date range, then rescore.
+
+    python -m backend.backfill --season 2025
+    python -m backend.backfill --from 2025-08-01 --to 2025-12-31 --span-days 30
+    python -m backend.backfill --season 2025 --resume      # continue after an interruption
+
+A season is one upstream call (`?season=`); date ranges are split into
+`--span-days` requests. Writes go through backend.ingest in chunks, each
+committed separately, and progress is checkpointed to a JSON file so an
+interrupted run only redoes the unfinished range. Every week touched is
+rescored across all groups at the end.
+"""
+import argparse, json, os, time
+from datetime import date, timedelta
+
+from .config import get_config
+from .ingest import ingest_matches, normalize
+from .scoring import recompute_week_all
+from .util import week_start_thu
+
+DEFAULT_CHECKPOINT = ".backfill-checkpoint.json"
+
+
+def plan_ranges(date_from: date, date_to: date, span_days: int):
+    """[(from, to), ...] covering the range inclusively in `span_days` pieces."""
+    out, a = [], date_from
+    while a <= date_to:
+        b = min(a + timedelta(days=span_days - 1), date_to)
+        out.append((a, b))
+        a = b + timedelta(days=1)
+    return out
+
+
+def _load_checkpoint(path, job_key):
+    try:
+        with open(path) as f:
+            cp = json.load(f)
+        return cp if cp.get("job") == job_key else None
+    except (OSError, ValueError):
+        return None
+
+
+def _save_checkpoint(path, cp):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(cp, f)
+    os.replace(tmp, path)
+
+
+def backfill(fetch, season: int | None = None, date_from: date | None = None, date_to: date | None = None,
+             span_days: int = 30, chunk_size: int = 200, season_label: str | None = None,
+             checkpoint: str | None = DEFAULT_CHECKPOINT, resume: bool = False, log=print):
+    """
+    `fetch(season=..., date_from=..., date_to=...)` returns football-data match objects.
+    Returns a report with counts and throughput.
+    """
+    if season is not None:
+        ranges = [("season", str(season))]
+    else:
+        ranges = [(a.isoformat(), b.isoformat()) for a, b in plan_ranges(date_from, date_to, span_days)]
+    job_key = f"season={season}" if season is not None else f"{date_from}..{date_to}/{span_days}"
+
+    cp = (_load_checkpoint(checkpoint, job_key) if (checkpoint and resume) else None) or {
+        "job": job_key, "done": [], "weeks": [], "counts": {"inserted": 0, "updated": 0, "unchanged": 0}}
+    done = set(map(tuple, cp["done"]))
+    weeks = set(cp["weeks"])
+    counts = cp["counts"]
+
+    t0 = time.perf_counter()
+    fetched = upstream_calls = 0
+    for rng in ranges:
+        if tuple(rng) in done:
+            continue
+        if rng[0] == "season":
+            items = fetch(season=int(rng[1]))
+        else:
+            items = fetch(date_from=rng[0], date_to=rng[1])
+        upstream_calls += 1
+        fetched += len(items)
+
+        for i in range(0, len(items), chunk_size):
+            chunk = items[i:i + chunk_size]
+            rep = ingest_matches(chunk, season_label)
+            for k in counts:
+                counts[k] += rep[k]
+            weeks.update(week_start_thu(normalize(m, season_label)["date"]).isoformat() for m in chunk)
+
+        done.add(tuple(rng))
+        if checkpoint:
+            _save_checkpoint(checkpoint, {"job": job_key, "done": sorted(done), "weeks": sorted(weeks),
+                                          "counts": counts})
+        log(f"[backfill] {rng[0]}..{rng[1]}: {len(items)} matches")
+    ingest_s = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    rows = 0
+    for ws in sorted(weeks):
+        rows += recompute_week_all(date.fromisoformat(ws))["rows"]
+    score_s = time.perf_counter() - t1
+
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)   # finished; a later run starts fresh
+
+    return {
+        "upstream_calls": upstream_calls,
+        "matches": fetched,
+        **counts,
+        "weeks_scored": len(weeks),
+        "score_rows": rows,
+        "matches_per_sec": round(fetched / ingest_s, 1) if ingest_s else None,
+        "weeks_per_sec": round(len(weeks) / score_s, 1) if score_s else None,
+        "seconds": round(ingest_s + score_s, 2),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--season", type=int, help="season start year, e.g. 2025 for 2025/26")
+    ap.add_argument("--from", dest="date_from", type=date.fromisoformat)
+    ap.add_argument("--to", dest="date_to", type=date.fromisoformat)
+    ap.add_argument("--span-days", type=int, default=30, help="days per upstream request for date ranges")
+    ap.add_argument("--chunk-size", type=int, default=200, help="matches per write transaction")
+    ap.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    ap.add_argument("--resume", action="store_true")
+    args = ap.parse_args(argv)
+    if args.season is None and not (args.date_from and args.date_to):
+        ap.error("give --season or both --from and --to")
+
+    from . import db
+    from .migrations import migrate_if_needed
+    from .services.football_data import get_client
+
+    cfg = get_config()
+    engine, _ = db.init_db(cfg.database_url, profile="worker")
+    migrate_if_needed(engine)
+    client = get_client(cfg.fd_token)
+
+    def fetch(season=None, date_from=None, date_to=None):
+        return client.matches(cfg.pl_code, date_from, date_to, None, season=season)
+
+    label = f"{args.season}/{str(args.season + 1)[-2:]}" if args.season is not None else cfg.season_label
+    report = backfill(fetch, season=args.season, date_from=args.date_from, date_to=args.date_to,
+                      span_days=args.span_days, chunk_size=args.chunk_size, season_label=label,
+                      checkpoint=args.checkpoint, resume=args.resume)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# backend/cache.py
+"""
+Small in-process caches shared by the routes and background jobs.
+
+Each gunicorn worker has its own copy, so every cache carries a TTL that bounds
+how stale it can get when another process (e.g. the scheduler worker) writes.
+Writers in *this* process invalidate explicitly.
+"""
+import os, threading, time
+from collections import OrderedDict
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+_MISSING = object()
+_registry = {}
+
+
+class TTLCache:
+    """Thread-safe LRU with per-entry TTL and hit/miss counters."""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and item[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl: float | None = None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key, compute, ttl: float | None = None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for k in keys:
+                self._data.pop(k, None)
+
+    def invalidate_where(self, pred):
+        with self._lock:
+            for k in [k for k in self._data if pred(k)]:
+                del self._data[k]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": round(self.hits / total, 4) if total else None}
+
+
+def all_stats():
+    return {name: c.stats() for name, c in _registry.items()}
+
+
+def clear_all():
+    for c in _registry.values():
+        c.clear()
+
+
+_PENDING = "pending_invalidations"
+
+def invalidate_after_commit(s: Session, cache: TTLCache, *keys):
+    """
+    Drop `keys` from `cache` once `s` commits (nothing on rollback). Invalidating before
+    the commit lets a concurrent reader re-cache the old rows for a whole TTL.
+    """
+    s.info.setdefault(_PENDING, []).append((cache, keys))
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _invalidate_pending(s):
+    for cache, keys in s.info.pop(_PENDING, ()):
+        cache.invalidate(*keys)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _drop_pending(s):
+    s.info.pop(_PENDING, None)
+
+
+# group_id -> (scores version, leaderboard rows); invalidated by scoring writes and membership
+# changes, and a stale version is a miss (routes/leaderboard.leaderboard_rows)
+leaderboard_cache = TTLCache("leaderboard", maxsize=2048, ttl=30)
+
+# Thu week_start -> (start, end, open_at, close_at); invalidated by the match upsert paths
+window_cache = TTLCache("prediction_window", maxsize=64, ttl=300)
+
+# (group_id, week_start) -> prediction stats; only filled once the window has closed
+stats_cache = TTLCache("prediction_stats", maxsize=4096, ttl=7 * 24 * 3600)
+
+# user_id -> flask-login user object (existing users only); invalidated by username/password changes
+user_cache = TTLCache("users", maxsize=10000, ttl=300)
+
+# ETag -> (body, mimetype) of a conditional read endpoint (http_cache.py). Keys embed the data
+# versions, so entries never go stale, only cold; off unless HTTP_RESPONSE_CACHE_SIZE > 0.
+RESPONSE_CACHE_SIZE = int(os.getenv("HTTP_RESPONSE_CACHE_SIZE", 0))
+response_cache = TTLCache("http_responses", maxsize=max(RESPONSE_CACHE_SIZE, 1), ttl=600)
+
+# (group_id, user_id) -> (members version, {"status", "is_admin"} or False); an entry whose
+# version is behind the group's is ignored (authz.py), so writes in other processes show at once
+membership_cache = TTLCache("memberships", maxsize=20000, ttl=30)
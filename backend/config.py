@@ -1,22 +1,44 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import cached_property
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 
+_dotenv_loaded = False
+
+def load_env():
+    """Load .env into os.environ once per process."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv(override=True)
+        _dotenv_loaded = True
+
+def _env(name, default=None, conv=lambda v: v):
+    # read when a Config is built, not when this module is imported
+    return field(default_factory=lambda: conv(os.getenv(name, default)))
+
 @dataclass
 class Config:
-    port: int = int(os.getenv("PORT", 3000))
-    timezone: str = os.getenv("TIMEZONE", "Asia/Singapore")
-    fd_token: str = os.getenv("FOOTBALL_DATA_API_KEY", "")
-    database_url: str | None = os.getenv("DATABASE_URL")  # may be None!
+    port: int = _env("PORT", 3000, int)
+    timezone: str = _env("TIMEZONE", "Asia/Singapore")
+    fd_token: str = _env("FOOTBALL_DATA_API_KEY", "")
+    database_url: str | None = _env("DATABASE_URL")  # may be None!
     pl_code: str = "PL"
     season_label: str = "2025/26"
-    secret_key: str = os.getenv("SECRET_KEY", "dev-change-me")
-    session_cookie_secure: bool = os.getenv("SESSION_COOKIE_SECURE", "0") in ("1","true","True")
+    secret_key: str = _env("SECRET_KEY", "dev-change-me")
+    session_cookie_secure: bool = _env("SESSION_COOKIE_SECURE", "0", lambda v: v in ("1","true","True"))
+
+    @cached_property
+    def local_tz(self) -> ZoneInfo | None:
+        try:
+            return ZoneInfo(self.timezone)
+        except Exception:
+            return None
 
     @classmethod
     def from_env(cls) -> "Config":
         # Ensure .env is loaded even if called during import-time
-        load_dotenv(override=True)
+        load_env()
 
         c = cls()
 
@@ -31,4 +53,13 @@ class Config:
             elif c.database_url.startswith("postgresql://"):
                 c.database_url = c.database_url.replace("postgresql://", "postgresql+psycopg://", 1)
 
-        return c
\ No newline at end of file
+        return c
+
+_config = None
+
+def get_config() -> Config:
+    """The process-wide Config, parsed on first use. Modules share it instead of re-reading env."""
+    global _config
+    if _config is None:
+        _config = Config.from_env()
+    return _config
@@ -1,17 +1,77 @@
 # backend/db.py
-from sqlalchemy import create_engine
+"""
+Engine + session factory.
+
+Inside a request, use `with db.request_session() as s:` — one session (and one pooled
+connection) per request, shared by the user loader, permission checks and the route, and
+closed at app-context teardown. Background jobs and threads open their own
+`with SessionLocal() as s:`. Sessions are never shared across threads or greenlets.
+
+Pool settings come from a profile (DB_POOL_PROFILE) with per-setting env overrides;
+`pool_stats()` reports checkouts and hold times.
+"""
+import os, threading, time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import NullPool
 
 engine = None
 SessionLocal = None
 Base = declarative_base()
 
-def init_db(database_url: str):
+# web:       request traffic; no per-checkout ping, connections recycled well inside
+#            typical server/proxy idle timeouts instead
+# worker:    scheduler/CLI; few connections that sit idle between jobs, so ping them
+# pgbouncer: the bouncer pools; don't hold connections here at all
+# safe:      the old behaviour (ping on every checkout)
+POOL_PROFILES = {
+    "web":       dict(pool_size=5, max_overflow=10, pool_recycle=300, pool_pre_ping=False, pool_timeout=10),
+    "worker":    dict(pool_size=2, max_overflow=2, pool_recycle=300, pool_pre_ping=True, pool_timeout=30),
+    "pgbouncer": dict(poolclass=NullPool, pool_pre_ping=False),
+    "safe":      dict(pool_size=5, max_overflow=10, pool_recycle=1800, pool_pre_ping=True, pool_timeout=30),
+}
+_ENV_OVERRIDES = {"DB_POOL_SIZE": ("pool_size", int), "DB_MAX_OVERFLOW": ("max_overflow", int),
+                  "DB_POOL_RECYCLE": ("pool_recycle", int), "DB_POOL_TIMEOUT": ("pool_timeout", int),
+                  "DB_POOL_PRE_PING": ("pool_pre_ping", lambda v: v in ("1", "true", "True"))}
+
+# Applied on every new SQLite connection. WAL lets readers run alongside the single writer,
+# busy_timeout makes a second writer wait instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,          # KiB when negative: 64 MiB page cache
+    "temp_store": "MEMORY",
+}
+
+
+def pool_options(url, profile: str | None = None) -> dict:
+    """Engine pool kwargs for `url`: the named profile, then DB_* env overrides."""
+    profile = profile or os.getenv("DB_POOL_PROFILE", "web")
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"DB_POOL_PROFILE must be one of {sorted(POOL_PROFILES)}, not {profile!r}")
+    opts = dict(POOL_PROFILES[profile])
+    if url.get_backend_name() == "sqlite":
+        opts.pop("poolclass", None)                     # a local file: nothing to bounce through
+        opts["pool_pre_ping"] = False                   # and nothing on the other end to go away
+        if url.database in (None, "", ":memory:"):      # single-connection pool; sizing doesn't apply
+            return {}
+    unpooled = opts.get("poolclass") is NullPool
+    for var, (key, conv) in _ENV_OVERRIDES.items():
+        if not os.getenv(var) or (unpooled and key != "pool_pre_ping"):
+            continue
+        opts[key] = conv(os.getenv(var))
+    return opts
+
+
+def init_db(database_url: str, profile: str | None = None):
     global engine, SessionLocal
     url = make_url(database_url)
 
-    kwargs = dict(future=True, pool_pre_ping=True)
+    kwargs = dict(future=True, **pool_options(url, profile))
 
     # Postgres-specific tweaks
     if url.get_backend_name().startswith("postgresql"):
@@ -24,7 +84,111 @@ def init_db(database_url: str):
         else:
             # e.g. psycopg2: only sslmode is relevant
             kwargs["connect_args"] = {"sslmode": "require"}
+    elif url.get_backend_name() == "sqlite":
+        # pooled connections move between threads; the pool guarantees one user at a time
+        kwargs["connect_args"] = {"check_same_thread": False,
+                                  "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000}
 
     engine = create_engine(database_url, **kwargs)
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _sqlite_pragmas(url.database in (None, "", ":memory:")))
+    _track_pool(engine)
     SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False, future=True)
-    return engine, SessionLocal
\ No newline at end of file
+    return engine, SessionLocal
+
+
+def _sqlite_pragmas(in_memory: bool):
+    def on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            if in_memory and name in ("journal_mode", "mmap_size"):
+                continue
+            cur.execute(f"pragma {name}={value}")
+        cur.close()
+    return on_connect
+
+
+def dispose_after_fork():
+    """Drop pooled connections inherited from a parent process; the child opens its own."""
+    if engine is not None:
+        engine.dispose(close=False)
+
+# ---------- Request-scoped session ----------
+
+@contextmanager
+def request_session():
+    """
+    The current request's session, opened on first use and closed at teardown; nested
+    uses share it. Outside an app context this is just a fresh session closed on exit.
+    """
+    from flask import g, has_app_context
+    if not has_app_context():
+        with SessionLocal() as s:
+            yield s
+        return
+    s = g.get("_db_session")
+    if s is None:
+        s = g._db_session = SessionLocal()
+    yield s
+
+
+def close_request_session(_exc=None):
+    """Teardown hook; also call it before returning a long-lived streaming response."""
+    from flask import g
+    s = g.pop("_db_session", None)
+    if s is not None:
+        s.close()
+
+
+def init_app(app):
+    app.teardown_appcontext(close_request_session)
+
+# ---------- Pool metrics ----------
+
+_pool_lock = threading.Lock()
+_pool_counts = {}
+
+
+def _track_pool(eng):
+    global _pool_counts
+    _pool_counts = {"connects": 0, "checkouts": 0, "checkins": 0, "invalidations": 0,
+                    "checked_out": 0, "peak_checked_out": 0, "hold_ms_total": 0.0, "hold_ms_max": 0.0}
+
+    @event.listens_for(eng, "connect")
+    def _connect(*_):
+        with _pool_lock:
+            _pool_counts["connects"] += 1
+
+    @event.listens_for(eng, "checkout")
+    def _checkout(_conn, record, _proxy):
+        record.info["checked_out_at"] = time.perf_counter()
+        with _pool_lock:
+            _pool_counts["checkouts"] += 1
+            _pool_counts["checked_out"] += 1
+            _pool_counts["peak_checked_out"] = max(_pool_counts["peak_checked_out"], _pool_counts["checked_out"])
+
+    @event.listens_for(eng, "checkin")
+    def _checkin(_conn, record):
+        started = record.info.pop("checked_out_at", None)
+        with _pool_lock:
+            _pool_counts["checkins"] += 1
+            if started is not None:
+                _pool_counts["checked_out"] -= 1
+                held = (time.perf_counter() - started) * 1000
+                _pool_counts["hold_ms_total"] += held
+                _pool_counts["hold_ms_max"] = max(_pool_counts["hold_ms_max"], held)
+
+    @event.listens_for(eng, "invalidate")
+    def _invalidate(*_):
+        with _pool_lock:
+            _pool_counts["invalidations"] += 1
+
+
+def pool_stats() -> dict:
+    with _pool_lock:
+        out = dict(_pool_counts)
+    out["hold_ms_avg"] = round(out["hold_ms_total"] / out["checkins"], 3) if out.get("checkins") else 0.0
+    out["hold_ms_total"] = round(out.get("hold_ms_total", 0.0), 3)
+    out["hold_ms_max"] = round(out.get("hold_ms_max", 0.0), 3)
+    out["pool"] = engine.pool.status() if engine is not None else None
+    return out
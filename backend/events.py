@@ -0,0 +1,302 @@
+# backend/events.py
+"""
+Per-group pub/sub that feeds the Server-Sent Events stream at /groups/<id>/events.
+
+Writers call `publish_after_commit(s, group_id, type, data)`; the event is held on the
+session and only fanned out once that session commits (dropped on rollback), so a
+client that refetches on an event always sees the new rows.
+
+The broker is chosen by EVENTS_BROKER:
+
+- db (default): `DbBroker`. Every process writes its events to the event_log table, and
+  each web worker relays new rows to its own subscribers. The procfile runs at least
+  three processes (WEB_CONCURRENCY web workers plus the scheduler, which publishes the
+  live and weekly results), and a pick saved on one worker has to reach streams held
+  open on another.
+- local: `LocalBroker` fans out inside this process only. This is enough when a single
+  process both serves the streams and does every write (dev, tests).
+
+Anything with the same `publish(channel, event)` / `subscribe(channel)` / `stats()` shape
+can be installed with `set_broker()`.
+"""
+import itertools, json, logging, os, queue, threading, time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event as sa_event, text, bindparam
+from sqlalchemy.orm import Session
+
+from . import db
+
+HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+MAX_STREAM_SECONDS = float(os.getenv("EVENTS_MAX_SECONDS", 300))   # client reconnects after this
+RETRY_MS = 3000
+QUEUE_SIZE = 100
+
+BROKER = os.getenv("EVENTS_BROKER", "db").lower()
+POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", 0.25))   # relay latency, and one query per tick
+RETENTION_SECONDS = 300        # event_log rows older than this are deleted
+CLEANUP_EVERY = 200            # ... by every CLEANUP_EVERY-th publish
+GAP_SECONDS = 10               # how long a skipped id is awaited (an insert committed out of id order)
+
+log = logging.getLogger(__name__)
+
+_ids = itertools.count(1)
+_PENDING = "pending_events"
+
+
+def channel(group_id: int) -> str:
+    return f"group:{group_id}"
+
+
+class Subscription:
+    """A bounded mailbox for one client. A slow reader loses its oldest events, never blocks publishers."""
+
+    def __init__(self, broker, channel: str, maxsize: int = QUEUE_SIZE):
+        self.broker = broker
+        self.channel = channel
+        self.dropped = 0
+        self._q = queue.Queue(maxsize)
+        self._closed = False
+
+    def put(self, event):
+        while True:
+            try:
+                self._q.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._q.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float | None = None):
+        """Next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return self._q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalBroker:
+    """In-process fan-out: channel -> set of subscriptions."""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.published = 0
+        self.delivered = 0
+        self._subs = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel: str) -> Subscription:
+        sub = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subs[channel].add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._subs.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.channel]
+
+    def publish(self, channel: str, event: dict) -> int:
+        with self._lock:
+            subs = list(self._subs.get(channel, ()))
+            self.published += 1
+            self.delivered += len(subs)
+        for sub in subs:
+            sub.put(event)
+        return len(subs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": "local", "channels": len(self._subs),
+                    "subscribers": sum(len(v) for v in self._subs.values()),
+                    "published": self.published, "delivered": self.delivered}
+
+
+INSERT_EVENT_SQL = text("""
+  insert into event_log (channel, type, data, created_at) values (:c, :t, :d, :ts)
+""")
+# rows past the last id relayed, plus ids skipped earlier that may have committed since
+RELAY_SQL = text("""
+  select id, channel, type, data from event_log where id > :after
+  union all
+  select id, channel, type, data from event_log where id in :gaps
+  order by 1
+""").bindparams(bindparam("gaps", expanding=True))
+MAX_ID_SQL = text("select max(id) from event_log")
+CLEANUP_SQL = text("delete from event_log where created_at < :before")
+
+
+class DbBroker:
+    """
+    Fan-out across processes through event_log. publish() inserts one row in a short
+    transaction of its own. The first subscribe() in a process starts a relay thread that
+    reads the rows past the last id it saw every POLL_SECONDS and hands them to a
+    LocalBroker. A process that never subscribes (the scheduler) never polls.
+
+    On Postgres an id can commit after a higher one has already been read. A skipped id is
+    therefore asked for again on every tick for GAP_SECONDS before it is given up on.
+    """
+
+    def __init__(self, poll: float = POLL_SECONDS, queue_size: int = QUEUE_SIZE):
+        self.local = LocalBroker(queue_size)
+        self.poll = poll
+        self.published = 0
+        self.relayed = 0
+        self.polls = 0
+        self._last = None          # highest id relayed
+        self._gaps = {}            # skipped id -> monotonic time first noticed
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, channel: str) -> Subscription:
+        sub = self.local.subscribe(channel)
+        if self._thread is None:
+            self._start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self.local.unsubscribe(sub)
+
+    def publish(self, channel: str, event: dict) -> int:
+        now = datetime.now(timezone.utc)
+        with db.SessionLocal() as s:
+            s.execute(INSERT_EVENT_SQL, {"c": channel, "t": event["type"],
+                                         "d": json.dumps(event["data"], default=str), "ts": now})
+            self.published += 1
+            if self.published % CLEANUP_EVERY == 0:
+                s.execute(CLEANUP_SQL, {"before": now - timedelta(seconds=RETENTION_SECONDS)})
+            s.commit()
+        return 0       # delivered by the relays, not here
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                with db.SessionLocal() as s:
+                    self._last = s.execute(MAX_ID_SQL).scalar() or 0    # streams start from now
+                self._thread = threading.Thread(target=self._run, name="events-relay", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll)
+            try:
+                self.relay()
+            except Exception:
+                log.exception("event relay failed; retrying")
+
+    def relay(self) -> int:
+        """One poll: fan out rows committed since the last one. Returns how many."""
+        with db.SessionLocal() as s:
+            rows = s.execute(RELAY_SQL, {"after": self._last, "gaps": sorted(self._gaps)}).all()
+        self.polls += 1
+        now = time.monotonic()
+        for id, ch, type, data in rows:
+            if id in self._gaps:
+                del self._gaps[id]
+            elif id > self._last:
+                for missing in range(self._last + 1, id):
+                    self._gaps[missing] = now
+                self._last = id
+            else:
+                continue
+            self.local.publish(ch, {"id": id, "type": type, "data": json.loads(data)})
+            self.relayed += 1
+        for id, seen in list(self._gaps.items()):
+            if now - seen > GAP_SECONDS:
+                del self._gaps[id]
+        return len(rows)
+
+    def stats(self) -> dict:
+        return {**self.local.stats(), "backend": "db", "published": self.published,
+                "relayed": self.relayed, "polls": self.polls, "last_id": self._last, "gaps": len(self._gaps)}
+
+
+def _default_broker():
+    if BROKER not in ("db", "local"):
+        raise ValueError(f"EVENTS_BROKER must be db or local, not {BROKER!r}")
+    return DbBroker() if BROKER == "db" else LocalBroker()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = _default_broker()
+    return _broker
+
+
+def set_broker(broker):
+    """Swap the fan-out backend; returns the previous one."""
+    global _broker
+    prev, _broker = get_broker(), broker
+    return prev
+
+
+def make_event(type: str, data: dict) -> dict:
+    return {"id": next(_ids), "type": type, "data": data}
+
+
+def publish(group_id: int, type: str, data: dict) -> int:
+    """Send right away. Prefer publish_after_commit for anything that writes rows."""
+    return get_broker().publish(channel(group_id), make_event(type, data))
+
+
+def publish_after_commit(s: Session, group_id: int, type: str, data: dict):
+    s.info.setdefault(_PENDING, []).append((group_id, type, data))
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _flush_pending(s):
+    for group_id, type, data in s.info.pop(_PENDING, ()):
+        publish(group_id, type, data)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _drop_pending(s):
+    s.info.pop(_PENDING, None)
+
+
+def format_sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+def sse_stream(sub: Subscription, heartbeat: float | None = None, max_seconds: float | None = None):
+    """
+    Yield SSE frames from `sub` until `max_seconds` pass, with a comment line every
+    `heartbeat` seconds of silence so proxies keep the connection open. Connections are
+    bounded so a worker thread is never held indefinitely; EventSource reconnects on its own.
+    """
+    heartbeat = HEARTBEAT_SECONDS if heartbeat is None else heartbeat
+    deadline = time.monotonic() + (MAX_STREAM_SECONDS if max_seconds is None else max_seconds)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            ev = sub.get(timeout=min(heartbeat, left))
+            yield ": ping\n\n" if ev is None else format_sse(ev)
+    finally:
+        sub.close()
@@ -0,0 +1,63 @@
+# backend/http_cache.py
+"""
+Conditional GETs for the read endpoints the frontend polls on every tab switch.
+
+A view works out the data versions its response depends on (backend/versions.py: a
+max(updated_at) or a counter, each one small lookup) and hands them to `respond`
+together with a function that builds the body:
+
+    return respond((versions.matches_version(s), fresh), lambda: jsonify(...), public=True)
+
+The weak ETag is a hash of the path, query string, user and those versions, so an
+If-None-Match that still matches gets a 304 before `build` (the real query) runs.
+Responses revalidate every time (`no-cache`) and carry `Vary: Cookie`.
+
+With HTTP_RESPONSE_CACHE_SIZE > 0, 200 bodies are also kept in cache.response_cache (LRU,
+keyed by the ETag), so a client without the body gets it without `build` either.
+"""
+import hashlib, os
+from flask import current_app, make_response, request
+from flask_login import current_user
+
+from .cache import response_cache, RESPONSE_CACHE_SIZE
+
+SERVER_CACHE = RESPONSE_CACHE_SIZE > 0
+MAX_BODY = int(os.getenv("HTTP_RESPONSE_CACHE_MAX_BODY", 256 * 1024))   # larger bodies aren't kept
+
+PUBLIC = "public, no-cache"
+PRIVATE = "private, no-cache"
+
+
+def etag_for(parts) -> str:
+    user = current_user.get_id() if current_user.is_authenticated else None
+    raw = repr((request.path, sorted(request.args.items(multi=True)), user, parts))
+    return hashlib.sha1(raw.encode()).hexdigest()[:32]
+
+
+def _headers(resp, etag, public):
+    resp.set_etag(etag, weak=True)
+    resp.headers["Cache-Control"] = PUBLIC if public else PRIVATE
+    resp.vary.add("Cookie")
+    return resp
+
+
+def respond(parts, build, public: bool = False):
+    """304 if the client's ETag matches `parts`; else the cached body, else `build()`."""
+    etag = etag_for(parts)
+    if request.if_none_match.contains_weak(etag):
+        return _headers(current_app.response_class(status=304), etag, public)
+
+    if SERVER_CACHE:
+        hit = response_cache.get(etag)
+        if hit is not None:
+            body, mimetype = hit
+            return _headers(current_app.response_class(body, mimetype=mimetype), etag, public)
+
+    resp = make_response(build())
+    if resp.status_code != 200:
+        return resp
+    if SERVER_CACHE and not resp.is_streamed:
+        body = resp.get_data()
+        if len(body) <= MAX_BODY:
+            response_cache.set(etag, (body, resp.mimetype))
+    return _headers(resp, etag, public)
@@ -0,0 +1,131 @@
+# backend/ingest.py
+"""
+Single write path from football-data.org match objects into `matches`.
+
+Both the weekly job and the background sync call `ingest_matches`. Each batch:
+  1. normalizes items (real status, local kickoff in the configured timezone, scores only
+     once the match is final),
+  2. loads stored hashes + scores for the batch with one IN (...) query,
+  3. writes only new/changed rows with one executemany upsert,
+  4. rescores the weekly rows of matches whose result changed (scoring.apply_result_changes),
+all in one transaction, then invalidates the window cache and the match calendar if
+anything changed.
+"""
+import hashlib, json
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select, text
+
+from . import db
+from .cache import window_cache
+from .config import get_config
+from .match_calendar import calendar
+from .models import Match
+from .scoring import result_changes, apply_result_changes
+from .services.football_data import to_local_from_utc_iso
+from .util import week_start_thu
+
+cfg = get_config()
+LOCAL_TZ = cfg.local_tz
+
+BATCH_SIZE = 500
+
+# statuses whose fullTime score is the result; while a match is in play it's the score so far,
+# which must not be scored or listed as a result
+FINAL_STATUSES = ("FINISHED", "AWARDED", "FT", "AET", "PEN")
+
+UPSERT_SQL = text("""
+  insert into matches (
+    match_id, status, competition, season, home, away,
+    utc_kickoff, local_kickoff, date, time, home_score, away_score, updated_at, payload_hash
+  ) values (
+    :match_id, :status, 'Premier League', :season, :home, :away,
+    :utc_kickoff, :local_kickoff, :date, :time, :home_score, :away_score, :updated_at, :payload_hash
+  )
+  on conflict (match_id) do update set
+    status        = excluded.status,
+    season        = excluded.season,
+    home          = excluded.home,
+    away          = excluded.away,
+    home_score    = excluded.home_score,
+    away_score    = excluded.away_score,
+    utc_kickoff   = excluded.utc_kickoff,
+    local_kickoff = excluded.local_kickoff,
+    date          = excluded.date,
+    time          = excluded.time,
+    updated_at    = excluded.updated_at,
+    payload_hash  = excluded.payload_hash
+""")
+
+_HASHED = ("status", "season", "home", "away", "utc_kickoff", "home_score", "away_score")
+
+
+def normalize(m: dict, season_label: str | None = None, tz=LOCAL_TZ) -> dict:
+    """football-data match object -> `matches` row (without updated_at)."""
+    utc_kickoff = datetime.fromisoformat(m["utcDate"].replace("Z", "+00:00"))
+    dt_loc, d_str, t_str = to_local_from_utc_iso(m["utcDate"], tz)
+    final = (m.get("status") or "") in FINAL_STATUSES
+    full = ((m.get("score") or {}).get("fullTime") or {}) if final else {}
+    row = {
+        "match_id": int(m["id"]),
+        "status": m.get("status") or "",
+        "season": season_label or cfg.season_label,
+        "home": (m.get("homeTeam") or {}).get("name"),
+        "away": (m.get("awayTeam") or {}).get("name"),
+        "utc_kickoff": utc_kickoff,
+        "local_kickoff": dt_loc,
+        "date": date.fromisoformat(d_str),
+        "time": t_str,
+        "home_score": full.get("home"),
+        "away_score": full.get("away"),
+    }
+    row["payload_hash"] = hashlib.sha1(json.dumps(
+        [row[k].isoformat() if k == "utc_kickoff" else row[k] for k in _HASHED]
+    ).encode()).hexdigest()
+    return row
+
+
+def ingest_matches(items, season_label: str | None = None, batch_size: int = BATCH_SIZE) -> dict:
+    """Upsert API match objects. Returns inserted/updated/unchanged counts and scoring deltas applied."""
+    rows = {}
+    for m in items or []:
+        r = normalize(m, season_label)
+        rows[r["match_id"]] = r             # last one wins if the payload repeats a match
+    rows = list(rows.values())
+
+    report = {"inserted": 0, "updated": 0, "unchanged": 0, "rescored_matches": 0}
+    now_ts = datetime.now(timezone.utc)
+    with db.SessionLocal() as s:
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            stored = {mid: (h, hs, as_, d) for mid, h, hs, as_, d in s.execute(
+                select(Match.match_id, Match.payload_hash, Match.home_score, Match.away_score, Match.date)
+                .where(Match.match_id.in_([r["match_id"] for r in batch]))).all()}
+
+            changed = []
+            for r in batch:
+                prev = stored.get(r["match_id"])
+                if prev is None:
+                    report["inserted"] += 1
+                elif prev[0] == r["payload_hash"]:
+                    report["unchanged"] += 1
+                    continue
+                else:
+                    report["updated"] += 1
+                changed.append({**r, "updated_at": now_ts})
+            if not changed:
+                continue
+
+            s.execute(UPSERT_SQL, changed)
+            # weeks come from the rows as they were before this upsert, so a result whose
+            # fixture moved week is taken off the week it was scored in
+            scored = apply_result_changes(s, result_changes(
+                {mid: (hs, as_, week_start_thu(d)) for mid, (_, hs, as_, d) in stored.items()},
+                {r["match_id"]: (r["home_score"], r["away_score"], week_start_thu(r["date"])) for r in changed}))
+            report["rescored_matches"] += scored["matches"]
+        s.commit()
+
+    if report["inserted"] or report["updated"]:
+        window_cache.clear()  # kickoffs may have moved
+        calendar.invalidate()
+    return report
@@ -0,0 +1,155 @@
+# backend/jobs.py
+"""
+Background jobs that must not overlap across processes (web workers, the scheduler worker,
+anything with ENABLE_SCHEDULER set).
+
+Every run is recorded in `job_runs`. Before doing any work a run takes a lease row in
+`job_locks`. The lease is a single conditional upsert, so only one process can hold it,
+and it is renewed while the job runs. If the process dies, the lease expires after
+LEASE_SECONDS and the next run can take it over. A run that finds the lease held is
+recorded as `skipped`.
+
+    run_id = enqueue("weekly_scrape", requested_by="admin")   # returns at once
+    run_job("weekly_scrape")                                   # runs in the caller's thread
+"""
+import json, logging, os, socket, threading, time, uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+
+from . import db
+from .models import JobRun
+
+log = logging.getLogger(__name__)
+
+LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300))
+OWNER_PREFIX = f"{socket.gethostname()}:{os.getpid()}"
+
+ACQUIRE_SQL = text("""
+  insert into job_locks (name, owner, expires_at) values (:n, :o, :exp)
+  on conflict (name) do update set owner = excluded.owner, expires_at = excluded.expires_at
+  where job_locks.expires_at < :now or job_locks.owner = :o
+""")
+
+
+def _weekly_scrape():
+    from .tasks.weekly import run_weekly_job
+    return run_weekly_job()
+
+def _match_sync():
+    from .routes.api import refresh_default_ranges
+    return refresh_default_ranges()
+
+def _live_poll():
+    from .tasks.live import run_live_poll
+    return run_live_poll()
+
+JOBS = {"weekly_scrape": _weekly_scrape, "match_sync": _match_sync, "live_poll": _live_poll}
+
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="jobs")
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+# ---------- Lease ----------
+
+def acquire_lease(name: str, owner: str, ttl: int = LEASE_SECONDS) -> bool:
+    now = _now()
+    with db.SessionLocal() as s:
+        s.execute(ACQUIRE_SQL, {"n": name, "o": owner, "exp": now + timedelta(seconds=ttl), "now": now})
+        held_by = s.execute(text("select owner from job_locks where name = :n"), {"n": name}).scalar()
+        s.commit()
+    return held_by == owner
+
+def release_lease(name: str, owner: str):
+    with db.SessionLocal() as s:
+        s.execute(text("delete from job_locks where name = :n and owner = :o"), {"n": name, "o": owner})
+        s.commit()
+
+class _Renewer(threading.Thread):
+    """Extends the lease every ttl/3 until stopped, so long jobs keep it."""
+
+    def __init__(self, name, owner, ttl):
+        super().__init__(daemon=True, name=f"lease-{name}")
+        self.args_ = (name, owner, ttl)
+        self.stop = threading.Event()
+
+    def run(self):
+        name, owner, ttl = self.args_
+        while not self.stop.wait(ttl / 3):
+            if not acquire_lease(name, owner, ttl):
+                log.warning("lost lease for %s", name)
+                return
+
+# ---------- Runs ----------
+
+def _rows_in(report) -> int | None:
+    """Sum of inserted/updated/rows counters anywhere in a job report."""
+    if isinstance(report, dict):
+        found = [v for k, v in report.items() if k in ("inserted", "updated", "rows") and isinstance(v, int)]
+        nested = [n for n in (_rows_in(v) for v in report.values() if isinstance(v, (dict, list))) if n is not None]
+        return sum(found) + sum(nested) if found or nested else None
+    if isinstance(report, list):
+        nested = [n for n in (_rows_in(v) for v in report) if n is not None]
+        return sum(nested) if nested else None
+    return None
+
+def _update_run(run_id, **fields):
+    with db.SessionLocal() as s:
+        run = s.get(JobRun, run_id)
+        for k, v in fields.items():
+            setattr(run, k, v)
+        s.commit()
+
+def create_run(name: str, requested_by: str | None = None) -> int:
+    if name not in JOBS:
+        raise KeyError(name)
+    with db.SessionLocal() as s:
+        run = JobRun(name=name, status="queued", requested_by=requested_by, created_at=_now())
+        s.add(run)
+        s.commit()
+        return run.id
+
+def run_job(name: str, run_id: int | None = None, requested_by: str | None = None,
+            ttl: int = LEASE_SECONDS) -> dict:
+    """Run `name` now under its lease; returns the run record as a dict."""
+    run_id = run_id or create_run(name, requested_by)
+    owner = f"{OWNER_PREFIX}:{uuid.uuid4().hex[:8]}"
+    if not acquire_lease(name, owner, ttl):
+        _update_run(run_id, status="skipped", finished_at=_now(), error="another run holds the lease")
+        return get_run(run_id)
+
+    started, t0 = _now(), time.perf_counter()
+    _update_run(run_id, status="running", started_at=started)
+    renewer = _Renewer(name, owner, ttl)
+    renewer.start()
+    try:
+        report = JOBS[name]()
+        _update_run(run_id, status="succeeded", finished_at=_now(),
+                    duration_ms=int((time.perf_counter() - t0) * 1000),
+                    rows=_rows_in(report), result=json.dumps(report, default=str))
+    except Exception as e:
+        log.exception("job %s (run %s) failed", name, run_id)
+        _update_run(run_id, status="failed", finished_at=_now(),
+                    duration_ms=int((time.perf_counter() - t0) * 1000), error=f"{type(e).__name__}: {e}")
+    finally:
+        renewer.stop.set()
+        release_lease(name, owner)
+    return get_run(run_id)
+
+def enqueue(name: str, requested_by: str | None = None) -> int:
+    """Record a queued run and start it on the background pool; returns the run id."""
+    run_id = create_run(name, requested_by)
+    _pool.submit(run_job, name, run_id)
+    return run_id
+
+def get_run(run_id: int) -> dict | None:
+    with db.SessionLocal() as s:
+        run = s.get(JobRun, run_id)
+        if run is None:
+            return None
+        return {"id": run.id, "name": run.name, "status": run.status, "requested_by": run.requested_by,
+                "created_at": run.created_at, "started_at": run.started_at, "finished_at": run.finished_at,
+                "duration_ms": run.duration_ms, "rows": run.rows,
+                "result": json.loads(run.result) if run.result else None, "error": run.error}
@@ -0,0 +1,152 @@
+# backend/match_calendar.py
+"""
+Process-wide calendar of every stored match, answering the prediction routes' window and
+lock questions without a query each time. A season is ~380 fixtures, so the whole
+calendar is a few flat arrays:
+
+    day   local match date as an ordinal   sorted; a Thu→Wed window is one contiguous run
+    kick  UTC kickoff, epoch seconds       kickoff order within a day
+    ids   match_id
+    open  1 until the match is finished
+
+plus two permutations for the other lookups: match ids sorted (id -> position) and
+kickoffs sorted (time -> position). Every lookup is a bisect.
+
+The arrays are rebuilt from `matches` on the first lookup after `invalidate()` (called by
+the ingest path whenever rows were inserted or updated), after MAX_AGE seconds (matches
+upserted by another process), or when asked about a match id it has not seen.
+"""
+import os, threading, time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timezone
+from typing import NamedTuple
+from sqlalchemy import select
+
+from . import db
+from .models import Match
+
+FINISHED = ("FT", "FINISHED", "AET", "PEN")     # same set the /api handlers treat as played
+MAX_AGE = float(os.getenv("MATCH_CALENDAR_MAX_AGE", 60))
+MISS_RELOAD = 5.0     # an unknown match id reloads at most this often
+
+
+def _aware(dt):
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class _Arrays(NamedTuple):
+    day: array
+    kick: array
+    ids: array
+    open: array
+    id_sorted: array
+    id_pos: array
+    kick_sorted: array
+    kick_pos: array
+    loaded_at: float | None
+
+
+def _build(rows, loaded_at=None) -> _Arrays:
+    rows = sorted((d.toordinal(), _aware(k).timestamp(), mid, status not in FINISHED)
+                  for mid, k, d, status in rows if k is not None and d is not None)
+    by_id = sorted(range(len(rows)), key=lambda i: rows[i][2])
+    by_kick = sorted(range(len(rows)), key=lambda i: (rows[i][1], rows[i][2]))
+    return _Arrays(array("l", (r[0] for r in rows)), array("d", (r[1] for r in rows)),
+                   array("q", (r[2] for r in rows)), array("b", (r[3] for r in rows)),
+                   array("q", (rows[i][2] for i in by_id)), array("l", by_id),
+                   array("d", (rows[i][1] for i in by_kick)), array("l", by_kick), loaded_at)
+
+
+class MatchCalendar:
+    """Lookups read one immutable set of arrays; a reload swaps in a new set (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.reset()
+
+    def reset(self):
+        self._a = _build([])
+        self.loads = 0
+
+    def invalidate(self):
+        self._generation += 1
+        self._a = self._a._replace(loaded_at=None)
+
+    def load(self, rows, generation=None):
+        """Rebuild from (match_id, utc_kickoff, date, status) rows."""
+        # rows read before an invalidate() that landed mid-reload are used once, then reloaded
+        fresh = generation is None or generation == self._generation
+        self._a = _build(rows, time.monotonic() if fresh else None)
+        self.loads += 1
+
+    def _reload(self):
+        with self._lock:
+            generation = self._generation
+            with db.request_session() as s:     # the request's own connection when there is one
+                rows = s.execute(select(Match.match_id, Match.utc_kickoff, Match.date, Match.status)).all()
+            self.load(rows, generation)
+            return self._a
+
+    def _current(self) -> _Arrays:
+        a = self._a
+        if a.loaded_at is None or time.monotonic() - a.loaded_at > MAX_AGE:
+            a = self._reload()
+        return a
+
+    def _pos(self, match_id):
+        a = self._current()
+        for attempt in (0, 1):
+            i = bisect_left(a.id_sorted, match_id)
+            if i < len(a.id_sorted) and a.id_sorted[i] == match_id:
+                return a, a.id_pos[i]
+            if attempt or (a.loaded_at is not None and time.monotonic() - a.loaded_at < MISS_RELOAD):
+                return a, None
+            a = self._reload()
+
+    def _range(self, start: date, end: date):
+        a = self._current()
+        return a, bisect_left(a.day, start.toordinal()), bisect_right(a.day, end.toordinal())
+
+    # ---------- Lookups ----------
+
+    def window(self, start: date, end: date) -> list[int]:
+        """Match ids dated within [start, end]."""
+        a, lo, hi = self._range(start, end)
+        return list(a.ids[lo:hi])
+
+    def first_kickoff(self, start: date, end: date) -> datetime | None:
+        """Earliest UTC kickoff among matches dated within [start, end]."""
+        a, lo, hi = self._range(start, end)
+        return datetime.fromtimestamp(min(a.kick[lo:hi]), timezone.utc) if hi > lo else None
+
+    def kickoff(self, match_id) -> datetime | None:
+        a, i = self._pos(match_id)
+        return None if i is None else datetime.fromtimestamp(a.kick[i], timezone.utc)
+
+    def in_window(self, match_id, start: date, end: date) -> bool | None:
+        """None for a match the calendar doesn't know."""
+        a, i = self._pos(match_id)
+        return None if i is None else start.toordinal() <= a.day[i] <= end.toordinal()
+
+    def is_locked(self, match_id, now: datetime | None = None) -> bool | None:
+        """Predictions for a match lock at kickoff (UTC). None for an unknown match."""
+        a, i = self._pos(match_id)
+        now = now or datetime.now(timezone.utc)
+        return None if i is None else now.timestamp() >= a.kick[i]
+
+    def upcoming(self, now: datetime, limit: int) -> list[int]:
+        """Ids of the next `limit` unfinished matches kicking off after `now`, in kickoff order."""
+        a = self._current()
+        out = []
+        for j in range(bisect_right(a.kick_sorted, now.timestamp()), len(a.kick_sorted)):
+            if len(out) >= limit:
+                break
+            i = a.kick_pos[j]
+            if a.open[i]:
+                out.append(a.ids[i])
+        return out
+
+
+calendar = MatchCalendar()
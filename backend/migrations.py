@@ -0,0 +1,153 @@
+# backend/migrations.py
+"""
+Idempotent schema upgrades for databases created before the models declared
+their constraints/indexes. Safe to run on every boot, on SQLite and Postgres:
+
+    python -m backend.migrations
+
+On boot the app only calls `migrate_if_needed`, which compares a fingerprint of the
+models against the one stored by the last migration and skips the schema inspection
+when they match (one small query instead of a reflection pass over every table).
+"""
+import hashlib, logging
+from sqlalchemy import inspect, text, literal, UniqueConstraint
+
+from .db import Base
+from . import models  # noqa: F401  (register tables on Base.metadata)
+
+log = logging.getLogger(__name__)
+
+
+def _add_column(conn, table, col):
+    """ALTER TABLE ... ADD COLUMN for a model column the database doesn't have yet."""
+    dialect = conn.dialect
+    ddl = f"alter table {table.name} add column {col.name} {col.type.compile(dialect=dialect)}"
+    default = col.default.arg if col.default is not None and col.default.is_scalar else None
+    if default is not None:
+        ddl += " default " + str(literal(default).compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+        if not col.nullable:
+            ddl += " not null"
+    conn.execute(text(ddl))
+
+
+def _dedupe(conn, table, cols):
+    """Keep the newest row per `cols` so a unique index can be created. Returns rows deleted."""
+    pk = table.primary_key.columns.keys()[0]
+    deleted = conn.execute(text(f"""
+        delete from {table.name}
+        where {pk} not in (select max({pk}) from {table.name} group by {", ".join(cols)})
+    """)).rowcount
+    if deleted:
+        log.warning("deleted %d duplicate %s rows on (%s) before adding a unique index",
+                    deleted, table.name, ", ".join(cols))
+    return deleted
+
+
+def migrate(engine):
+    """Create missing tables, columns, unique constraints and indexes. Returns the list of applied steps."""
+    existed = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(engine)
+    applied = []
+
+    with engine.begin() as conn:
+        insp = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing_cols = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name not in existing_cols:
+                    _add_column(conn, table, col)
+                    applied.append(f"{table.name}.{col.name}")
+
+            index_names = {ix["name"] for ix in insp.get_indexes(table.name)}
+            unique_cols = {tuple(uc["column_names"]) for uc in insp.get_unique_constraints(table.name)}
+            unique_cols |= {tuple(ix["column_names"]) for ix in insp.get_indexes(table.name) if ix.get("unique")}
+
+            for c in table.constraints:
+                if not isinstance(c, UniqueConstraint) or not c.name:
+                    continue
+                cols = tuple(col.name for col in c.columns)
+                if cols in unique_cols or c.name in index_names:
+                    continue
+                _dedupe(conn, table, cols)
+                conn.execute(text(f"create unique index if not exists {c.name} on {table.name} ({', '.join(cols)})"))
+                applied.append(c.name)
+
+            for ix in table.indexes:
+                if ix.name in index_names:
+                    continue
+                cols = ", ".join(col.name for col in ix.columns)
+                unique = "unique " if ix.unique else ""
+                conn.execute(text(f"create {unique}index if not exists {ix.name} on {table.name} ({cols})"))
+                applied.append(ix.name)
+
+        # derived tables added after data already existed get filled from their source
+        if "cumulative_scores" not in existed and "weekly_scores" in existed:
+            from sqlalchemy.orm import Session
+            from .scoring import rebuild_cumulative
+            with Session(bind=conn) as s:
+                rebuild_cumulative(s)
+            applied.append("cumulative_scores (seeded)")
+        if "global_scores" not in existed and "weekly_scores" in existed:
+            from sqlalchemy.orm import Session
+            from .ranking import rebuild_global_scores
+            with Session(bind=conn) as s:
+                rebuild_global_scores(s)
+            applied.append("global_scores (seeded)")
+
+        # the prediction upsert used to write CURRENT_TIMESTAMP (whole seconds) while the ORM
+        # writes microseconds; SQLite compares these as text, which breaks the keyset cursor
+        if conn.dialect.name == "sqlite":
+            fixed = conn.execute(text("""
+                update predictions set updated_at = strftime('%Y-%m-%d %H:%M:%f', updated_at) || '000'
+                where length(updated_at) = 19
+            """)).rowcount
+            if fixed:
+                applied.append(f"predictions.updated_at ({fixed} normalized)")
+
+    return applied
+
+
+def schema_fingerprint() -> str:
+    """sha1 over every table, column, constraint and index the models declare."""
+    parts = []
+    for table in Base.metadata.sorted_tables:
+        parts.append(table.name)
+        parts += [f"{c.name}:{c.type}:{c.nullable}" for c in table.columns]
+        parts += sorted(c.name for c in table.constraints if c.name)
+        parts += sorted(ix.name for ix in table.indexes)
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def _stored_fingerprint(engine):
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("select fingerprint from schema_state where id = 1")).scalar()
+    except Exception:        # table not there yet
+        return None
+
+
+def migrate_if_needed(engine, force: bool = False):
+    """Run `migrate` unless the database was already migrated for these models. Returns applied steps or None."""
+    fp = schema_fingerprint()
+    if not force and _stored_fingerprint(engine) == fp:
+        return None
+    applied = migrate(engine)
+    with engine.begin() as conn:
+        conn.execute(text("create table if not exists schema_state (id integer primary key, fingerprint varchar(40))"))
+        conn.execute(text("""
+            insert into schema_state (id, fingerprint) values (1, :fp)
+            on conflict (id) do update set fingerprint = excluded.fingerprint
+        """), {"fp": fp})
+    return applied
+
+
+def main():
+    from .config import get_config
+    from .db import init_db
+    engine, _ = init_db(get_config().database_url, profile="worker")
+    applied = migrate_if_needed(engine, force=True)
+    print(f"applied: {', '.join(applied) if applied else 'nothing (up to date)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Date, Boolean, Text, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Date, Boolean, Text, Float, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from .db import Base
@@ -18,6 +18,12 @@ class Match(Base):
     home_score    = Column(Integer)
     away_score    = Column(Integer)
     updated_at    = Column(DateTime(timezone=True), nullable=False)
+    payload_hash  = Column(String(40))   # sha1 of the ingested fields; unchanged payloads are skipped
+    __table_args__ = (
+        Index("ix_matches_date", "date"),
+        Index("ix_matches_utc_kickoff", "utc_kickoff"),
+        Index("ix_matches_updated", "updated_at"),     # max(updated_at) is the matches data version
+    )
 
 class User(Base):
     __tablename__ = "users"
@@ -46,8 +52,12 @@ class GroupMember(Base):
     status       = Column(String(16), nullable=False, default="approved")        # NEW
     requested_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))  # NEW
     approved_at  = Column(DateTime(timezone=True))                                # NEW
-    UniqueConstraint("group_id", "user_id", name="uq_member")
     is_admin     = Column(Boolean, nullable=False, default=False)
+    __table_args__ = (
+        UniqueConstraint("group_id", "user_id", name="uq_member"),
+        Index("ix_group_members_group_user_status", "group_id", "user_id", "status"),
+        Index("ix_group_members_user_status", "user_id", "status"),
+    )
 
 class Prediction(Base):
     __tablename__ = "predictions"
@@ -59,7 +69,12 @@ class Prediction(Base):
     away_pred = Column(Integer, nullable=False)
     created_at= Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at= Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
-    UniqueConstraint("group_id", "user_id", "match_id", name="uq_prediction")
+    __table_args__ = (
+        UniqueConstraint("group_id", "user_id", "match_id", name="uq_prediction"),
+        Index("ix_predictions_group_match", "group_id", "match_id"),
+        Index("ix_predictions_match", "match_id"),
+        Index("ix_predictions_group_updated", "group_id", "updated_at", "id"),   # keyset pages of others' picks
+    )
 
 class WeeklyScore(Base):
     __tablename__ = "weekly_scores"
@@ -69,4 +84,99 @@ class WeeklyScore(Base):
     week_start= Column(Date, nullable=False)  # Thursday (local)
     points    = Column(Integer, nullable=False)
     updated_at= Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
-    UniqueConstraint("group_id", "user_id", "week_start", name="uq_weekly_score")
\ No newline at end of file
+    __table_args__ = (
+        UniqueConstraint("group_id", "user_id", "week_start", name="uq_weekly_score"),
+        Index("ix_weekly_scores_group_week", "group_id", "week_start"),
+        Index("ix_weekly_scores_user", "user_id"),          # global_scores refresh per user
+    )
+
+class CumulativeScore(Base):
+    """
+    Running total per (group, user) up to and including each scored week, kept in step
+    with weekly_scores by scoring.py. Points over any week range are one row minus another.
+    """
+    __tablename__ = "cumulative_scores"
+    id         = Column(Integer, primary_key=True, autoincrement=True)
+    group_id   = Column(Integer, ForeignKey("groups.id"), nullable=False)
+    user_id    = Column(Integer, ForeignKey("users.id"), nullable=False)
+    week_start = Column(Date, nullable=False)
+    points     = Column(Integer, nullable=False)       # that week's points (mirrors weekly_scores)
+    cum_points = Column(Integer, nullable=False)       # sum of points for weeks <= week_start
+    __table_args__ = (
+        UniqueConstraint("group_id", "user_id", "week_start", name="uq_cumulative_score"),
+        Index("ix_cumulative_scores_group_week", "group_id", "week_start"),
+    )
+
+class GlobalScore(Base):
+    """
+    Site-wide standing per user, derived from weekly_scores by ranking.refresh_global_scores.
+    scope 'all' covers every group, 'public' only groups with is_public.
+    """
+    __tablename__ = "global_scores"
+    id          = Column(Integer, primary_key=True, autoincrement=True)
+    scope       = Column(String(10), nullable=False)
+    user_id     = Column(Integer, ForeignKey("users.id"), nullable=False)
+    best_points = Column(Integer, nullable=False)      # best total in any one group
+    avg_points  = Column(Float, nullable=False)        # mean total over the user's groups
+    groups      = Column(Integer, nullable=False)      # 0 = no scored groups in this scope
+    updated_at  = Column(DateTime(timezone=True), nullable=False)
+    __table_args__ = (
+        UniqueConstraint("scope", "user_id", name="uq_global_score"),
+        Index("ix_global_scores_updated", "updated_at"),
+    )
+
+class JobLock(Base):
+    """Lease held by whichever process is running a job (see jobs.py); expired leases can be taken over."""
+    __tablename__ = "job_locks"
+    name       = Column(String(64), primary_key=True)
+    owner      = Column(String(128), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+    id           = Column(Integer, primary_key=True, autoincrement=True)
+    name         = Column(String(64), nullable=False)
+    status       = Column(String(16), nullable=False)   # queued|running|succeeded|failed|skipped
+    requested_by = Column(String(128))
+    created_at   = Column(DateTime(timezone=True), nullable=False)
+    started_at   = Column(DateTime(timezone=True))
+    finished_at  = Column(DateTime(timezone=True))
+    duration_ms  = Column(Integer)
+    rows         = Column(Integer)                      # rows inserted/updated, when the job reports them
+    result       = Column(Text)                         # JSON report
+    error        = Column(Text)
+    __table_args__ = (
+        Index("ix_job_runs_name_created", "name", "created_at"),
+    )
+
+class DataVersion(Base):
+    """Counters bumped in the same transaction as the writes they track (see versions.py)."""
+    __tablename__ = "data_versions"
+    key        = Column(String(64), primary_key=True)   # e.g. "scores:<group_id>"
+    version    = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+class EventLog(Base):
+    """Events on their way to every web worker's SSE streams (see events.DbBroker); kept for minutes."""
+    __tablename__ = "event_log"
+    id         = Column(Integer, primary_key=True, autoincrement=True)
+    channel    = Column(String(64), nullable=False)
+    type       = Column(String(32), nullable=False)
+    data       = Column(Text, nullable=False)             # JSON
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    __table_args__ = (
+        Index("ix_event_log_created", "created_at"),
+    )
+
+class SyncRange(Base):
+    """Freshness of each upstream date range mirrored into `matches` (see services/sync.py)."""
+    __tablename__ = "sync_ranges"
+    range_key    = Column(String(64), primary_key=True)   # "<STATUS>:<from>:<to>"
+    date_from    = Column(Date, nullable=False)
+    date_to      = Column(Date, nullable=False)
+    status       = Column(String(20))
+    fetched_at   = Column(DateTime(timezone=True))        # last successful refresh
+    attempted_at = Column(DateTime(timezone=True))
+    last_error   = Column(Text)
+    failures     = Column(Integer, default=0)              # consecutive failed attempts
+    matches      = Column(Integer)
@@ -0,0 +1,400 @@
+# backend/ranking.py
+"""
+Global (cross-group) leaderboard.
+
+`global_scores` holds one row per (scope, user): best group total and average group
+total, refreshed for just the affected users whenever scoring writes weekly_scores.
+
+Each process keeps the rows in sorted `RankIndex`es (one per scope x metric). They are
+loaded once, then kept current by pulling rows whose updated_at moved since the last
+pull, on a background thread. A rank or "the 10 around me" lookup is a few bisects
+(O(log n)), never a sort or a query per request.
+"""
+import logging, threading, time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, text, bindparam
+
+from . import db
+from .models import GlobalScore
+
+log = logging.getLogger(__name__)
+
+SCOPES = ("all", "public")
+METRICS = ("best", "avg")
+CHUNK = 500
+
+SYNC_EVERY = 5.0          # seconds between pulls of changed rows
+SYNC_OVERLAP = 120        # re-read this much history each pull, for transactions that committed late
+FULL_RELOAD_EVERY = 600   # and start over from the table this often (off the request path)
+YIELD_EVERY = 10_000
+APPLY_CHUNK = 1_000
+
+# One INSERT ... SELECT per batch: each user's total per group, then best / mean / count
+# over every group ('all') and over public groups only ('public'). A user with no rows in a
+# scope gets groups=0, which drops them from that scope's index. Rows that come out
+# unchanged are left alone, so their updated_at doesn't send them to every RankIndex again.
+_GLOBAL_SQL = """
+  insert into global_scores (scope,user_id,best_points,avg_points,groups,updated_at)
+  select sc.scope, t.user_id,
+         coalesce(max(case when sc.scope = 'all' or t.is_public then t.total end), 0),
+         coalesce(round(avg(case when sc.scope = 'all' or t.is_public then t.total end), 2), 0),
+         count(case when sc.scope = 'all' or t.is_public then 1 end),
+         :ts
+  from (select ws.user_id, g.is_public, sum(ws.points) as total
+        from weekly_scores ws
+        join groups g on g.id = ws.group_id
+        where ws.user_id in {users}
+        group by ws.user_id, ws.group_id, g.is_public) t
+  cross join (select 'all' as scope union all select 'public') sc
+  where true
+  group by sc.scope, t.user_id
+  on conflict (scope,user_id) do update set
+    best_points=excluded.best_points, avg_points=excluded.avg_points,
+    groups=excluded.groups, updated_at=excluded.updated_at
+  where global_scores.best_points <> excluded.best_points
+     or global_scores.avg_points <> excluded.avg_points
+     or global_scores.groups <> excluded.groups
+"""
+
+GLOBAL_FOR_USERS_SQL = text(_GLOBAL_SQL.format(users=":uids")).bindparams(bindparam("uids", expanding=True))
+GLOBAL_FOR_GROUPS_SQL = text(_GLOBAL_SQL.format(
+    users="(select user_id from weekly_scores where group_id in :gids)")).bindparams(bindparam("gids", expanding=True))
+GLOBAL_REBUILD_SQL = text(_GLOBAL_SQL.format(users="(select user_id from weekly_scores)"))
+
+
+def _refresh(s, stmt, key, ids):
+    ids = sorted(set(ids))
+    now = datetime.now(timezone.utc)
+    for i in range(0, len(ids), CHUNK):
+        s.execute(stmt, {key: ids[i:i + CHUNK], "ts": now})
+    global_ranks.touch()
+
+
+def refresh_global_scores(s, user_ids):
+    """Recompute global_scores for `user_ids` inside the caller's transaction."""
+    _refresh(s, GLOBAL_FOR_USERS_SQL, "uids", user_ids)
+
+
+def refresh_global_for_groups(s, group_ids):
+    """Recompute global_scores for every user with weekly_scores in `group_ids`."""
+    _refresh(s, GLOBAL_FOR_GROUPS_SQL, "gids", group_ids)
+
+
+def rebuild_global_scores(s):
+    s.execute(GLOBAL_REBUILD_SQL, {"ts": datetime.now(timezone.utc)})
+    global_ranks.touch()
+
+
+class _SortedKeys:
+    """
+    A sorted list kept as a list of sorted buckets of at most 2 * LOAD items, so an insert
+    or delete shifts one bucket rather than every entry after it. A Fenwick tree over the
+    bucket lengths turns a bucket into its position (and a position into its bucket) in
+    O(log n); it is rebuilt only when a bucket splits or empties.
+    """
+    LOAD = 500
+
+    def __init__(self):
+        self._buckets = []       # sorted lists, each non-empty
+        self._maxes = []         # last item of each bucket
+        self._tree = [0]         # Fenwick tree of len(bucket), 1-based
+        self._len = 0
+
+    @classmethod
+    def from_sorted(cls, keys):
+        """Build from an already sorted list in one pass."""
+        out = cls()
+        out._buckets = [keys[i:i + cls.LOAD] for i in range(0, len(keys), cls.LOAD)]
+        out._maxes = [b[-1] for b in out._buckets]
+        out._len = len(keys)
+        out._rebuild_tree()
+        return out
+
+    def __len__(self):
+        return self._len
+
+    def _rebuild_tree(self):
+        n = len(self._buckets)
+        tree = [0] + [len(b) for b in self._buckets]
+        for i in range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, b, delta):
+        i = b + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _before(self, b) -> int:
+        """Items in the buckets before bucket `b`."""
+        total = 0
+        while b > 0:
+            total += self._tree[b]
+            b -= b & -b
+        return total
+
+    def _locate(self, pos):
+        """(bucket, offset) of position `pos`; bucket == len(buckets) past the end."""
+        b, n = 0, len(self._buckets)
+        step = 1 << n.bit_length()
+        while step:
+            if b + step <= n and self._tree[b + step] <= pos:
+                b += step
+                pos -= self._tree[b]
+            step >>= 1
+        return b, pos
+
+    def _bucket(self, key):
+        return min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+
+    def add(self, key):
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._rebuild_tree()
+        else:
+            b = self._bucket(key)
+            bucket = self._buckets[b]
+            insort(bucket, key)
+            self._maxes[b] = bucket[-1]
+            if len(bucket) > 2 * self.LOAD:
+                self._buckets[b:b + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+                self._maxes[b:b + 1] = [bucket[self.LOAD - 1], bucket[-1]]
+                self._rebuild_tree()
+            else:
+                self._tree_add(b, 1)
+        self._len += 1
+
+    def remove(self, key):
+        """Remove `key`, which must be present."""
+        b = self._bucket(key)
+        bucket = self._buckets[b]
+        del bucket[bisect_left(bucket, key)]
+        if bucket:
+            self._maxes[b] = bucket[-1]
+            self._tree_add(b, -1)
+        else:
+            del self._buckets[b], self._maxes[b]
+            self._rebuild_tree()
+        self._len -= 1
+
+    def bisect_left(self, key) -> int:
+        b = bisect_left(self._maxes, key)
+        if b == len(self._buckets):
+            return self._len
+        return self._before(b) + bisect_left(self._buckets[b], key)
+
+    def slice(self, lo, hi) -> list:
+        lo, hi = max(lo, 0), min(hi, self._len)
+        out = []
+        if lo >= hi:
+            return out
+        b, off = self._locate(lo)
+        while len(out) < hi - lo:
+            bucket = self._buckets[b]
+            out.extend(bucket[off:off + hi - lo - len(out)])
+            b, off = b + 1, 0
+        return out
+
+
+class RankIndex:
+    """Users sorted by score (desc), then user_id. Ranks are competition style: 1, 2, 2, 4."""
+
+    def __init__(self):
+        self._keys = _SortedKeys()   # (-score, user_id)
+        self._score = {}             # user_id -> score
+
+    @classmethod
+    def from_scores(cls, scores: dict):
+        """Build from {user_id: score} with one sort instead of an insert per user."""
+        ix = cls()
+        ix._score = dict(scores)
+        ix._keys = _SortedKeys.from_sorted(sorted((-score, uid) for uid, score in ix._score.items()))
+        return ix
+
+    def __len__(self):
+        return len(self._keys)
+
+    def upsert(self, user_id, score):
+        if self._score.get(user_id) == score:
+            return               # re-reads inside SYNC_OVERLAP are mostly unchanged rows
+        self.remove(user_id)
+        self._score[user_id] = score
+        self._keys.add((-score, user_id))
+
+    def remove(self, user_id):
+        old = self._score.pop(user_id, None)
+        if old is not None:
+            self._keys.remove((-old, user_id))
+
+    def _rank_of(self, score):
+        return self._keys.bisect_left((-score,)) + 1
+
+    def rank(self, user_id):
+        score = self._score.get(user_id)
+        return None if score is None else (self._rank_of(score), score)
+
+    def _entries(self, lo, hi):
+        out, rank, prev = [], None, None
+        for i, (neg, uid) in enumerate(self._keys.slice(lo, hi), lo):
+            if neg != prev:      # a new score ranks at its position; ties keep the rank above
+                rank = self._rank_of(-neg) if prev is None else i + 1
+                prev = neg
+            out.append({"rank": rank, "user_id": uid, "points": -neg})
+        return out
+
+    def top(self, n):
+        return self._entries(0, n)
+
+    def around(self, user_id, n=10):
+        """Up to `n` neighbours split above/below `user_id`, plus the user; [] if unranked."""
+        score = self._score.get(user_id)
+        if score is None:
+            return []
+        i = self._keys.bisect_left((-score, user_id))
+        lo = max(0, i - n // 2)
+        hi = min(len(self._keys), lo + n + 1)
+        lo = max(0, hi - n - 1)
+        return self._entries(lo, hi)
+
+
+ROWS_Q = select(GlobalScore.scope, GlobalScore.user_id, GlobalScore.best_points,
+                GlobalScore.avg_points, GlobalScore.groups, GlobalScore.updated_at)
+
+
+def _build(rows):
+    """
+    Fresh indexes (and the newest updated_at) from a full read of global_scores, streamed
+    in batches of YIELD_EVERY rows. Sleeps for 0s after each batch and between indexes:
+    on a gevent worker the refresh "thread" is a greenlet, and this lets the requests on
+    that worker run in between.
+    """
+    scores = {(scope, metric): {} for scope in SCOPES for metric in METRICS}
+    since = None
+    for i, (scope, uid, best, avg, n, ts) in enumerate(rows):
+        for metric, score in (("best", best), ("avg", avg)):
+            if n and (scope, metric) in scores:
+                scores[(scope, metric)][uid] = score
+        if since is None or ts > since:
+            since = ts
+        if i % YIELD_EVERY == 0:
+            time.sleep(0)
+    indexes = {}
+    for k, v in scores.items():
+        indexes[k] = RankIndex.from_scores(v)
+        time.sleep(0)
+    return indexes, since
+
+
+class GlobalRanks:
+    """
+    The per-process RankIndexes, synced from global_scores (thread-safe).
+
+    Lookups never read global_scores, except the very first one, which has nothing to
+    serve until the load is done. Once SYNC_EVERY has passed (or a write here called
+    touch()), a lookup starts one background refresh and returns the current standings.
+    The refresh either pulls the changed rows or, every FULL_RELOAD_EVERY, rebuilds every
+    index from one read and swaps them in. The lock is held only to apply rows and swap.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()            # the indexes and sync state
+        self._refresh_lock = threading.RLock()   # one load / pull / rebuild at a time
+        self.reset()
+
+    def reset(self):
+        self.indexes = {(scope, metric): RankIndex() for scope in SCOPES for metric in METRICS}
+        self._since = None
+        self._loaded_at = None
+        self._synced_at = 0.0
+        self._refreshing = False
+        self._thread = None
+
+    def touch(self):
+        """This process wrote rows; refresh on the next lookup instead of waiting SYNC_EVERY."""
+        self._synced_at = 0.0
+
+    def _apply(self, rows):
+        for scope, uid, best, avg, n, ts in rows:
+            for metric, score in (("best", best), ("avg", avg)):
+                ix = self.indexes.get((scope, metric))
+                if ix is None:
+                    continue
+                if n:
+                    ix.upsert(uid, score)
+                else:
+                    ix.remove(uid)
+            if self._since is None or ts > self._since:
+                self._since = ts
+
+    def _reload(self, s, started):
+        indexes, since = _build(s.execute(ROWS_Q.execution_options(yield_per=YIELD_EVERY)))
+        with self._lock:
+            self.indexes, self._since = indexes, since
+            self._loaded_at = self._synced_at = started
+
+    def _pull(self, s, started):
+        q = ROWS_Q
+        if self._since is not None:
+            q = q.where(GlobalScore.updated_at >= self._since - timedelta(seconds=SYNC_OVERLAP))
+        rows = s.execute(q).all()
+        for i in range(0, len(rows), APPLY_CHUNK):       # lookups get the lock in between
+            with self._lock:
+                self._apply(rows[i:i + APPLY_CHUNK])
+            time.sleep(0)
+        self._synced_at = started
+
+    def refresh(self, s):
+        """Pull changed rows now, or rebuild everything once FULL_RELOAD_EVERY has passed."""
+        with self._refresh_lock:
+            started = time.monotonic()
+            if self._loaded_at is None or started - self._loaded_at > FULL_RELOAD_EVERY:
+                self._reload(s, started)
+            else:
+                self._pull(s, started)
+
+    def _refresh_in_background(self):
+        try:
+            with db.SessionLocal() as s:
+                self.refresh(s)
+        except Exception:
+            log.exception("global ranks refresh failed; serving the current indexes")
+        finally:
+            self._refreshing = False
+
+    def sync(self, s):
+        if self._loaded_at is None:
+            self.refresh(s)
+            return
+        now = time.monotonic()
+        with self._lock:
+            due = now - self._synced_at >= SYNC_EVERY or now - self._loaded_at > FULL_RELOAD_EVERY
+            if not due or self._refreshing:
+                return
+            self._refreshing = True
+            self._thread = threading.Thread(target=self._refresh_in_background, name="global-ranks-refresh",
+                                            daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: float | None = None):
+        """Block until a background refresh that is running has finished."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def standings(self, s, scope="all", metric="best", user_id=None, top=10, around=10) -> dict:
+        """Top `top`, plus `user_id`'s rank and the `around` users next to them."""
+        self.sync(s)
+        with self._lock:
+            ix = self.indexes[(scope, metric)]
+            me = ix.rank(user_id) if user_id is not None else None
+            return {"scope": scope, "metric": metric, "total": len(ix), "top": ix.top(top),
+                    "me": {"rank": me[0], "points": me[1]} if me else None,
+                    "around": ix.around(user_id, around) if me else []}
+
+
+global_ranks = GlobalRanks()
@@ -5,6 +5,8 @@ from .auth import bp as auth_bp, login_manager
 from .groups import bp as groups_bp
 from .predictions import bp as preds_bp
 from .leaderboard import bp as leaderboard_bp
+from .dashboard import bp as dashboard_bp
+from .events import bp as events_bp
 from .auth import bp as auth_bp, login_manager
 
 ALL_BLUEPRINTS = [auth_bp]
@@ -17,6 +19,8 @@ def register_blueprints(app):
     app.register_blueprint(groups_bp)
     app.register_blueprint(preds_bp)
     app.register_blueprint(leaderboard_bp)
+    app.register_blueprint(dashboard_bp)
+    app.register_blueprint(events_bp)
     for bp in ALL_BLUEPRINTS:
         if bp.name in app.blueprints:  # already registered -> skip
             continue
@@ -1,9 +1,46 @@
-from flask import Blueprint, jsonify
-from ..tasks.weekly import run_weekly_job
+from flask import Blueprint, jsonify, request
+from flask_login import current_user
+from functools import wraps
+import hmac, os
+from ..cache import all_stats
+from .. import db, jobs
 
 bp = Blueprint("admin", __name__)
 
+def admin_required(fn):
+    """An `X-Admin-Token` (or bearer token) equal to ADMIN_TOKEN, or a logged-in user in ADMIN_EMAILS."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = os.getenv("ADMIN_TOKEN")
+        auth = request.headers.get("Authorization", "")
+        sent = request.headers.get("X-Admin-Token") or (auth[7:] if auth.startswith("Bearer ") else "")
+        if token and sent and hmac.compare_digest(sent, token):
+            return fn(*args, **kwargs)
+        emails = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
+        if current_user.is_authenticated and current_user.email.lower() in emails:
+            return fn(*args, **kwargs)
+        return {"error": "admin only"}, 403
+    return wrapper
+
+def _requester():
+    return current_user.email if current_user.is_authenticated else "token"
+
 @bp.post("/admin/run-scrape")
+@admin_required
 def run_scrape_now():
-    result = run_weekly_job()
-    return jsonify({"ok": True, **result})
+    """Queue the weekly scrape; poll /admin/jobs/<id> for the outcome."""
+    run_id = jobs.enqueue("weekly_scrape", requested_by=_requester())
+    return {"ok": True, "job_id": run_id, "status_url": f"/admin/jobs/{run_id}"}, 202
+
+@bp.get("/admin/jobs/<int:run_id>")
+@admin_required
+def job_status(run_id):
+    run = jobs.get_run(run_id)
+    if run is None:
+        return {"error": "no such job"}, 404
+    return {"ok": True, "job": run}
+
+@bp.get("/admin/cache-stats")
+@admin_required
+def cache_stats():
+    return jsonify({"ok": True, "caches": all_stats(), "db_pool": db.pool_stats()})
@@ -1,20 +1,18 @@
 from flask import Blueprint, request, jsonify, current_app
+from contextlib import nullcontext
+import threading
 from datetime import date, timedelta, timezone, datetime
-from zoneinfo import ZoneInfo
-from sqlalchemy import text
-from requests import HTTPError
+from sqlalchemy import text, bindparam
 
-from ..config import Config
-from ..services.football_data import fetch_matches, to_local_from_utc_iso
+from ..config import get_config
 from .. import db
+from ..match_calendar import calendar
+from ..http_cache import respond
+from .. import versions
 
 bp = Blueprint("api", __name__)
-cfg = Config.from_env()
-
-try:
-    LOCAL_TZ = ZoneInfo(cfg.timezone)
-except Exception:
-    LOCAL_TZ = None
+cfg = get_config()
+LOCAL_TZ = cfg.local_tz
 
 def iso(d: date) -> str:
     return d.strftime("%Y-%m-%d")
@@ -29,100 +27,33 @@ def prev_range(days=7):
     s = e - timedelta(days=days - 1)
     return iso(s), iso(e)
 
-# ---------- Helpers ----------
-
-def _upsert_matches_from_api(api_items, finished: bool):
-    """
-    Map football-data API objects into our schema and upsert into `matches`.
-    - finished=True  -> status 'FT' and includes scores
-    - finished=False -> status 'SCHEDULED' and scores null
-    """
-    season_label = getattr(cfg, "season_label", None)
-
-    with db.SessionLocal() as s:
-        for m in api_items:
-            # API fields
-            utc_iso = m.get("utcDate")
-            home = (m.get("homeTeam") or {}).get("name")
-            away = (m.get("awayTeam") or {}).get("name")
+# ---------- Queries ----------
 
-            # Convert to local + date/time strings for our columns
-            dt_loc, d_str, t_str = to_local_from_utc_iso(utc_iso, LOCAL_TZ) if utc_iso else (None, None, None)
+RESULTS_SQL = text("""
+    SELECT match_id, date, time, home, away, home_score, away_score, status
+    FROM matches
+    WHERE date BETWEEN :a AND :b
+      AND status IN ('FT','FINISHED','AET','PEN','AWARDED')
+    ORDER BY date DESC, match_id DESC
+""")
 
-            # Scores (only for finished)
-            ft = (m.get("score") or {}).get("fullTime") or {}
-            home_score = ft.get("home") if finished else None
-            away_score = ft.get("away") if finished else None
+FIXTURES_SQL = text("""
+    SELECT date, time, home, away, season
+    FROM matches
+    WHERE date BETWEEN :a AND :b
+      AND (status IS NULL OR status NOT IN ('FT','AET','PEN','FINISHED'))
+    ORDER BY utc_kickoff ASC, match_id ASC
+""")
 
-            # Timestamps for utc/local kickoff
-            utc_ts = None
-            try:
-                if utc_iso:
-                    utc_ts = datetime.fromisoformat(utc_iso.replace("Z", "+00:00"))
-            except Exception:
-                utc_ts = None
+MATCHES_BY_ID_SQL = text("SELECT match_id, date, time, home, away FROM matches WHERE match_id IN :ids").bindparams(
+    bindparam("ids", expanding=True))
 
-            s.execute(
-                text(
-                    """
-                    INSERT INTO matches
-                      (match_id, status, competition, season,
-                       home, away, utc_kickoff, local_kickoff,
-                       date, time, home_score, away_score, updated_at)
-                    VALUES
-                      (:id, :status, :competition, :season,
-                       :home, :away, :utc_kickoff, :local_kickoff,
-                       :date, :time, :hs, :as, now())
-                    ON CONFLICT (match_id) DO UPDATE SET
-                      status        = EXCLUDED.status,
-                      competition   = EXCLUDED.competition,
-                      season        = EXCLUDED.season,
-                      home          = EXCLUDED.home,
-                      away          = EXCLUDED.away,
-                      utc_kickoff   = EXCLUDED.utc_kickoff,
-                      local_kickoff = EXCLUDED.local_kickoff,
-                      date          = EXCLUDED.date,
-                      time          = EXCLUDED.time,
-                      home_score    = EXCLUDED.home_score,
-                      away_score    = EXCLUDED.away_score,
-                      updated_at    = now()
-                    """
-                ),
-                {
-                    "id": m.get("id"),
-                    "status": "FT" if finished else "SCHEDULED",
-                    "competition": "Premier League",
-                    "season": season_label,
-                    "home": home,
-                    "away": away,
-                    "utc_kickoff": utc_ts,
-                    "local_kickoff": utc_ts,  # convert to real local tz if you prefer
-                    "date": d_str,
-                    "time": t_str,            # <— store time string
-                    "hs": home_score,
-                    "as": away_score,
-                },
-            )
-        s.commit()
+# ---------- Helpers ----------
 
 def _db_results(a: date, b: date):
     """Finished matches from DB; include time field for the frontend to ignore/show."""
-    with db.SessionLocal() as s:
-        rows = s.execute(
-            text(
-                """
-                SELECT match_id, date, time, home, away, home_score, away_score, status
-                FROM matches
-                WHERE date BETWEEN :a AND :b
-                  AND (
-                        status IN ('FT','FINISHED','AET','PEN')
-                     OR (home_score IS NOT NULL AND away_score IS NOT NULL)
-                  )
-                ORDER BY date DESC, match_id DESC
-                """
-            ),
-            {"a": a, "b": b},
-        ).mappings().all()
+    with db.request_session() as s:
+        rows = s.execute(RESULTS_SQL, {"a": a, "b": b}).mappings().all()
     return [
         {
             "match_id": r["match_id"],
@@ -136,22 +67,33 @@ def _db_results(a: date, b: date):
         for r in rows
     ]
 
-def _db_upcoming(now_utc: datetime, limit: int):
-    """Upcoming matches from DB; include time field."""
-    with db.SessionLocal() as s:
-        rows = s.execute(
-            text(
-                """
-                SELECT match_id, date, time, home, away
-                FROM matches
-                WHERE (status IS NULL OR status NOT IN ('FT','AET','PEN','FINISHED'))
-                  AND utc_kickoff > :now_utc
-                ORDER BY utc_kickoff ASC
-                LIMIT :n
-                """
-            ),
-            {"now_utc": now_utc, "n": limit},
-        ).mappings().all()
+def _db_fixtures(a: date, b: date):
+    """Not-yet-finished matches from DB in [a, b], kickoff order."""
+    with db.request_session() as s:
+        rows = s.execute(FIXTURES_SQL, {"a": a, "b": b}).mappings().all()
+    return [
+        {
+            "date": r["date"].isoformat() if hasattr(r["date"], "isoformat") else str(r["date"]),
+            "time": r["time"],
+            "home": r["home"],
+            "away": r["away"],
+            "competition": "Premier League",
+            "season": r["season"] or cfg.season_label,
+        }
+        for r in rows
+    ]
+
+def _db_upcoming(now_utc: datetime, limit: int, session=None):
+    """
+    Upcoming matches from DB; include time field. Reuses `session` when given.
+    Which matches (and their order) comes from the match calendar; the DB only fills in rows.
+    """
+    ids = calendar.upcoming(now_utc, limit)
+    if not ids:
+        return []
+    with (nullcontext(session) if session is not None else db.request_session()) as s:
+        by_id = {r["match_id"]: r for r in s.execute(MATCHES_BY_ID_SQL, {"ids": ids}).mappings()}
+    rows = [by_id[mid] for mid in ids if mid in by_id]
     return [
         {
             "match_id": r["match_id"],
@@ -163,6 +105,41 @@ def _db_upcoming(now_utc: datetime, limit: int):
         for r in rows
     ]
 
+# ---------- Background sync ----------
+# Handlers answer from `matches` only; stale ranges are refreshed off the request path.
+
+# The sync service, the ingest path and the football-data client are imported on first use,
+# so a worker boots without them.
+
+_match_sync = None
+_match_sync_lock = threading.Lock()
+
+def _fetch(a, b, status):
+    from ..services.football_data import fetch_matches
+    return fetch_matches(cfg.pl_code, cfg.fd_token, a, b, status)
+
+def _ingest(items, status):
+    from ..ingest import ingest_matches
+    return ingest_matches(items, cfg.season_label)
+
+def get_match_sync():
+    """This process's MatchSync, built on first use."""
+    global _match_sync
+    if _match_sync is None:
+        with _match_sync_lock:
+            if _match_sync is None:
+                from ..services.sync import MatchSync
+                _match_sync = MatchSync(fetch=_fetch, ingest=_ingest)
+    return _match_sync
+
+def refresh_default_ranges():
+    """Keep the ranges the frontend reads by default warm (called from the scheduler)."""
+    match_sync, out = get_match_sync(), []
+    for (a, b), status in ((next_range(7), "SCHEDULED"), (prev_range(7), "FINISHED")):
+        if not match_sync.is_fresh(a, b, status):
+            out.append(match_sync.refresh(a, b, status))
+    return out
+
 # ---------- Routes ----------
 
 @bp.get("/health")
@@ -171,33 +148,22 @@ def health():
 
 @bp.get("/fixtures")
 def fixtures():
-    # API-only (not cached) — unchanged
+    """Scheduled matches from DB; the range is refreshed from the API in the background when stale."""
     days = int(request.args.get("days", 7))
     start = request.args.get("from")
     end = request.args.get("to")
     if not start or not end:
         start, end = next_range(days)
-    matches = fetch_matches(cfg.pl_code, cfg.fd_token, start, end, "SCHEDULED")
-    out = []
-    for m in matches:
-        dt_loc, d, t = to_local_from_utc_iso(m["utcDate"], LOCAL_TZ)
-        out.append(
-            {
-                "date": d,
-                "time": t,
-                "home": m["homeTeam"]["name"],
-                "away": m["awayTeam"]["name"],
-                "competition": "Premier League",
-                "season": cfg.season_label,
-            }
-        )
-    return jsonify({"success": True, "fixtures": out})
+    fresh = get_match_sync().ensure_fresh(start, end, "SCHEDULED")
+    out = _db_fixtures(datetime.fromisoformat(start).date(), datetime.fromisoformat(end).date())
+    return jsonify({"success": True, "fixtures": out, "stale": not fresh})
 
 @bp.get("/results")
 def results():
     """
-    DB-first finished matches.
-    If DB empty or you force `?source=api`, fetch from API, upsert into DB, then return.
+    Finished matches, always answered from DB.
+    Stale ranges (or `?source=api`) trigger a background refresh; `stale` tells the
+    frontend a fresher answer is on its way.
     Returns date **and** time; the frontend can choose to hide the time.
     """
     days = int(request.args.get("days", 7))
@@ -212,53 +178,35 @@ def results():
     end = datetime.fromisoformat(end_s).date()
     source = (request.args.get("source") or "").lower()  # db | api
 
-    # 1) DB-first (unless forced API)
-    if source != "api":
-        items = _db_results(start, end)
-        if items:
-            return jsonify({"success": True, "results": items, "source": "db", "from": start_s, "to": end_s})
-
-    # 2) API fetch (FINISHED) -> upsert -> return DB rows
-    try:
-        api_matches = fetch_matches(cfg.pl_code, cfg.fd_token, start_s, end_s, "FINISHED")
-        _upsert_matches_from_api(api_matches, finished=True)
-        items = _db_results(start, end)
-        return jsonify({"success": True, "results": items, "source": "api", "from": start_s, "to": end_s})
-    except HTTPError:
-        # On rate-limit/HTTP errors: fall back to whatever DB has (maybe empty)
-        items = _db_results(start, end)
-        return jsonify({"success": True, "results": items, "source": "db_fallback", "from": start_s, "to": end_s})
-    except Exception:
-        items = _db_results(start, end)
-        return jsonify({"success": True, "results": items, "source": "db_fallback", "from": start_s, "to": end_s})
+    fresh = get_match_sync().ensure_fresh(start, end, "FINISHED", max_age=0 if source == "api" else None)
+    with db.request_session() as s:
+        version = versions.matches_version(s)
+    return respond((version, fresh, start_s, end_s), lambda: jsonify({
+        "success": True, "results": _db_results(start, end), "source": "db", "stale": not fresh,
+        "from": start_s, "to": end_s}), public=True)
 
 @bp.get("/upcoming")
 def upcoming():
     """
-    DB-first upcoming.
-    If DB has fewer than `limit` rows, fetch next `days` window from API (SCHEDULED),
-    upsert into DB, then return the first `limit` rows from DB.
+    Upcoming matches, always answered from DB.
+    The next `days` window is refreshed in the background when stale.
     Returns date **and** time; the frontend can choose to hide the time.
     """
     limit = int(request.args.get("limit", 10))
-    days = int(request.args.get("days", 7))  # how far ahead to fetch if we need API
-    source = "db"
-
-    now_utc = datetime.now(timezone.utc)
-    items = _db_upcoming(now_utc, limit)
-
-    if len(items) < limit:
-        # Need to top up cache from API
-        start_s, end_s = next_range(days)
-        try:
-            api_matches = fetch_matches(cfg.pl_code, cfg.fd_token, start_s, end_s, "SCHEDULED")
-            _upsert_matches_from_api(api_matches, finished=False)
-            source = "api"
-        except HTTPError:
-            source = "db_fallback"
-        except Exception:
-            source = "db_fallback"
-        # Re-read from DB after attempted upsert
-        items = _db_upcoming(now_utc, limit)
-
-    return {"items": items, "source": source}
\ No newline at end of file
+    days = int(request.args.get("days", 7))  # how far ahead the background refresh covers
+
+    start_s, end_s = next_range(days)
+    fresh = get_match_sync().ensure_fresh(start_s, end_s, "SCHEDULED")
+    now = datetime.now(timezone.utc)
+    with db.request_session() as s:
+        version = versions.matches_version(s)
+    # kickoffs passing change the answer without touching `matches`, so the ids are part of it
+    return respond((version, fresh, calendar.upcoming(now, limit)), lambda: {
+        "items": _db_upcoming(now, limit), "source": "db", "stale": not fresh}, public=True)
+
+@bp.get("/sync/status")
+def sync_status():
+    from ..services.football_data import get_client
+    match_sync = get_match_sync()
+    return {"ranges": match_sync.status(), "upstream_calls": match_sync.upstream_calls,
+            "client": get_client(cfg.fd_token).metrics()}
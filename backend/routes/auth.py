@@ -7,6 +7,8 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import select
 from .. import db                    # <-- import from parent package (backend), not "."
 from ..models import User            # <-- same here
+from ..cache import leaderboard_cache, user_cache
+from ..versions import bump_user_groups
 import re
 
 bp = Blueprint("auth", __name__)
@@ -22,9 +24,18 @@ class _User(UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id):
-    with db.SessionLocal() as s:
-        u = s.get(User, int(user_id))
-        return _User(u) if u else None
+    # cached: every @login_required request lands here. Misses aren't cached: the id may
+    # belong to a user another worker registers a moment later.
+    uid = int(user_id)
+    cached = user_cache.get(uid)
+    if cached is None:
+        with db.request_session() as s:
+            u = s.get(User, uid)
+            if u is None:
+                return None
+            cached = _User(u)
+        user_cache.set(uid, cached)
+    return cached
 
 @bp.post("/auth/register")
 def register():
@@ -38,7 +49,7 @@ def register():
     if uname and not USERNAME_RE.match(uname):
         return {"error": "invalid username (3-20: a-z, 0-9, _)"}, 400
 
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         if s.execute(select(User).where(User.email == email)).scalar_one_or_none():
             return {"error": "email already registered"}, 409
         if uname and s.execute(select(User).where(User.username == uname)).scalar_one_or_none():
@@ -56,7 +67,7 @@ def login():
     email = (data.get("email") or "").strip().lower()
     pwd   = data.get("password") or ""
 
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         u = s.execute(select(User).where(User.email == email)).scalar_one_or_none()
         if not u or not check_password_hash(u.password_hash, pwd):
             return jsonify({"error": "invalid credentials"}), 401
@@ -87,7 +98,7 @@ def set_username():
     if not USERNAME_RE.match(raw):
         return {"error": "invalid username (3-20: a-z, 0-9, _)"}, 400
 
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         exists = s.execute(
             select(User).where(User.username == raw, User.id != current_user.id)
         ).scalar_one_or_none()
@@ -95,7 +106,10 @@ def set_username():
             return {"error": "username taken"}, 409
         u = s.get(User, current_user.id)
         u.username = raw
+        bump_user_groups(s, current_user.id)
         s.commit()
+    user_cache.invalidate(current_user.id)
+    leaderboard_cache.clear()  # usernames are embedded in cached leaderboards
 
     return {"ok": True, "username": raw}
 
@@ -110,11 +124,12 @@ def change_password():
     if len(new_pw) < 8:
         return {"error": "password must be at least 8 characters"}, 400
 
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         u = s.get(User, current_user.id)
         if not u or not check_password_hash(u.password_hash, old_pw):
             return {"error": "current password is incorrect"}, 401
         u.password_hash = generate_password_hash(new_pw)
         s.commit()
+    user_cache.invalidate(current_user.id)
 
     return {"ok": True}
\ No newline at end of file
@@ -0,0 +1,80 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+from datetime import date, datetime, timezone
+import hashlib, json
+
+from .. import db
+from ..models import Group
+from ..authz import is_member
+from .groups import group_payload
+from .predictions import window_payload, matches_payload, others_payload, stats_payload
+from .leaderboard import leaderboard_rows, highlights_payload
+from .api import _db_upcoming
+
+bp = Blueprint("dashboard", __name__)
+
+SECTIONS = ("group", "window", "matches", "others", "stats", "leaderboard", "highlights", "upcoming")
+
+def _etag(payload) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+def _build(name, s, g, user_id, scope, today):
+    if name == "group":
+        return group_payload(s, g, user_id)
+    if name == "window":
+        return window_payload(today)
+    if name == "matches":
+        return matches_payload(s, g.id, user_id, scope, today)
+    if name == "others":
+        return others_payload(s, g.id, scope, today)
+    if name == "stats":
+        body, status = stats_payload(s, g.id)
+        return body if status == 200 else {**body, "status": status}
+    if name == "leaderboard":
+        return {"leaderboard": leaderboard_rows(s, g.id)}
+    if name == "highlights":
+        return highlights_payload(s, g.id, today)
+    if name == "upcoming":
+        return {"items": _db_upcoming(datetime.now(timezone.utc), 10, session=s), "source": "db"}
+
+@bp.get("/groups/<int:group_id>/dashboard")
+@login_required
+def dashboard(group_id):
+    """
+    Everything the group page needs in one request / one session / one membership check.
+      ?sections=group,matches,...   subset to build (default: all)
+      ?scope=current|next           window for matches/others
+      ?etags=matches:<etag>,...     sections the client already has; unchanged ones come
+                                    back as {"etag", "not_modified": true} without data
+    The response ETag covers all returned sections; If-None-Match on it yields 304.
+    """
+    wanted = [x.strip() for x in (request.args.get("sections") or "").split(",") if x.strip()] or list(SECTIONS)
+    unknown = [x for x in wanted if x not in SECTIONS]
+    if unknown:
+        return {"error": f"unknown sections: {', '.join(unknown)}", "sections": list(SECTIONS)}, 400
+    scope = (request.args.get("scope") or "current").lower()
+    known = dict(p.split(":", 1) for p in (request.args.get("etags") or "").split(",") if ":" in p)
+
+    today = date.today()
+    with db.request_session() as s:
+        g = s.get(Group, group_id)
+        if not g:
+            return {"error": "not found"}, 404
+        if not is_member(s, group_id, current_user.id):
+            return {"error": "forbidden"}, 403
+
+        out, tags = {}, []
+        for name in wanted:
+            data = _build(name, s, g, current_user.id, scope, today)
+            tag = _etag(data)
+            tags.append(f"{name}:{tag}")
+            out[name] = ({"etag": tag, "not_modified": True} if known.get(name) == tag
+                         else {"etag": tag, "data": data})
+
+    etag = _etag(tags)
+    if request.if_none_match.contains(etag):
+        return "", 304, {"ETag": f'"{etag}"'}
+    resp = jsonify({"group_id": group_id, "scope": scope, "sections": out})
+    resp.set_etag(etag)
+    return resp
@@ -0,0 +1,29 @@
+from flask import Blueprint, Response, stream_with_context
+from flask_login import login_required, current_user
+
+from .. import db
+from ..authz import is_member
+from ..events import get_broker, channel, sse_stream
+
+bp = Blueprint("events", __name__)
+
+@bp.get("/groups/<int:group_id>/events")
+@login_required
+def group_events(group_id):
+    """
+    Server-Sent Events for one group: `predictions` when a member saves picks,
+    `results` when scores come in (with the point deltas they caused), `scores`
+    when a week is recomputed. The stream closes after EVENTS_MAX_SECONDS and the
+    browser's EventSource reconnects; clients refetch what they show on reconnect.
+    """
+    with db.request_session() as s:
+        if not is_member(s, group_id, current_user.id):
+            return {"error": "not in group"}, 403
+    db.close_request_session()      # the stream can stay open for minutes; give the connection back
+
+    sub = get_broker().subscribe(channel(group_id))   # before returning, so nothing in between is missed
+    resp = Response(stream_with_context(sse_stream(sub)), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"          # don't let a proxy buffer the stream
+    resp.call_on_close(sub.close)
+    return resp
@@ -3,6 +3,10 @@ from flask_login import login_required, current_user
 from sqlalchemy import select, text
 from .. import db
 from ..models import Group, GroupMember, User
+from ..cache import leaderboard_cache
+from ..versions import bump_scores, bump_members
+from ..ranking import refresh_global_for_groups
+from ..authz import is_admin, is_member, invalidate_membership
 import secrets
 
 bp = Blueprint("groups", __name__)
@@ -10,19 +14,6 @@ bp = Blueprint("groups", __name__)
 def _code(): 
     return secrets.token_urlsafe(6)[:10]
 
-def _is_admin(s, group_id, user_id):
-    row = s.execute(text("""
-        select is_admin from group_members
-        where group_id=:g and user_id=:u and status='approved'
-    """), {"g": group_id, "u": user_id}).mappings().first()
-    return bool(row and row["is_admin"])
-
-def _is_member(s, group_id, user_id):
-    return bool(s.execute(text("""
-        select 1 from group_members
-        where group_id=:g and user_id=:u and status='approved'
-    """), {"g": group_id, "u": user_id}).first())
-
 # ---- Create group (creator becomes admin) ------------------------------------
 
 @bp.post("/groups")
@@ -34,7 +25,7 @@ def create_group():
     is_public = bool(data.get("is_public", False))
     join_policy = "public" if is_public else (data.get("join_policy") or "invite_only")
 
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         code = _code()
         g = Group(
             name=name, description=desc, owner_id=current_user.id,
@@ -43,7 +34,9 @@ def create_group():
         s.add(g); s.flush()
         # Creator is approved member AND admin
         s.add(GroupMember(group_id=g.id, user_id=current_user.id, status="approved", is_admin=True))
+        bump_members(s, [g.id])
         s.commit()
+        invalidate_membership(g.id, current_user.id)
         return {"ok": True, "group_id": g.id, "invite_code": code}
 
 # ---- Update settings (owner OR admin) ----------------------------------------
@@ -52,13 +45,14 @@ def create_group():
 @login_required
 def update_group_settings(group_id):
     data = request.get_json(silent=True) or {}
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         g = s.get(Group, group_id)
         if not g: 
             return {"error":"not found"}, 404
-        if not (_is_admin(s, group_id, current_user.id) or g.owner_id == current_user.id):
+        if not (is_admin(s, group_id, current_user.id) or g.owner_id == current_user.id):
             return {"error":"forbidden"}, 403
 
+        was_public = g.is_public
         if "name" in data:
             g.name = (data["name"] or "").strip() or g.name
         if "description" in data:
@@ -70,6 +64,9 @@ def update_group_settings(group_id):
             g.join_policy = data["join_policy"]
             g.is_public = (g.join_policy == "public")
 
+        if g.is_public != was_public:
+            s.flush()
+            refresh_global_for_groups(s, [group_id])   # members' 'public' scope gains/loses this group
         s.commit()
         return {"ok": True, "group": {
             "id": g.id, "name": g.name, "description": g.description,
@@ -86,7 +83,7 @@ def join_or_request():
     code = (data.get("code") or "").strip()   # still support invite by code
     group_id = data.get("group_id")           # or direct group id
 
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         g = None
         if group_id:
             g = s.get(Group, int(group_id))
@@ -104,22 +101,28 @@ def join_or_request():
 
         status = "approved" if g.join_policy=="public" else "pending"
         s.add(GroupMember(group_id=g.id, user_id=current_user.id, status=status))
+        if status == "approved":
+            bump_scores(s, [g.id])
+        bump_members(s, [g.id])
         s.commit()
+        invalidate_membership(g.id, current_user.id)
         return {"ok": True, "group_id": g.id, "status": status, "group_name": g.name}
 
 # ---- My groups (for the frontend “My groups” tab) ----------------------------
 
+MY_GROUPS_SQL = text("""
+    select g.id, g.name, g.description, g.is_public, g.join_policy, g.invite_code
+    from group_members gm
+    join groups g on g.id = gm.group_id
+    where gm.user_id=:u and gm.status='approved'
+    order by lower(g.name)
+""")
+
 @bp.get("/groups/mine")
 @login_required
 def my_groups():
-    with db.SessionLocal() as s:
-        rows = s.execute(text("""
-            select g.id, g.name, g.description, g.is_public, g.join_policy, g.invite_code
-            from group_members gm
-            join groups g on g.id = gm.group_id
-            where gm.user_id=:u and gm.status='approved'
-            order by lower(g.name)
-        """), {"u": current_user.id}).mappings().all()
+    with db.request_session() as s:
+        rows = s.execute(MY_GROUPS_SQL, {"u": current_user.id}).mappings().all()
     return {"groups": [dict(r) for r in rows]}
 
 @bp.get("/groups")
@@ -136,11 +139,11 @@ def list_groups():
 @bp.get("/groups/<int:group_id>/requests")
 @login_required
 def list_requests(group_id):
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         g = s.get(Group, group_id)
         if not g: 
             return {"error":"not found"}, 404
-        if not (_is_admin(s, group_id, current_user.id) or g.owner_id == current_user.id):
+        if not (is_admin(s, group_id, current_user.id) or g.owner_id == current_user.id):
             return {"error":"forbidden"}, 403
 
         rows = s.execute(text("""
@@ -160,11 +163,11 @@ def approve_or_reject(group_id, user_id):
     if action not in ("approve","reject"):
         return {"error":"action must be 'approve' or 'reject'"}, 400
 
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         g = s.get(Group, group_id)
         if not g:
             return {"error":"not found"}, 404
-        if not (_is_admin(s, group_id, current_user.id) or g.owner_id == current_user.id):
+        if not (is_admin(s, group_id, current_user.id) or g.owner_id == current_user.id):
             return {"error":"forbidden"}, 403
 
         gm = s.execute(select(GroupMember).where(
@@ -176,12 +179,16 @@ def approve_or_reject(group_id, user_id):
             return {"error":"not pending"}, 400
 
         if action == "approve":
-            s.execute(text("update group_members set status='approved', approved_at=now() where id=:id"),
+            s.execute(text("update group_members set status='approved', approved_at=CURRENT_TIMESTAMP where id=:id"),
                       {"id": gm.id})
+            bump_scores(s, [group_id])
         else:
             s.execute(text("update group_members set status='rejected' where id=:id"),
                       {"id": gm.id})
+        bump_members(s, [group_id])
         s.commit()
+    invalidate_membership(group_id, user_id)
+    leaderboard_cache.invalidate(group_id)
     return {"ok": True, "action": action}
 
 # ---- Leave -------------------------------------------------------------------
@@ -189,7 +196,7 @@ def approve_or_reject(group_id, user_id):
 @bp.post("/groups/<int:group_id>/leave")
 @login_required
 def leave_group(group_id):
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         g = s.get(Group, group_id)
         if not g:
             return {"error":"not found"}, 404
@@ -197,46 +204,53 @@ def leave_group(group_id):
             return {"error":"owner cannot leave; transfer ownership first"}, 400
         s.execute(text("delete from group_members where group_id=:g and user_id=:u"),
                   {"g": group_id, "u": current_user.id})
+        bump_scores(s, [group_id])
+        bump_members(s, [group_id])
         s.commit()
+    invalidate_membership(group_id, current_user.id)
+    leaderboard_cache.invalidate(group_id)
     return {"ok": True}
 
 # ---- Group details & members -------------------------------------------------
 
+def group_payload(s, g: Group, user_id: int):
+    admin = is_admin(s, g.id, user_id) or (g.owner_id == user_id)
+
+    # ensure there is a code (in case older rows missed it)
+    if not g.invite_code:
+        g.invite_code = _code()
+        s.commit()
+
+    return {
+        "id": g.id,
+        "name": g.name,
+        "description": g.description,
+        "is_public": g.is_public,
+        "join_policy": g.join_policy,
+        "is_admin": admin,
+        "invite_code": g.invite_code,   # ← add this
+    }
+
 @bp.get("/groups/<int:group_id>")
 @login_required
 def get_group(group_id):
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         g = s.get(Group, group_id)
         if not g:
             return {"error": "not found"}, 404
-        if not _is_member(s, group_id, current_user.id):
+        if not is_member(s, group_id, current_user.id):
             return {"error": "forbidden"}, 403
 
-        is_admin = _is_admin(s, group_id, current_user.id) or (g.owner_id == current_user.id)
-
-        # ensure there is a code (in case older rows missed it)
-        if not g.invite_code:
-            g.invite_code = _code()
-            s.commit()
-
-        return {
-            "id": g.id,
-            "name": g.name,
-            "description": g.description,
-            "is_public": g.is_public,
-            "join_policy": g.join_policy,
-            "is_admin": is_admin,
-            "invite_code": g.invite_code,   # ← add this
-        }
+        return group_payload(s, g, current_user.id)
 
 @bp.get("/groups/<int:group_id>/members")
 @login_required
 def list_members(group_id):
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         g = s.get(Group, group_id)
         if not g:
             return {"error":"not found"}, 404
-        if not _is_member(s, group_id, current_user.id):
+        if not is_member(s, group_id, current_user.id):
             return {"error":"forbidden"}, 403
 
         rows = s.execute(text("""
@@ -256,11 +270,11 @@ def set_member_role(group_id, user_id):
     body = request.get_json(silent=True) or {}
     make_admin = bool(body.get("is_admin"))
 
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         g = s.get(Group, group_id)
         if not g:
             return {"error":"not found"}, 404
-        if not (_is_admin(s, group_id, current_user.id) or g.owner_id == current_user.id):
+        if not (is_admin(s, group_id, current_user.id) or g.owner_id == current_user.id):
             return {"error":"forbidden"}, 403
         if user_id == g.owner_id and not make_admin:
             return {"error":"cannot demote owner"}, 400
@@ -272,6 +286,8 @@ def set_member_role(group_id, user_id):
         """), {"adm": make_admin, "g": group_id, "u": user_id}).mappings().first()
         if not r:
             return {"error":"not a member"}, 404
+        bump_members(s, [group_id])
         s.commit()
+    invalidate_membership(group_id, user_id)
 
     return {"ok": True, "user_id": r["user_id"], "is_admin": r["is_admin"]}
@@ -1,53 +1,131 @@
 from flask import Blueprint, request
 from flask_login import login_required, current_user
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from datetime import date, timedelta
 from .. import db
-from ..util import window_for
+from ..util import window_for, week_start_thu
+from ..cache import leaderboard_cache
+from ..authz import is_member
+from ..ranking import global_ranks, SCOPES, METRICS
+from ..http_cache import respond
+from .. import versions
 
 bp = Blueprint("leaderboard", __name__)
 
-def _require_member(s, group_id: int, user_id: int):
-    return bool(s.execute(text("""
-        select 1 from group_members 
-        where group_id=:g and user_id=:u and status='approved'
-    """), {"g": group_id, "u": user_id}).first())
+LEADERBOARD_SQL = text("""
+  select ws.user_id, sum(ws.points) as total_points, u.username, u.email
+  from weekly_scores ws
+  join group_members gm on gm.group_id=ws.group_id and gm.user_id=ws.user_id and gm.status='approved'
+  join users u on u.id=ws.user_id
+  where ws.group_id = :g
+  group by ws.user_id, u.username, u.email
+  order by total_points desc, ws.user_id asc
+""")
 
-@bp.get("/groups/<int:group_id>/leaderboard")
-@login_required
-def leaderboard(group_id):
-    with db.SessionLocal() as s:
-        if not _require_member(s, group_id, current_user.id):
-            return {"error":"not in group"}, 403
+HISTORY_SQL = text("""
+  select c.user_id, c.week_start, c.cum_points
+  from cumulative_scores c
+  join group_members gm on gm.group_id=c.group_id and gm.user_id=c.user_id and gm.status='approved'
+  where c.group_id=:g and c.week_start <= :to
+  order by c.week_start
+""")
 
-        rows = s.execute(text("""
-          select ws.user_id, sum(ws.points) as total_points, u.username, u.email
-          from weekly_scores ws
-          join group_members gm on gm.group_id=ws.group_id and gm.user_id=ws.user_id and gm.status='approved'
-          join users u on u.id=ws.user_id
-          where ws.group_id = :g
-          group by ws.user_id, u.username, u.email
-          order by total_points desc, ws.user_id asc
-        """), {"g": group_id}).mappings().all()
-    return {"leaderboard": [dict(r) for r in rows]}
+HIGHLIGHTS_SQL = text("""
+  select user_id, points
+  from weekly_scores
+  where group_id=:g and week_start=:ws
+  order by points desc
+""")
 
-@bp.get("/groups/<int:group_id>/leaderboard/highlights")
-@login_required
-def highlights(group_id):
-    with db.SessionLocal() as s:
-        if not _require_member(s, group_id, current_user.id):
-            return {"error":"not in group"}, 403
+TOP_WEEKS_SQL = text("""
+  select week_start, points
+  from weekly_scores
+  where group_id=:g and user_id=:u
+  order by points desc, week_start desc
+  limit :n
+""")
+
+USERNAMES_SQL = text("select id, username from users where id in :ids").bindparams(
+    bindparam("ids", expanding=True))
 
-        # last week's start based on Thu→Wed windows
-        this_start, _ = window_for(date.today())
-        last_start = this_start - timedelta(days=7)
+def leaderboard_rows(s, group_id: int, version=None):
+    """
+    The group's leaderboard, cached together with the scores version it was read at: an
+    entry from before the last bump (another process wrote; only its own cache was
+    invalidated) is a miss, so the body always matches the ETag built from `version`.
+    """
+    version = version if version is not None else versions.get(s, [versions.scores_key(group_id)])
+    hit = leaderboard_cache.get(group_id)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    rows = [dict(r) for r in s.execute(LEADERBOARD_SQL, {"g": group_id}).mappings().all()]
+    leaderboard_cache.set(group_id, (version, rows))
+    return rows
 
-        rows = s.execute(text("""
-          select user_id, points
-          from weekly_scores
-          where group_id=:g and week_start=:ws
-          order by points desc
-        """), {"g": group_id, "ws": last_start}).mappings().all()
+# Points in [from, to] = running total at the last scored week <= to
+#                      - running total at the last scored week < from.
+# Each lookup is one index seek on uq_cumulative_score per member, whatever the range.
+RANGE_SQL = text("""
+  select t.user_id, t.username, t.email, t.hi - coalesce(t.lo, 0) as total_points
+  from (
+    select gm.user_id, u.username, u.email,
+      (select c.cum_points from cumulative_scores c
+        where c.group_id=gm.group_id and c.user_id=gm.user_id and c.week_start <= :to
+        order by c.week_start desc limit 1) as hi,
+      (select c.cum_points from cumulative_scores c
+        where c.group_id=gm.group_id and c.user_id=gm.user_id and c.week_start < :from
+        order by c.week_start desc limit 1) as lo
+    from group_members gm
+    join users u on u.id=gm.user_id
+    where gm.group_id=:g and gm.status='approved'
+  ) t
+  where t.hi is not null
+  order by total_points desc, t.user_id asc
+""")
+
+def _week_arg(name):
+    raw = request.args.get(name)
+    return week_start_thu(date.fromisoformat(raw)) if raw else None
+
+def range_rows(s, group_id: int, start: date | None, end: date | None):
+    return [dict(r) for r in s.execute(RANGE_SQL, {
+        "g": group_id, "from": start or date.min, "to": end or date.max}).mappings()]
+
+def rank_history(s, group_id: int, start: date | None, end: date | None):
+    """
+    Per scored week in the range: each approved member's running total since `start`
+    and their rank (1,2,2,4 on ties). Weeks a member didn't score carry their total forward.
+    """
+    rows = s.execute(HISTORY_SQL, {"g": group_id, "to": end or date.max}).all()
+
+    start = start or date.min
+    base, totals, by_week = {}, {}, {}
+    for uid, ws, cum in rows:
+        ws = ws if isinstance(ws, date) else date.fromisoformat(str(ws))
+        if ws < start:
+            base[uid] = cum                 # last total before the range
+        else:
+            by_week.setdefault(ws, []).append((uid, cum))
+
+    weeks, series = [], {}
+    for ws in sorted(by_week):
+        for uid, cum in by_week[ws]:
+            totals[uid] = cum - base.get(uid, 0)
+        ordered = sorted(totals.items(), key=lambda kv: (-kv[1], kv[0]))
+        rank, prev = 0, None
+        for i, (uid, pts) in enumerate(ordered, 1):
+            if pts != prev:
+                rank, prev = i, pts
+            series.setdefault(uid, []).append({"week_start": ws.isoformat(), "points": pts, "rank": rank})
+        weeks.append(ws.isoformat())
+    return {"weeks": weeks, "users": [{"user_id": uid, "history": h} for uid, h in series.items()]}
+
+def highlights_payload(s, group_id: int, today: date):
+    # last week's start based on Thu→Wed windows
+    this_start, _ = window_for(today)
+    last_start = this_start - timedelta(days=7)
+
+    rows = s.execute(HIGHLIGHTS_SQL, {"g": group_id, "ws": last_start}).mappings().all()
 
     if not rows:
         return {"week_start": last_start.isoformat(), "best": None, "worst": None}
@@ -55,21 +133,76 @@ def highlights(group_id):
     worst = rows[-1]
     return {"week_start": last_start.isoformat(), "best": dict(best), "worst": dict(worst)}
 
+@bp.get("/groups/<int:group_id>/leaderboard")
+@login_required
+def leaderboard(group_id):
+    """All-time totals, or with ?from=&to= (dates; snapped to their Thursday week) points within that range."""
+    try:
+        start, end = _week_arg("from"), _week_arg("to")
+    except ValueError:
+        return {"error": "from/to must be YYYY-MM-DD"}, 400
+    with db.request_session() as s:
+        if not is_member(s, group_id, current_user.id):
+            return {"error":"not in group"}, 403
+        version = versions.get(s, [versions.scores_key(group_id)])
+        if start is None and end is None:
+            return respond(version, lambda: {"leaderboard": leaderboard_rows(s, group_id, version)})
+        return respond(version, lambda: {"from": start and start.isoformat(), "to": end and end.isoformat(),
+                                         "leaderboard": range_rows(s, group_id, start, end)})
+
+@bp.get("/groups/<int:group_id>/leaderboard/history")
+@login_required
+def leaderboard_history(group_id):
+    """Rank over time for charts; optional ?from=&to= like /leaderboard."""
+    try:
+        start, end = _week_arg("from"), _week_arg("to")
+    except ValueError:
+        return {"error": "from/to must be YYYY-MM-DD"}, 400
+    with db.request_session() as s:
+        if not is_member(s, group_id, current_user.id):
+            return {"error":"not in group"}, 403
+        return rank_history(s, group_id, start, end)
+
+@bp.get("/groups/<int:group_id>/leaderboard/highlights")
+@login_required
+def highlights(group_id):
+    with db.request_session() as s:
+        if not is_member(s, group_id, current_user.id):
+            return {"error":"not in group"}, 403
+        return highlights_payload(s, group_id, date.today())
+
 @bp.get("/groups/<int:group_id>/leaderboard/topweeks")
 @login_required
 def top_weeks_for_user(group_id):
     user_id = request.args.get("user_id", type=int) or current_user.id
     limit = request.args.get("limit", type=int, default=3)
 
-    with db.SessionLocal() as s:
-        if not _require_member(s, group_id, current_user.id):
+    with db.request_session() as s:
+        if not is_member(s, group_id, current_user.id):
             return {"error":"not in group"}, 403
 
-        rows = s.execute(text("""
-          select week_start, points
-          from weekly_scores
-          where group_id=:g and user_id=:u
-          order by points desc, week_start desc
-          limit :n
-        """), {"g": group_id, "u": user_id, "n": limit}).mappings().all()
-    return {"user_id": user_id, "top_weeks": [dict(r) for r in rows]}
\ No newline at end of file
+        rows = s.execute(TOP_WEEKS_SQL, {"g": group_id, "u": user_id, "n": limit}).mappings().all()
+    return {"user_id": user_id, "top_weeks": [dict(r) for r in rows]}
+
+
+@bp.get("/leaderboard/global")
+@login_required
+def global_leaderboard():
+    """
+    Site-wide ranking: ?scope=all|public, ?metric=best|avg (best group total or mean over
+    groups), ?limit= for the top list and ?around= for how many neighbours to show around you.
+    """
+    scope = (request.args.get("scope") or "all").lower()
+    metric = (request.args.get("metric") or "best").lower()
+    if scope not in SCOPES or metric not in METRICS:
+        return {"error": f"scope must be one of {SCOPES}, metric one of {METRICS}"}, 400
+    limit = max(0, min(request.args.get("limit", type=int, default=10), 100))
+    around = max(0, min(request.args.get("around", type=int, default=10), 50))
+
+    with db.request_session() as s:
+        out = global_ranks.standings(s, scope, metric, current_user.id, limit, around)
+        ids = {e["user_id"] for e in out["top"] + out["around"]}
+        names = dict(s.execute(USERNAMES_SQL, {"ids": list(ids)}).all()) if ids else {}
+    for e in out["top"] + out["around"]:
+        e["username"] = names.get(e["user_id"])
+    return out
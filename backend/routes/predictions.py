@@ -1,13 +1,78 @@
-from flask import Blueprint, request, current_app
+from flask import Blueprint, request, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
-from sqlalchemy import select, text
+from sqlalchemy import text, select, bindparam, DateTime
 from datetime import date, timedelta, datetime, timezone, time
+import base64, json
 from .. import db
-from ..models import Prediction, Match, GroupMember, User
+from ..models import Match, Prediction
 from ..util import window_for
+from ..cache import window_cache
+from ..match_calendar import calendar
+from ..stats import closed_window_stats
+from ..authz import is_member
+from ..events import publish_after_commit
+from ..http_cache import respond
+from .. import versions
 
 bp = Blueprint("preds", __name__)
 
+UPSERT_PREDICTION_SQL = text("""
+  insert into predictions (group_id,user_id,match_id,home_pred,away_pred,created_at,updated_at)
+  values (:g,:u,:m,:hp,:ap, :ts, :ts)
+  on conflict (group_id,user_id,match_id) do update set
+    home_pred=excluded.home_pred,
+    away_pred=excluded.away_pred,
+    updated_at=excluded.updated_at
+""").bindparams(bindparam("ts", type_=DateTime(timezone=True)))
+
+# The calendar can be up to MAX_AGE seconds behind another process's ingest, so the
+# matches a submit is about to write are re-read inside the write's transaction.
+MATCH_LOCKS_SQL = (select(Match.match_id, Match.date, Match.utc_kickoff)
+                   .where(Match.match_id.in_(bindparam("ids", expanding=True))))
+
+MATCHES_SQL = text("""
+  select m.match_id, m.date, m.home, m.away,
+         p.home_pred as my_home_pred, p.away_pred as my_away_pred
+  from matches m
+  left join predictions p
+    on p.group_id=:g and p.user_id=:u and p.match_id=m.match_id
+  where m.date between :a and :b
+  order by m.date asc, m.match_id asc
+""")
+
+OTHERS_SQL = text("""
+  select p.match_id, m.home, m.away, u.username, u.email, p.home_pred, p.away_pred, p.updated_at
+  from predictions p
+  join matches m on m.match_id=p.match_id
+  join users u on u.id=p.user_id
+  where p.group_id=:g and m.date between :a and :b
+  order by p.updated_at desc
+""")
+
+# Rows after the cursor's (updated_at, id) in (updated_at desc, id desc) order. Both come
+# from the cursor itself, so re-saving that pick between pages doesn't move the position.
+# :ts is bound as a DateTime so it's written in the same format the column is stored in.
+KEYSET_AFTER_SQL = """
+      and (p.updated_at < :ts or (p.updated_at = :ts and p.id < :id))"""
+
+def _others_page_sql(after: bool, limit: bool):
+    sql = text(f"""
+      select p.id, p.match_id, p.user_id, m.home, m.away, u.username, u.email,
+             p.home_pred, p.away_pred, p.updated_at
+      from predictions p
+      join matches m on m.match_id=p.match_id
+      join users u on u.id=p.user_id
+      where p.group_id=:g and m.date between :a and :b
+      {KEYSET_AFTER_SQL if after else ""}
+      order by p.updated_at desc, p.id desc
+      {"limit :n" if limit else ""}
+    """).execution_options(stream_results=True, max_row_buffer=500)
+    return sql.bindparams(bindparam("ts", type_=DateTime(timezone=True))) if after else sql
+
+# keyed by (has cursor, has limit)
+OTHERS_PAGE_SQL = {(after, limit): _others_page_sql(after, limit)
+                   for after in (False, True) for limit in (False, True)}
+
 # -------- Window helpers --------
 
 def windows(today: date):
@@ -19,8 +84,13 @@ def windows(today: date):
 def _open_close_times_local(anchor_day: date):
     """
     Open at Thu 09:00 LOCAL; close 2h before the FIRST match in that Thu→Wed window.
+    Cached per week_start (window_cache); the match upsert paths invalidate it.
     """
-    start, end = window_for(anchor_day)
+    start, _ = window_for(anchor_day)
+    return window_cache.get_or_set(start, lambda: _compute_open_close(start))
+
+def _compute_open_close(start: date):
+    start, end = window_for(start)
 
     # Open (local): Thu 09:00
     tz = getattr(current_app, "LOCAL_TZ", None)  # attach ZoneInfo to app in create_app() if you want local tz
@@ -28,13 +98,10 @@ def _open_close_times_local(anchor_day: date):
     if tz:
         open_at = open_at.replace(tzinfo=tz)
 
-    # Close: 2h before first local_kickoff in the window (fallback to open_at if no games)
-    with db.SessionLocal() as s:
-        first_kick = s.execute(text("""
-            select min(local_kickoff) as first_local
-            from matches
-            where date between :a and :b
-        """), {"a": start, "b": end}).scalar()
+    # Close: 2h before the first kickoff in the window (fallback to open_at if no games)
+    first_kick = calendar.first_kickoff(start, end)
+    if first_kick is not None:
+        first_kick = first_kick.astimezone(tz) if tz else first_kick.replace(tzinfo=None)
     close_at = (first_kick - timedelta(hours=2)) if first_kick else open_at
     return start, end, open_at, close_at
 
@@ -43,22 +110,11 @@ def _is_open_now_for_current():
     now = datetime.now(open_at.tzinfo) if open_at.tzinfo else datetime.now()
     return (open_at <= now < close_at), start, end, open_at, close_at
 
-def _require_member(s, group_id: int, user_id: int):
-    return bool(s.execute(
-        select(GroupMember).where(
-            GroupMember.group_id==group_id,
-            GroupMember.user_id==user_id,
-            GroupMember.status=="approved",
-        )
-    ).scalar_one_or_none())
-
 # -------- Endpoints --------
 
-@bp.get("/groups/<int:group_id>/predictions/window")
-@login_required
-def current_window(group_id):
-    (cur_s, cur_e), (next_s, next_e) = windows(date.today())
-    _, _, cur_open, cur_close = _open_close_times_local(date.today())
+def window_payload(today: date):
+    (cur_s, cur_e), (next_s, next_e) = windows(today)
+    _, _, cur_open, cur_close = _open_close_times_local(today)
     _, _, nxt_open, nxt_close = _open_close_times_local(next_s)
     now = datetime.now(cur_open.tzinfo) if cur_open.tzinfo else datetime.now()
     return {
@@ -70,30 +126,13 @@ def current_window(group_id):
                  "open": (nxt_open <= now < nxt_close)},
     }
 
-@bp.get("/groups/<int:group_id>/predictions/matches")
-@login_required
-def matches_for_predictions(group_id):
-    """
-    List matches in the current/next window and include *my* latest saved picks
-    as `my_home_pred` / `my_away_pred`. Dates are returned as YYYY-MM-DD (no time).
-    """
-    scope = (request.args.get("scope") or "current").lower()
-    (cur_s, cur_e), (next_s, next_e) = windows(date.today())
-    start, end = (cur_s, cur_e) if scope == "current" else (next_s, next_e)
-
-    with db.SessionLocal() as s:
-        if not _require_member(s, group_id, current_user.id):
-            return {"error": "not in group"}, 403
+def _scope_range(scope: str, today: date):
+    (cur_s, cur_e), (next_s, next_e) = windows(today)
+    return (cur_s, cur_e) if scope == "current" else (next_s, next_e)
 
-        rows = s.execute(text("""
-          select m.match_id, m.date, m.home, m.away,
-                 p.home_pred as my_home_pred, p.away_pred as my_away_pred
-          from matches m
-          left join predictions p
-            on p.group_id=:g and p.user_id=:u and p.match_id=m.match_id
-          where m.date between :a and :b
-          order by m.date asc, m.match_id asc
-        """), {"g": group_id, "u": current_user.id, "a": start, "b": end}).mappings().all()
+def matches_payload(s, group_id: int, user_id: int, scope: str, today: date):
+    start, end = _scope_range(scope, today)
+    rows = s.execute(MATCHES_SQL, {"g": group_id, "u": user_id, "a": start, "b": end}).mappings().all()
 
     # ensure date-only strings
     matches = []
@@ -105,12 +144,36 @@ def matches_for_predictions(group_id):
 
     return {"scope": scope, "week_start": start.isoformat(), "matches": matches}
 
+@bp.get("/groups/<int:group_id>/predictions/window")
+@login_required
+def current_window(group_id):
+    return window_payload(date.today())
+
+@bp.get("/groups/<int:group_id>/predictions/matches")
+@login_required
+def matches_for_predictions(group_id):
+    """
+    List matches in the current/next window and include *my* latest saved picks
+    as `my_home_pred` / `my_away_pred`. Dates are returned as YYYY-MM-DD (no time).
+    """
+    scope = (request.args.get("scope") or "current").lower()
+
+    today = date.today()
+    with db.request_session() as s:
+        if not is_member(s, group_id, current_user.id):
+            return {"error": "not in group"}, 403
+        version = (versions.matches_version(s), versions.get(s, [versions.picks_key(group_id, current_user.id)]),
+                   _scope_range(scope, today))
+        return respond(version, lambda: matches_payload(s, group_id, current_user.id, scope, today))
+
 @bp.post("/groups/<int:group_id>/predictions")
 @login_required
 def submit_predictions(group_id):
     """
     Save (upsert) user's predictions for matches in the selected window.
     Enforces window open/close and per-match kickoff lock (UTC).
+    All accepted entries are written with one executemany upsert; `results`
+    lists every entry with `ok` and, when rejected, a `reason`.
     """
     body = request.get_json(silent=True) or {}
     entries = body.get("predictions", [])
@@ -133,124 +196,199 @@ def submit_predictions(group_id):
     if not (is_open or allow_early_qs or allow_early_cfg):
         return {"error": f"predictions open {open_at} and close {close_at} (local time)"}, 403
 
-    saved = 0
-    with db.SessionLocal() as s:
-        if not _require_member(s, group_id, current_user.id):
+    # Parse everything first so bad entries get a reason instead of being dropped silently
+    parsed = []
+    for e in entries:
+        try:
+            parsed.append((int(e["match_id"]), int(e["home_pred"]), int(e["away_pred"])))
+        except Exception:
+            parsed.append((e.get("match_id") if isinstance(e, dict) else None, None, None))
+
+    with db.request_session() as s:
+        if not is_member(s, group_id, current_user.id):
             return {"error": "not in group"}, 403
 
-        for e in entries:
-            try:
-                mid = int(e["match_id"])
-                hm = int(e["home_pred"])
-                aw = int(e["away_pred"])
-            except Exception:
-                continue
-
-            match = s.get(Match, mid)
-            if not match:
-                continue
-            if not (start <= match.date <= end):
-                continue
-            # Lock per match at kickoff (UTC)
-            if datetime.now(timezone.utc) >= match.utc_kickoff:
-                continue
-
-            s.execute(text("""
-              insert into predictions (group_id,user_id,match_id,home_pred,away_pred,created_at,updated_at)
-              values (:g,:u,:m,:hp,:ap, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-              on conflict (group_id,user_id,match_id) do update set
-                home_pred=excluded.home_pred,
-                away_pred=excluded.away_pred,
-                updated_at=CURRENT_TIMESTAMP
-            """), {"g": group_id, "u": current_user.id, "m": mid, "hp": hm, "ap": aw})
-            saved += 1
-
-        s.commit()
-
-    return {"ok": True, "saved": saved, "scope": scope, "week_start": start.isoformat()}
+        # Window membership and kickoff locks come from the in-memory match calendar,
+        # then the entries that pass are checked again against `matches` itself
+        now_utc = datetime.now(timezone.utc)
+        results, rows = [], []
+        for mid, hm, aw in parsed:
+            in_window = calendar.in_window(mid, start, end) if hm is not None else None
+            if hm is None:
+                reason = "invalid entry"
+            elif in_window is None:
+                reason = "unknown match"
+            elif not in_window:
+                reason = "match not in this window"
+            elif calendar.is_locked(mid, now_utc):   # lock per match at kickoff (UTC)
+                reason = "match has kicked off"
+            else:
+                reason = None
+                rows.append({"g": group_id, "u": current_user.id, "m": mid, "hp": hm, "ap": aw, "ts": now_utc})
+            results.append({"match_id": mid, "ok": reason is None, **({"reason": reason} if reason else {})})
+
+        if rows:
+            current = {mid: (d, k if k.tzinfo else k.replace(tzinfo=timezone.utc))
+                       for mid, d, k in s.execute(MATCH_LOCKS_SQL, {"ids": sorted({r["m"] for r in rows})})}
+            rejected = {}
+            for r in rows:
+                d, k = current.get(r["m"], (None, None))
+                if d is None:
+                    rejected[r["m"]] = "unknown match"
+                elif not start <= d <= end:
+                    rejected[r["m"]] = "match not in this window"
+                elif now_utc >= k:
+                    rejected[r["m"]] = "match has kicked off"
+            if rejected:
+                calendar.invalidate()     # it was behind; reload on the next lookup
+                rows = [r for r in rows if r["m"] not in rejected]
+                for res in results:
+                    if res["ok"] and res["match_id"] in rejected:
+                        res.update(ok=False, reason=rejected[res["match_id"]])
+
+        if rows:
+            s.execute(UPSERT_PREDICTION_SQL, rows)
+            versions.bump(s, [versions.picks_key(group_id, current_user.id)])
+            publish_after_commit(s, group_id, "predictions", {
+                "user_id": current_user.id, "username": current_user.username,
+                "predictions": [{"match_id": r["m"], "home_pred": r["hp"], "away_pred": r["ap"]} for r in rows]})
+            s.commit()
+
+    return {"ok": True, "saved": len(rows), "scope": scope, "week_start": start.isoformat(),
+            "results": results}
+
+def others_payload(s, group_id: int, scope: str, today: date):
+    start, end = _scope_range(scope, today)
+    rows = s.execute(OTHERS_SQL, {"g": group_id, "a": start, "b": end}).mappings().all()
+
+    items = [dict(r) for r in rows]
+    # no times returned except updated_at (useful for ordering/debug)
+    return {"scope": scope, "week_start": start.isoformat(), "predictions": items}
+
+def stats_payload(s, group_id: int):
+    """(body, status) — 403 until the current window has closed."""
+    is_open, start, end, open_at, close_at = _is_open_now_for_current()
+    now = datetime.now(close_at.tzinfo) if close_at.tzinfo else datetime.now()
+    if now < close_at:
+        return {"error": "stats available after window closes", "close_at": close_at.isoformat()}, 403
+    return closed_window_stats(s, group_id, start, end), 200
+
+# -------- Others' picks: keyset pages / NDJSON stream --------
+
+OTHERS_PAGE_MAX = 1000
+
+def _utc(ts) -> datetime:
+    """updated_at as an aware UTC datetime; SQLite hands text rows back as strings."""
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+def _encode_cursor(row) -> str:
+    """Opaque cursor: "<updated_at ISO, UTC>|<id>" of the last prediction on the page."""
+    return base64.urlsafe_b64encode(f"{_utc(row['updated_at']).isoformat()}|{row['id']}".encode()).decode()
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    ts, pid = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return _utc(datetime.fromisoformat(ts)), int(pid)
+
+def _iter_others(s, group_id: int, start: date, end: date, cursor=None, limit=None):
+    """Rows newest first on (updated_at, id), straight off a server-side cursor."""
+    params = {"g": group_id, "a": start, "b": end}
+    if cursor:
+        params["ts"], params["id"] = _decode_cursor(cursor)
+    if limit:
+        params["n"] = limit
+    yield from s.execute(OTHERS_PAGE_SQL[bool(cursor), bool(limit)], params).mappings()
+
+def _others_compact(rows, scope, start, limit):
+    """Match labels and users once; picks as rows of ids."""
+    matches, users, picks, last = {}, {}, [], None
+    for r in rows:
+        matches.setdefault(r["match_id"], {"home": r["home"], "away": r["away"]})
+        users.setdefault(r["user_id"], {"username": r["username"], "email": r["email"]})
+        picks.append([r["match_id"], r["user_id"], r["home_pred"], r["away_pred"], r["updated_at"]])
+        last = r
+    return {"scope": scope, "week_start": start.isoformat(), "matches": matches, "users": users,
+            "columns": ["match_id", "user_id", "home_pred", "away_pred", "updated_at"],
+            "predictions": picks,
+            "next_cursor": _encode_cursor(last) if last and limit and len(picks) == limit else None}
+
+def _others_ndjson(group_id, start, end, cursor, limit, compact):
+    """One JSON object per line; compact mode emits each match/user once before its first pick."""
+    seen_m, seen_u, last, n = set(), set(), None, 0
+    with db.SessionLocal() as s:
+        for r in _iter_others(s, group_id, start, end, cursor, limit):
+            if compact:
+                if r["match_id"] not in seen_m:
+                    seen_m.add(r["match_id"])
+                    yield json.dumps({"type": "match", "match_id": r["match_id"], "home": r["home"], "away": r["away"]}) + "\n"
+                if r["user_id"] not in seen_u:
+                    seen_u.add(r["user_id"])
+                    yield json.dumps({"type": "user", "user_id": r["user_id"], "username": r["username"], "email": r["email"]}) + "\n"
+                line = {"type": "pick", "match_id": r["match_id"], "user_id": r["user_id"],
+                        "home_pred": r["home_pred"], "away_pred": r["away_pred"], "updated_at": r["updated_at"]}
+            else:
+                line = {k: r[k] for k in ("match_id", "home", "away", "username", "email",
+                                          "home_pred", "away_pred", "updated_at")}
+            yield json.dumps(line, default=str) + "\n"
+            last, n = r, n + 1
+    if limit and last is not None and n == limit:
+        yield json.dumps({"type": "next", "next_cursor": _encode_cursor(last)}) + "\n"
 
 @bp.get("/groups/<int:group_id>/predictions/others")
 @login_required
 def others_submitted(group_id):
     """
     Show other members' submitted predictions immediately (no need to wait until window closes).
+    Optional, for large groups:
+      ?limit=N&cursor=...   keyset pages on (updated_at, id); the response carries next_cursor
+      ?compact=1            match labels and users sent once, picks as id rows
+      ?format=ndjson        streamed straight from the DB cursor, one object per line
+    Without any of these the response is the full list, as before.
     """
     scope = (request.args.get("scope") or "current").lower()
-    (cur_s, cur_e), (next_s, next_e) = windows(date.today())
-    start, end = (cur_s, cur_e) if scope == "current" else (next_s, next_e)
-
-    with db.SessionLocal() as s:
-        if not _require_member(s, group_id, current_user.id):
+    limit = request.args.get("limit", type=int)
+    limit = min(limit, OTHERS_PAGE_MAX) if limit and limit > 0 else None
+    cursor = request.args.get("cursor") or None
+    compact = (request.args.get("compact") or "").lower() in ("1", "true", "yes")
+    ndjson = (request.args.get("format") or "").lower() == "ndjson"
+    if cursor:
+        try:
+            _decode_cursor(cursor)
+        except Exception:
+            return {"error": "bad cursor"}, 400
+
+    with db.request_session() as s:
+        if not is_member(s, group_id, current_user.id):
             return {"error": "not in group"}, 403
-
-        rows = s.execute(text("""
-          select p.match_id, m.home, m.away, u.username, u.email, p.home_pred, p.away_pred, p.updated_at
-          from predictions p
-          join matches m on m.match_id=p.match_id
-          join users u on u.id=p.user_id
-          where p.group_id=:g and m.date between :a and :b
-          order by p.updated_at desc
-        """), {"g": group_id, "a": start, "b": end}).mappings().all()
-
-    items = [dict(r) for r in rows]
-    # no times returned except updated_at (useful for ordering/debug)
-    return {"scope": scope, "week_start": start.isoformat(), "predictions": items}
+        if not (limit or cursor or compact or ndjson):
+            return others_payload(s, group_id, scope, date.today())
+
+        start, end = _scope_range(scope, date.today())
+        if ndjson:
+            db.close_request_session()      # don't hold a pooled connection while streaming
+            return Response(stream_with_context(_others_ndjson(group_id, start, end, cursor, limit, compact)),
+                            mimetype="application/x-ndjson")
+        rows = _iter_others(s, group_id, start, end, cursor, limit or OTHERS_PAGE_MAX)
+        if compact:
+            return _others_compact(rows, scope, start, limit or OTHERS_PAGE_MAX)
+        items, last = [], None
+        for r in rows:
+            items.append({k: r[k] for k in ("match_id", "home", "away", "username", "email",
+                                            "home_pred", "away_pred", "updated_at")})
+            last = r
+        page = limit or OTHERS_PAGE_MAX
+        return {"scope": scope, "week_start": start.isoformat(), "predictions": items,
+                "next_cursor": _encode_cursor(last) if last and len(items) == page else None}
 
 @bp.get("/groups/<int:group_id>/predictions/stats")
 @login_required
 def prediction_stats(group_id):
     """
     Aggregate stats (outcomes and exact score frequencies).
-    Kept gated until the *current* window closes to avoid influencing picks.
+    Kept gated until the *current* window closes to avoid influencing picks;
+    after that the result is cached for the rest of the week (see stats.py).
     """
-    is_open, start, end, open_at, close_at = _is_open_now_for_current()
-    now = datetime.now(close_at.tzinfo) if close_at.tzinfo else datetime.now()
-    if now < close_at:
-        return {"error": "stats available after window closes", "close_at": close_at.isoformat()}, 403
-
-    with db.SessionLocal() as s:
+    with db.request_session() as s:
         # (Optional) you can require membership here too, but these are group-bound stats
-        outcome_rows = s.execute(text("""
-          with picks as (
-            select p.match_id,
-                   case when p.home_pred > p.away_pred then 'home'
-                        when p.home_pred = p.away_pred then 'draw'
-                        else 'away' end as outcome
-            from predictions p
-            join matches m on m.match_id = p.match_id
-            where p.group_id=:g and m.date between :a and :b
-          )
-          select match_id, outcome, count(*) as c
-          from picks
-          group by match_id, outcome
-          order by match_id
-        """), {"g": group_id, "a": start, "b": end}).mappings().all()
-
-        score_rows = s.execute(text("""
-          select p.match_id, concat(p.home_pred,'-',p.away_pred) as score, count(*) as c
-          from predictions p
-          join matches m on m.match_id = p.match_id
-          where p.group_id=:g and m.date between :a and :b
-          group by p.match_id, score
-          order by p.match_id
-        """), {"g": group_id, "a": start, "b": end}).mappings().all()
-
-        labels = s.execute(text("""
-          select match_id, home, away from matches where date between :a and :b
-        """), {"a": start, "b": end}).mappings().all()
-
-    by_match = {
-        r["match_id"]: {
-            "match_id": r["match_id"],
-            "home": r["home"],
-            "away": r["away"],
-            "outcomes": {"home": 0, "draw": 0, "away": 0},
-            "scores": []
-        } for r in labels
-    }
-    for r in outcome_rows:
-        by_match[r["match_id"]]["outcomes"][r["outcome"]] = r["c"]
-    for r in score_rows:
-        by_match[r["match_id"]]["scores"].append({"score": r["score"], "count": r["c"]})
-
-    return {"week_start": start.isoformat(), "matches": list(by_match.values())}
\ No newline at end of file
+        return stats_payload(s, group_id)
@@ -11,6 +11,7 @@ def index():
             "health": "/api/health",
             "fixtures": "/api/fixtures?from=YYYY-MM-DD&to=YYYY-MM-DD",
             "results": "/api/results?from=YYYY-MM-DD&to=YYYY-MM-DD",
+            "sync_status": "/api/sync/status",
             "run_scrape": "POST /admin/run-scrape"
         }
     })
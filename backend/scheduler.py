@@ -1,25 +1,51 @@
+import os
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from zoneinfo import ZoneInfo
-from .tasks.weekly import run_weekly_job
-from .config import Config
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.date import DateTrigger
+from datetime import datetime, timedelta, timezone
+from .jobs import run_job
+from .config import get_config
 
 def start_scheduler(app):
-    cfg = Config.from_env()
-    try:
-        tz = ZoneInfo(cfg.timezone)
-    except Exception:
-        tz = "UTC"
+    tz = get_config().local_tz or "UTC"
 
     sched = BackgroundScheduler(timezone=tz, job_defaults={"coalesce": True, "misfire_grace_time": 3600})
     trigger = CronTrigger(day_of_week="thu", hour=9, minute=0, timezone=tz)  # Thu 09:00 local
-    sched.add_job(lambda: app.logger.info(f"[weekly_job] {run_weekly_job()}"),
+    # both run through jobs.run_job: a DB lease keeps them from overlapping with another
+    # scheduler process or an /admin/run-scrape request, and every run lands in job_runs
+    sched.add_job(lambda: app.logger.info(f"[weekly_job] {run_job('weekly_scrape', requested_by='scheduler')}"),
                   trigger, id="weekly_pl_scrape", replace_existing=True)
+
+    # keep the default fixtures/results ranges fresh so web requests never wait on the API
+    sched.add_job(lambda: app.logger.info(f"[match_sync] {run_job('match_sync', requested_by='scheduler')}"),
+                  IntervalTrigger(minutes=15, timezone=tz), id="match_sync", replace_existing=True)
+
+    if os.getenv("ENABLE_LIVE_POLL", "1") in ("1", "true", "True"):
+        _schedule_live_polling(app, sched)
     sched.start()
-    app.logger.info("Scheduler started: Thursdays 09:00 local time")
+    app.logger.info("Scheduler started: Thursdays 09:00 local time, match sync every 15 min, live polling on match days")
     return sched
 
+def _schedule_live_polling(app, sched):
+    """One-shot job that re-arms itself for whenever the `live_poll` job says the next tick is due."""
+    def run():
+        next_in = 60
+        run_ = run_job("live_poll", requested_by="scheduler")
+        if run_["status"] == "succeeded":
+            next_in = run_["result"]["next_in"]
+            if run_["result"]["live"]:
+                app.logger.info(f"[live_poll] {run_['result']}")
+        elif run_["status"] == "failed":
+            app.logger.error("[live_poll] %s; retrying in %ss", run_["error"], next_in)
+        sched.add_job(run, DateTrigger(run_date=datetime.now(timezone.utc) + timedelta(seconds=next_in)),
+                      id="live_poll", replace_existing=True)
+
+    sched.add_job(run, DateTrigger(run_date=datetime.now(timezone.utc) + timedelta(seconds=5)),
+                  id="live_poll", replace_existing=True)
+
 def main():
+    os.environ.setdefault("DB_POOL_PROFILE", "worker")
     from backend import create_app
     app = create_app()
     start_scheduler(app)  # should BLOCK (e.g., APScheduler BlockingScheduler.start())
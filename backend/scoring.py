@@ -1,29 +1,246 @@
-from sqlalchemy import text
-from datetime import date
+from sqlalchemy import text, bindparam, select
+from datetime import date, timedelta
 from . import db
-from .util import window_for, points_for
+from .models import Match, Prediction
+from .cache import leaderboard_cache, invalidate_after_commit
+from .events import publish_after_commit
+from .ranking import refresh_global_scores
+from .versions import bump_scores
+from .util import window_for, week_start_thu, points_for
+
+UPSERT_WEEKLY_SQL = text("""
+  insert into weekly_scores (group_id,user_id,week_start,points,updated_at)
+  values (:g,:u,:ws,:p, CURRENT_TIMESTAMP)
+  on conflict (group_id,user_id,week_start) do update set
+    points=excluded.points, updated_at=CURRENT_TIMESTAMP
+""")
+
+# Same rules as util.points_for, evaluated by the database for every prediction at once:
+# no result -> 0, exact score -> 3, correct outcome -> 1, otherwise 0.
+POINTS_CASE_SQL = """
+  case
+    when m.home_score is null or m.away_score is null then 0
+    when p.home_pred = m.home_score and p.away_pred = m.away_score then 3
+    when (case when p.home_pred > p.away_pred then 1 when p.home_pred < p.away_pred then -1 else 0 end)
+       = (case when m.home_score > m.away_score then 1 when m.home_score < m.away_score then -1 else 0 end) then 1
+    else 0
+  end
+"""
+
+WEEK_POINTS_SQL = text(f"""
+  select p.group_id, p.user_id, sum({POINTS_CASE_SQL}) as points
+  from predictions p
+  join matches m on m.match_id = p.match_id
+  where m.date between :a and :b
+  group by p.group_id, p.user_id
+""")
+WEEK_POINTS_GROUPS_SQL = text(f"""
+  select p.group_id, p.user_id, sum({POINTS_CASE_SQL}) as points
+  from predictions p
+  join matches m on m.match_id = p.match_id
+  where m.date between :a and :b and p.group_id in :gids
+  group by p.group_id, p.user_id
+""").bindparams(bindparam("gids", expanding=True))
+
+GROUP_WEEK_SQL = text("""
+  select p.user_id, p.group_id, p.match_id, p.home_pred, p.away_pred,
+         m.home_score, m.away_score
+  from predictions p
+  join matches m on m.match_id = p.match_id
+  where p.group_id=:g and m.date between :a and :b
+""")
+
+# Absolute points of `uids` in `gids` for one week, for incremental scoring: it runs after
+# the match upsert, so it reads the results as stored (including another ingest's that
+# committed while this one waited on the match rows) rather than adding a delta onto them.
+MEMBER_WEEK_POINTS_SQL = text(f"""
+  select p.group_id, p.user_id, sum({POINTS_CASE_SQL}) as points
+  from predictions p
+  join matches m on m.match_id = p.match_id
+  where m.date between :a and :b and p.group_id in :gids and p.user_id in :uids
+  group by p.group_id, p.user_id
+""").bindparams(bindparam("gids", expanding=True), bindparam("uids", expanding=True))
+STORED_WEEK_POINTS_SQL = text("""
+  select group_id, user_id, points from weekly_scores
+  where week_start = :ws and group_id in :gids and user_id in :uids
+""").bindparams(bindparam("gids", expanding=True), bindparam("uids", expanding=True))
+
+# Running totals (models.CumulativeScore) of `gids` from week :ws on, recomputed from
+# weekly_scores after a write: the running total before :ws plus a window sum over the
+# weeks since, so a change to one week touches that week and later ones, never the rest
+# of the season. It reads the weekly rows this transaction has just written (under their
+# write locks), so a concurrent delta can't slip in between a read and the write.
+REFRESH_CUMULATIVE_SQL = text("""
+  insert into cumulative_scores (group_id,user_id,week_start,points,cum_points)
+  select w.group_id, w.user_id, w.week_start, w.points,
+         sum(w.points) over (partition by w.group_id, w.user_id order by w.week_start)
+         + coalesce((select c.cum_points from cumulative_scores c
+                     where c.group_id=w.group_id and c.user_id=w.user_id and c.week_start < :ws
+                     order by c.week_start desc limit 1), 0)
+  from weekly_scores w
+  where w.group_id in :gids and w.week_start >= :ws
+  on conflict (group_id,user_id,week_start) do update set
+    points=excluded.points, cum_points=excluded.cum_points
+  where cumulative_scores.points <> excluded.points or cumulative_scores.cum_points <> excluded.cum_points
+""").bindparams(bindparam("gids", expanding=True))
+GROUP_CHUNK = 500
+
+def _refresh_cumulative(s, rows):
+    """Bring cumulative_scores up to date with the weekly_scores rows [{"g","ws",...}] just written."""
+    if not rows:
+        return
+    since = min(r["ws"] for r in rows)
+    gids = sorted({r["g"] for r in rows})
+    for i in range(0, len(gids), GROUP_CHUNK):
+        s.execute(REFRESH_CUMULATIVE_SQL, {"gids": gids[i:i + GROUP_CHUNK], "ws": since})
+
+def rebuild_cumulative(s, group_ids=None):
+    """Recompute cumulative_scores from weekly_scores (all groups, or just `group_ids`)."""
+    where = "where group_id in :gids" if group_ids is not None else ""
+    stmts = [text(f"delete from cumulative_scores {where}"), text(f"""
+      insert into cumulative_scores (group_id,user_id,week_start,points,cum_points)
+      select group_id, user_id, week_start, points,
+             sum(points) over (partition by group_id, user_id order by week_start)
+      from weekly_scores {where}
+    """)]
+    params = {}
+    if group_ids is not None:
+        stmts = [q.bindparams(bindparam("gids", expanding=True)) for q in stmts]
+        params["gids"] = list(group_ids)
+    for q in stmts:
+        s.execute(q, params)
+
+def _write_weekly_scores(s, rows):
+    """Upsert [{"g","u","ws","p"}, ...] into weekly_scores as one executemany (running totals follow)."""
+    if rows:
+        s.execute(UPSERT_WEEKLY_SQL, rows)
+        _refresh_cumulative(s, rows)
+        refresh_global_scores(s, {r["u"] for r in rows})
+        bump_scores(s, {r["g"] for r in rows})
+        invalidate_after_commit(s, leaderboard_cache, *{r["g"] for r in rows})
+        by_group = {}
+        for r in rows:
+            by_group.setdefault(r["g"], []).append({"user_id": r["u"], "week_start": r["ws"], "points": r["p"]})
+        for g, scores in by_group.items():
+            publish_after_commit(s, g, "scores", {"scores": scores})
 
 def recompute_week(group_id: int, week_start: date):
     # Pull predictions + final scores for the week, compute & upsert weekly_scores
     with db.SessionLocal() as s:
-        rows = s.execute(text("""
-          select p.user_id, p.group_id, p.match_id, p.home_pred, p.away_pred,
-                 m.home_score, m.away_score
-          from predictions p
-          join matches m on m.match_id = p.match_id
-          where p.group_id=:g and m.date between :a and :b
-        """), {"g": group_id, "a": week_start, "b": week_start.fromordinal(week_start.toordinal()+6)}).mappings().all()
+        rows = s.execute(GROUP_WEEK_SQL, {"g": group_id, "a": week_start, "b": week_start.fromordinal(week_start.toordinal()+6)}).mappings().all()
 
         totals = {}
         for r in rows:
             pts = points_for(r["home_pred"], r["away_pred"], r["home_score"], r["away_score"])
             totals[r["user_id"]] = totals.get(r["user_id"], 0) + pts
 
-        for uid, pts in totals.items():
-            s.execute(text("""
-              insert into weekly_scores (group_id,user_id,week_start,points,updated_at)
-              values (:g,:u,:ws,:p, CURRENT_TIMESTAMP)
-              on conflict (group_id,user_id,week_start) do update set
-                points=excluded.points, updated_at=CURRENT_TIMESTAMP
-            """), {"g":group_id,"u":uid,"ws":week_start, "p":pts})
+        _write_weekly_scores(s, [{"g": group_id, "u": uid, "ws": week_start, "p": pts}
+                                 for uid, pts in totals.items()])
+        s.commit()
+
+def recompute_week_all(week_start: date, group_ids=None):
+    """
+    Set-based version of recompute_week for many groups at once.
+    Points are summed in SQL per (group, user) and written with a single executemany upsert,
+    so the cost is two statements regardless of how many groups there are.
+    `group_ids=None` scores every group that has predictions in the week.
+    """
+    week_end = week_start + timedelta(days=6)
+    stmt = WEEK_POINTS_SQL
+    params = {"a": week_start, "b": week_end}
+    if group_ids is not None:
+        group_ids = list(group_ids)
+        if not group_ids:
+            return {"week_start": week_start.isoformat(), "groups": 0, "rows": 0}
+        stmt = WEEK_POINTS_GROUPS_SQL
+        params["gids"] = group_ids
+
+    with db.SessionLocal() as s:
+        rows = s.execute(stmt, params).all()
+        _write_weekly_scores(s, [{"g": g, "u": u, "ws": week_start, "p": int(p or 0)}
+                                 for g, u, p in rows])
         s.commit()
+
+    return {"week_start": week_start.isoformat(),
+            "groups": len({r[0] for r in rows}), "rows": len(rows)}
+
+# ---------- Incremental scoring ----------
+
+_NO_RESULT = (None, None, None)
+
+def snapshot_results(s, match_ids):
+    """{match_id: (home_score, away_score, week_start)} for the matches already stored."""
+    match_ids = list(match_ids)
+    if not match_ids:
+        return {}
+    rows = s.execute(select(Match.match_id, Match.home_score, Match.away_score, Match.date)
+                     .where(Match.match_id.in_(match_ids))).all()
+    return {mid: (hs, as_, week_start_thu(d)) for mid, hs, as_, d in rows}
+
+def result_changes(before, after):
+    """
+    Compare two {match_id: (home_score, away_score, week_start)} maps and return
+    {match_id: (old, new)} for every match whose score changed, or whose result now
+    belongs to a different week (the fixture's date moved). Matches missing from
+    `before` count as having had no result.
+    """
+    out = {}
+    for mid, new in after.items():
+        old = before.get(mid, _NO_RESULT)
+        if tuple(new[:2]) != tuple(old[:2]) or (new[2] != old[2] and None not in old[:2]):
+            out[mid] = (old, new)
+    return out
+
+def apply_result_changes(s, changes):
+    """
+    Rescore only the weekly_scores rows `changes` ({match_id: (old, new)}, entries as in
+    result_changes) touch: the week the old result was scored in and the result's current
+    week, for the members who predicted those matches. Rows are recomputed in absolute
+    terms from the stored results, so two ingests of the same result that both saw the old
+    score still leave the right total, and the `results` event reports how far each row
+    actually moved. Runs inside the caller's transaction, after the match upsert (whose
+    row locks hold off other ingests of these matches); the caller commits.
+    """
+    if not changes:
+        return {"matches": 0, "rows": 0}
+    preds = s.execute(
+        select(Prediction.group_id, Prediction.user_id, Prediction.match_id,
+               Prediction.home_pred, Prediction.away_pred)
+        .where(Prediction.match_id.in_(list(changes)))
+    ).all()
+
+    by_week = {}
+    for g, u, mid, _, _ in preds:
+        (_, _, old_ws), (_, _, new_ws) = changes[mid]
+        for ws in {old_ws, new_ws} - {None}:
+            by_week.setdefault(ws, set()).add((g, u))
+
+    deltas, rows = {}, []
+    for ws, keys in sorted(by_week.items()):
+        params = {"a": ws, "b": ws + timedelta(days=6), "ws": ws,
+                  "gids": sorted({g for g, _ in keys}), "uids": sorted({u for _, u in keys})}
+        new = {(g, u): int(p or 0) for g, u, p in s.execute(MEMBER_WEEK_POINTS_SQL, params)}
+        old = {(g, u): p for g, u, p in s.execute(STORED_WEEK_POINTS_SQL, params)}
+        for g, u in sorted(keys):
+            rows.append({"g": g, "u": u, "ws": ws, "p": new.get((g, u), 0)})
+            deltas[(g, u, ws)] = new.get((g, u), 0) - old.get((g, u), 0)
+
+    if rows:
+        s.execute(UPSERT_WEEKLY_SQL, rows)
+        _refresh_cumulative(s, rows)
+        refresh_global_scores(s, {r["u"] for r in rows})
+        bump_scores(s, {g for g, _, _ in deltas})
+        invalidate_after_commit(s, leaderboard_cache, *{g for g, _, _ in deltas})
+
+        # one `results` event per affected group: the new scores it predicted on and the points they moved
+        by_group = {}
+        for g, _, mid, _, _ in preds:
+            by_group.setdefault(g, ({}, []))[0][mid] = changes[mid][1][:2]
+        for (g, u, ws), p in deltas.items():
+            if p:
+                by_group[g][1].append({"user_id": u, "week_start": ws, "delta": p})
+        for g, (scores, moved) in by_group.items():
+            publish_after_commit(s, g, "results", {
+                "matches": [{"match_id": mid, "home_score": hs, "away_score": as_} for mid, (hs, as_) in scores.items()],
+                "deltas": moved})
+    return {"matches": len(changes), "rows": len(deltas)}
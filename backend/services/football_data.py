@@ -1,8 +1,16 @@
-import os, requests
+import os, random, threading, time
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 from zoneinfo import ZoneInfo
 
+from ..cache import TTLCache
+
+if TYPE_CHECKING:   # `requests` is imported on first use; it's a noticeable share of app startup
+    import requests
+
 FD_BASE = "https://api.football-data.org/v4"
+VALIDATOR_CACHE_SIZE = int(os.getenv("FD_VALIDATOR_CACHE_SIZE", 256))   # revalidatable payloads kept
+VALIDATOR_TTL = float(os.getenv("FD_VALIDATOR_TTL", 6 * 3600))
 
 def to_local_from_utc_iso(utc_iso: str, tz: ZoneInfo | None):
     dt_utc = datetime.fromisoformat(utc_iso.replace("Z", "+00:00")).astimezone(timezone.utc)
@@ -10,13 +18,183 @@ def to_local_from_utc_iso(utc_iso: str, tz: ZoneInfo | None):
     else:  dt_loc = dt_utc
     return dt_loc, dt_loc.strftime("%Y-%m-%d"), dt_loc.strftime("%H:%M")
 
+
+class TokenBucket:
+    """`rate` tokens per `per` seconds, bursting up to `rate`. Thread-safe, blocking acquire."""
+
+    def __init__(self, rate: int, per: float = 60.0):
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.blocked_until = 0.0          # set from X-RequestCounter-Reset when upstream says 0 left
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._ts) * self.fill_rate)
+        self._ts = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = max(self.blocked_until - now, 0.0)
+                if not wait and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = wait or (1 - self.tokens) / self.fill_rate
+            time.sleep(wait)
+
+    def sync(self, available: int | None, reset_in: float | None):
+        """Trust the server's view of the remaining budget over our own estimate."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if available is not None:
+                self.tokens = min(self.tokens, float(available))
+                if available <= 0 and reset_in:
+                    self.blocked_until = max(self.blocked_until, now + reset_in)
+
+
+class FootballDataClient:
+    """
+    Process-wide football-data.org client:
+    - one pooled keep-alive `requests.Session`
+    - token bucket kept in step with X-Requests-Available-Minute / X-RequestCounter-Reset
+    - retries with jittered exponential backoff on 5xx/connection errors; a 429 pauses
+      the bucket until X-RequestCounter-Reset instead
+    - ETag / Last-Modified revalidation against a bounded LRU of recent payloads; a 304
+      returns the cached one
+    - counters for latency, 429s, bytes received (see `metrics()`)
+    """
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, token: str, base: str = FD_BASE, per_minute: int | None = None,
+                 max_retries: int = 3, timeout=(5, 30), session: "requests.Session | None" = None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.token = token
+        self.base = base
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.bucket = TokenBucket(per_minute or int(os.getenv("FD_REQUESTS_PER_MINUTE", 10)))
+        self.session = session or requests.Session()
+        if session is None:
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        self.session.headers.update({"X-Auth-Token": token, "Accept-Encoding": "gzip"})
+        # (path, params) -> (etag, last_modified, payload)
+        self._validators = TTLCache("football_data_validators", maxsize=VALIDATOR_CACHE_SIZE, ttl=VALIDATOR_TTL)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "errors": 0, "rate_limited": 0,
+                      "not_modified": 0, "bytes_received": 0,
+                      "latency_total_ms": 0.0, "latency_max_ms": 0.0}
+
+    def _count(self, latency_ms: float | None = None, **inc):
+        """Add `inc` to the counters; `latency_ms` is one call's latency (feeds total and max)."""
+        with self._lock:
+            for k, v in inc.items():
+                self.stats[k] += v
+            if latency_ms is not None:
+                self.stats["latency_total_ms"] += latency_ms
+                self.stats["latency_max_ms"] = max(self.stats["latency_max_ms"], latency_ms)
+
+    @staticmethod
+    def _int_header(r, name):
+        try:
+            return int(r.headers[name])
+        except (KeyError, ValueError, TypeError):
+            return None
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after:
+            return retry_after + random.uniform(0, 1)
+        return min(30.0, 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def get_json(self, path: str, params: dict | None = None):
+        import requests
+        key = (path, tuple(sorted((params or {}).items())))
+        cached = self._validators.get(key)
+        headers = {}
+        if cached:
+            if cached[0]: headers["If-None-Match"] = cached[0]
+            if cached[1]: headers["If-Modified-Since"] = cached[1]
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            t0 = time.perf_counter()
+            try:
+                r = self.session.get(f"{self.base}{path}", params=params, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self._count(requests=1, errors=1)
+                if attempt == self.max_retries:
+                    raise
+                self._count(retries=1)
+                time.sleep(self._backoff(attempt))
+                continue
+
+            self._count(requests=1, bytes_received=len(r.content or b""),
+                        latency_ms=(time.perf_counter() - t0) * 1000)
+            reset_in = self._int_header(r, "X-RequestCounter-Reset")
+            self.bucket.sync(self._int_header(r, "X-Requests-Available-Minute"), reset_in)
+
+            if r.status_code == 304 and cached:
+                self._count(not_modified=1)
+                return cached[2]
+            if r.status_code in self.RETRY_STATUS and attempt < self.max_retries:
+                self._count(retries=1)
+                if r.status_code == 429:
+                    # the next acquire() waits out the pause; sleeping here as well would pay it twice
+                    self._count(rate_limited=1)
+                    self.bucket.sync(0, self._backoff(attempt, reset_in or 60))
+                else:
+                    time.sleep(self._backoff(attempt))
+                continue
+            if r.status_code == 429:
+                self._count(rate_limited=1)
+            if r.status_code >= 400:
+                self._count(errors=1)
+            r.raise_for_status()
+
+            data = r.json()
+            etag, last_mod = r.headers.get("ETag"), r.headers.get("Last-Modified")
+            if etag or last_mod:
+                self._validators.set(key, (etag, last_mod, data))
+            return data
+
+    def matches(self, pl_code: str, date_from: str | None = None, date_to: str | None = None,
+                status: str | None = None, season: int | None = None):
+        params = {}
+        if date_from: params["dateFrom"] = date_from
+        if date_to: params["dateTo"] = date_to
+        if status: params["status"] = status
+        if season: params["season"] = season
+        data = self.get_json(f"/competitions/{pl_code}/matches", params)
+        if isinstance(data, dict) and data.get("errorCode"):
+            raise RuntimeError(f"FD error: {data.get('message')}")
+        return data.get("matches", [])
+
+    def metrics(self):
+        with self._lock:
+            out = dict(self.stats)
+        out["latency_avg_ms"] = round(out["latency_total_ms"] / out["requests"], 1) if out["requests"] else None
+        out["tokens_left"] = round(self.bucket.tokens, 2)
+        return out
+
+
+_clients: dict[str, FootballDataClient] = {}
+_clients_lock = threading.Lock()
+
+def get_client(token: str) -> FootballDataClient:
+    """One shared client (and connection pool) per API token per process."""
+    with _clients_lock:
+        c = _clients.get(token)
+        if c is None:
+            c = _clients[token] = FootballDataClient(token)
+        return c
+
 def fetch_matches(pl_code: str, token: str, date_from: str, date_to: str, status: str | None):
-    params = {"dateFrom": date_from, "dateTo": date_to}
-    if status: params["status"] = status
-    r = requests.get(f"{FD_BASE}/competitions/{pl_code}/matches",
-                     headers={"X-Auth-Token": token}, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json()
-    if isinstance(data, dict) and data.get("errorCode"):
-        raise RuntimeError(f"FD error: {data.get('message')}")
-    return data.get("matches", [])
+    return get_client(token).matches(pl_code, date_from, date_to, status)
@@ -0,0 +1,203 @@
+# backend/services/sync.py
+"""
+Stale-while-revalidate mirror of football-data.org into the `matches` table.
+
+Request handlers only ever read `matches`; they call `ensure_fresh(...)`, which
+returns immediately and, if the range is older than its max age, schedules a
+background refresh. Concurrent refreshes of the same range collapse into one
+upstream call, and per-range freshness is stored in `sync_ranges` so every
+process (web workers, scheduler) sees the same state.
+
+Requested ranges are widened to whole Thu→Wed weeks, capped at MAX_RANGE_WEEKS and
+ignored outside HORIZON_DAYS of today, so arbitrary `?from/to` values map onto a
+bounded set of `sync_ranges` rows. A range whose last attempt is younger than
+`retry_cooldown` is not retried; after consecutive failures the wait doubles up to
+`max_backoff`.
+
+`fetch` and `ingest` are injected, so tests can swap in a local stub:
+    fetch(date_from: str, date_to: str, status: str | None) -> list[dict]
+    ingest(items: list[dict], status: str | None) -> report (e.g. backend.ingest.ingest_matches)
+"""
+import logging, os, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+from .. import db
+from ..models import SyncRange
+from ..util import week_start_thu
+
+log = logging.getLogger(__name__)
+
+# seconds a range stays fresh, per upstream status filter
+DEFAULT_MAX_AGE = {
+    "SCHEDULED": int(os.getenv("SYNC_MAX_AGE_FIXTURES", 6 * 3600)),
+    "FINISHED": int(os.getenv("SYNC_MAX_AGE_RESULTS", 30 * 60)),
+    None: int(os.getenv("SYNC_MAX_AGE_DEFAULT", 30 * 60)),
+}
+RETRY_COOLDOWN = int(os.getenv("SYNC_RETRY_COOLDOWN", 60))      # seconds between attempts on one range
+MAX_BACKOFF = int(os.getenv("SYNC_MAX_BACKOFF", 3600))
+MAX_RANGE_WEEKS = int(os.getenv("SYNC_MAX_RANGE_WEEKS", 5))
+HORIZON_DAYS = int(os.getenv("SYNC_HORIZON_DAYS", 400))
+
+
+def _as_date(d):
+    return d if isinstance(d, date) else date.fromisoformat(str(d))
+
+
+def _aware(dt):
+    return dt if dt is None or dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def span(date_from, date_to):
+    """The synced range covering [date_from, date_to]: whole weeks, capped; None outside the horizon."""
+    a, b = sorted((_as_date(date_from), _as_date(date_to)))
+    today = date.today()
+    if a > today + timedelta(days=HORIZON_DAYS) or b < today - timedelta(days=HORIZON_DAYS):
+        return None
+    a = week_start_thu(a)
+    b = min(week_start_thu(b), a + timedelta(weeks=MAX_RANGE_WEEKS - 1)) + timedelta(days=6)
+    return a, b
+
+
+def _done(result):
+    fut = Future()
+    fut.set_result(result)
+    return fut
+
+
+class MatchSync:
+    def __init__(self, fetch, ingest, max_age=None, max_workers: int = 2,
+                 retry_cooldown: float = RETRY_COOLDOWN, max_backoff: float = MAX_BACKOFF):
+        self.fetch = fetch
+        self.ingest = ingest
+        self.max_age = {**DEFAULT_MAX_AGE, **(max_age or {})}
+        self.retry_cooldown = retry_cooldown
+        self.max_backoff = max_backoff
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="match-sync")
+        self._inflight = {}          # range_key -> Future
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+
+    @staticmethod
+    def key(date_from, date_to, status):
+        """Key of the synced range covering [date_from, date_to] (see `span`); None if it isn't synced."""
+        r = span(date_from, date_to)
+        return r and f"{status or 'ANY'}:{r[0].isoformat()}:{r[1].isoformat()}"
+
+    # ---- freshness ----
+
+    def _state(self, k):
+        """(fetched_at, attempted_at, failures) of range `k`."""
+        with db.SessionLocal() as s:
+            row = s.get(SyncRange, k) if k else None
+            return (_aware(row.fetched_at), _aware(row.attempted_at), row.failures or 0) if row else (None, None, 0)
+
+    def age(self, date_from, date_to, status):
+        """Seconds since the range was last refreshed successfully (None = never)."""
+        fetched = self._state(self.key(date_from, date_to, status))[0]
+        return (datetime.now(timezone.utc) - fetched).total_seconds() if fetched else None
+
+    def _fresh(self, state, status, max_age=None):
+        limit = self.max_age.get(status, self.max_age[None]) if max_age is None else max_age
+        fetched = state[0]
+        return fetched is not None and (datetime.now(timezone.utc) - fetched).total_seconds() < limit
+
+    def is_fresh(self, date_from, date_to, status, max_age=None):
+        k = self.key(date_from, date_to, status)
+        return k is None or self._fresh(self._state(k), status, max_age)
+
+    def retry_at(self, state):
+        """Earliest time range with `state` may be fetched again: cooldown, doubled per failure."""
+        _, attempted, failures = state
+        if attempted is None:
+            return None
+        wait = min(self.retry_cooldown * 2 ** max(failures - 1, 0), self.max_backoff)
+        return attempted + timedelta(seconds=wait)
+
+    def ensure_fresh(self, date_from, date_to, status, max_age=None):
+        """
+        Never blocks. Returns True if the range is fresh (or outside the synced horizon);
+        otherwise schedules (or joins) a background refresh unless the range is cooling
+        down after its last attempt, and returns False.
+        """
+        k = self.key(date_from, date_to, status)
+        if k is None:
+            return True
+        state = self._state(k)
+        if self._fresh(state, status, max_age):
+            return True
+        self.refresh_async(date_from, date_to, status, state=state)
+        return False
+
+    # ---- refresh ----
+
+    def refresh_async(self, date_from, date_to, status, state=None):
+        """
+        Start a refresh unless one for the same range is already running; returns its Future.
+        A range still cooling down (`retry_at`) gets an already-done Future reporting `skipped`.
+        """
+        k = self.key(date_from, date_to, status)
+        if k is None:
+            return _done({"range": None, "ok": False, "skipped": "outside horizon"})
+        retry_at = self.retry_at(state or self._state(k))
+        if retry_at and datetime.now(timezone.utc) < retry_at:
+            return _done({"range": k, "ok": False, "skipped": f"cooling down until {retry_at.isoformat()}"})
+        d_from, d_to = span(date_from, date_to)
+        with self._lock:
+            fut = self._inflight.get(k)
+            if fut is None:
+                fut = self._pool.submit(self._refresh, k, d_from, d_to, status)
+                self._inflight[k] = fut
+                fut.add_done_callback(lambda _f, k=k: self._forget(k))
+            return fut
+
+    def refresh(self, date_from, date_to, status, timeout=None):
+        """Blocking refresh (single-flight with any concurrent caller). Used by jobs and tests."""
+        return self.refresh_async(date_from, date_to, status).result(timeout)
+
+    def _forget(self, k):
+        with self._lock:
+            self._inflight.pop(k, None)
+
+    def _refresh(self, k, d_from, d_to, status):
+        now = datetime.now(timezone.utc)
+        try:
+            with self._lock:
+                self.upstream_calls += 1
+            items = self.fetch(d_from.isoformat(), d_to.isoformat(), status)
+            report = self.ingest(items, status)
+            self._record(k, d_from, d_to, status, now, fetched=True, n=len(items))
+            return {"range": k, "ok": True, "matches": len(items), "ingest": report}
+        except Exception as e:   # keep serving what the table has
+            log.warning("match sync %s failed: %s", k, e)
+            self._record(k, d_from, d_to, status, now, fetched=False, error=str(e)[:500])
+            return {"range": k, "ok": False, "error": str(e)}
+
+    def _record(self, k, d_from, d_to, status, now, fetched, n=None, error=None):
+        with db.SessionLocal() as s:
+            row = s.get(SyncRange, k) or SyncRange(range_key=k, date_from=d_from, date_to=d_to, status=status)
+            row.attempted_at = now
+            if fetched:
+                row.fetched_at, row.matches, row.last_error, row.failures = now, n, None, 0
+            else:
+                row.last_error, row.failures = error, (row.failures or 0) + 1
+            s.add(row)
+            s.commit()
+
+    def wait(self, timeout=None):
+        """Block until every in-flight refresh finished (tests / shutdown)."""
+        with self._lock:
+            futs = list(self._inflight.values())
+        for f in futs:
+            f.result(timeout)
+
+    def status(self):
+        with db.SessionLocal() as s:
+            rows = s.query(SyncRange).order_by(SyncRange.date_from.desc()).limit(50).all()
+        out = []
+        for r in rows:
+            retry_at = self.retry_at((None, _aware(r.attempted_at), r.failures or 0))
+            out.append({"range": r.range_key, "fetched_at": r.fetched_at and r.fetched_at.isoformat(),
+                        "matches": r.matches, "last_error": r.last_error, "failures": r.failures or 0,
+                        "retry_at": retry_at and retry_at.isoformat()})
+        return out
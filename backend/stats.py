@@ -0,0 +1,49 @@
+# backend/stats.py
+"""
+Per-window prediction stats (outcome split + exact-score histogram) for a group.
+
+One grouped query over matches ⟕ predictions yields a (match, home_pred, away_pred)
+histogram; outcomes are folded from it in Python. Once the window has closed the
+picks can no longer change, so results are cached per (group_id, week_start)
+until the week is over.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from .cache import stats_cache
+
+STATS_SQL = text("""
+  select m.match_id, m.home, m.away, p.home_pred, p.away_pred, count(p.id) as c
+  from matches m
+  left join predictions p on p.match_id = m.match_id and p.group_id = :g
+  where m.date between :a and :b
+  group by m.match_id, m.home, m.away, p.home_pred, p.away_pred
+  order by m.match_id
+""")
+
+
+def compute_stats(s, group_id: int, start: date, end: date):
+    by_match = {}
+    for mid, home, away, hp, ap, c in s.execute(STATS_SQL, {"g": group_id, "a": start, "b": end}):
+        m = by_match.setdefault(mid, {"match_id": mid, "home": home, "away": away,
+                                      "outcomes": {"home": 0, "draw": 0, "away": 0}, "scores": []})
+        if hp is None:          # left-join row for a match nobody picked
+            continue
+        m["outcomes"]["home" if hp > ap else "draw" if hp == ap else "away"] += c
+        m["scores"].append({"score": f"{hp}-{ap}", "count": c})
+    for m in by_match.values():
+        m["scores"].sort(key=lambda x: (-x["count"], x["score"]))
+    return {"week_start": start.isoformat(), "matches": list(by_match.values())}
+
+
+def closed_window_stats(s, group_id: int, start: date, end: date):
+    """Stats for a window that has already closed, served from cache until the week ends."""
+    key = (group_id, start)
+    out = stats_cache.get(key)
+    if out is None:
+        out = compute_stats(s, group_id, start, end)
+        week_over = datetime.combine(end + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        ttl = max((week_over - datetime.now(timezone.utc)).total_seconds(), 60)
+        stats_cache.set(key, out, ttl=ttl)
+    return out
@@ -0,0 +1,120 @@
+# backend/tasks/live.py
+"""
+Match-day polling. The scheduler asks `LivePoller.tick()` what to do next:
+
+- fixtures from PRE_KICKOFF before kickoff until they finish (or MAX_MATCH_LENGTH after
+  kickoff, whichever is first) count as live;
+- while any are live, one upstream call covers all of their dates, its items go through
+  the normal ingest path (upsert + incremental scoring), and the next poll is due after
+  `poll_interval(...)`: shorter the more fixtures are running, never faster than the
+  share of the upstream rate budget reserved for live polling;
+- with nothing live, it sleeps until shortly before the next kickoff (re-checking at
+  least every IDLE_RECHECK, since fixture syncs can move kickoffs).
+
+`fetch(date_from, date_to)` and `ingest(items)` are injected like services.sync.MatchSync.
+
+In-play items carry the score so far; ingest stores scores only once a match is final, so
+nothing is scored or listed as a result before full time.
+
+The scheduler runs `run_live_poll` as the `live_poll` job (backend.jobs), so only one process
+polls at a time, and a process that takes the lease before the last poll's `next_in` has
+elapsed waits for it instead of polling again.
+"""
+import json, math, os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, func
+
+from .. import db
+from ..models import Match, JobRun
+
+FINISHED = ("FINISHED", "FT", "AET", "PEN", "AWARDED", "POSTPONED", "CANCELLED", "CANCELED", "SUSPENDED")
+PRE_KICKOFF = timedelta(minutes=int(os.getenv("LIVE_PRE_KICKOFF_MINUTES", 10)))
+MAX_MATCH_LENGTH = timedelta(minutes=150)         # 90' + half time + stoppage/extra time
+MIN_INTERVAL = int(os.getenv("LIVE_POLL_MIN_SECONDS", 20))
+MAX_INTERVAL = int(os.getenv("LIVE_POLL_MAX_SECONDS", 60))   # keeps results within a minute of full time
+IDLE_RECHECK = timedelta(minutes=15)
+BUDGET_SHARE = float(os.getenv("LIVE_POLL_BUDGET_SHARE", 0.5))   # of FD_REQUESTS_PER_MINUTE
+
+
+def _aware(dt):
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def poll_interval(live: int, calls_per_poll: int = 1, per_minute: int | None = None) -> int:
+    """Seconds until the next poll: MAX_INTERVAL for one fixture, shrinking as more run, within budget."""
+    per_minute = per_minute or int(os.getenv("FD_REQUESTS_PER_MINUTE", 10))
+    wanted = MAX_INTERVAL / (1 + (max(live, 1) - 1) / 3)
+    floor = 60 * calls_per_poll / max(per_minute * BUDGET_SHARE, 1e-9)
+    return int(round(max(MIN_INTERVAL, wanted, floor)))
+
+
+class LivePoller:
+    def __init__(self, fetch, ingest, per_minute: int | None = None):
+        self.fetch = fetch
+        self.ingest = ingest
+        self.per_minute = per_minute
+        self.polls = 0
+
+    def live_matches(self, s, now):
+        """(match_id, utc_kickoff) of fixtures in the live window around `now`."""
+        rows = s.execute(
+            select(Match.match_id, Match.utc_kickoff)
+            .where(Match.utc_kickoff >= now - MAX_MATCH_LENGTH,
+                   Match.utc_kickoff <= now + PRE_KICKOFF,
+                   func.coalesce(Match.status, "SCHEDULED").not_in(FINISHED))
+        ).all()
+        return [(mid, _aware(k)) for mid, k in rows]
+
+    def next_kickoff(self, s, now):
+        k = s.execute(select(func.min(Match.utc_kickoff))
+                      .where(Match.utc_kickoff > now + PRE_KICKOFF,
+                             func.coalesce(Match.status, "SCHEDULED").not_in(FINISHED))).scalar()
+        if k is None:
+            return None
+        return _aware(k if isinstance(k, datetime) else datetime.fromisoformat(str(k)))
+
+    def tick(self, now: datetime | None = None) -> dict:
+        """Poll if anything is live. Returns a report with `next_in` (seconds until the next tick)."""
+        now = now or datetime.now(timezone.utc)
+        with db.SessionLocal() as s:
+            live = self.live_matches(s, now)
+            if not live:
+                nxt = self.next_kickoff(s, now)
+                wake = min(nxt - PRE_KICKOFF, now + IDLE_RECHECK) if nxt else now + IDLE_RECHECK
+                return {"live": 0, "next_in": max(MIN_INTERVAL, int((wake - now).total_seconds()))}
+
+        days = sorted({k.date() for _, k in live})
+        items = self.fetch(days[0].isoformat(), days[-1].isoformat())
+        report = self.ingest(items)
+        self.polls += 1
+        return {"live": len(live), "dates": [days[0].isoformat(), days[-1].isoformat()],
+                "ingest": report, "next_in": poll_interval(len(live), 1, self.per_minute)}
+
+
+LAST_POLL_Q = (select(JobRun.finished_at, JobRun.result)
+               .where(JobRun.name == "live_poll", JobRun.status == "succeeded")
+               .order_by(JobRun.created_at.desc()).limit(1))
+
+_poller = None
+
+def _default_poller() -> LivePoller:
+    global _poller
+    if _poller is None:
+        from ..config import get_config
+        from ..ingest import ingest_matches
+        from ..services.football_data import fetch_matches
+        cfg = get_config()
+        _poller = LivePoller(fetch=lambda a, b: fetch_matches(cfg.pl_code, cfg.fd_token, a, b, None),
+                             ingest=lambda items: ingest_matches(items, cfg.season_label))
+    return _poller
+
+def run_live_poll(now: datetime | None = None, poller: LivePoller | None = None) -> dict:
+    """Body of the `live_poll` job: one tick, unless the last recorded poll's next one isn't due yet."""
+    now = now or datetime.now(timezone.utc)
+    with db.SessionLocal() as s:
+        last = s.execute(LAST_POLL_Q).first()
+    if last and last.finished_at and last.result:
+        due = _aware(last.finished_at) + timedelta(seconds=json.loads(last.result)["next_in"])
+        if due > now:
+            return {"live": 0, "deferred": True, "next_in": math.ceil((due - now).total_seconds())}
+    return (poller or _default_poller()).tick(now)
@@ -0,0 +1,65 @@
+# backend/versions.py
+"""
+Data versions for HTTP validators (see http_cache.py). Each is one cheap lookup that
+changes whenever the data behind a response does:
+
+- matches: max(matches.updated_at), an index seek on ix_matches_updated; every ingest
+  write stamps updated_at.
+- scores:<group_id>: a counter in data_versions, bumped in the same transaction as the
+  weekly_scores, membership and username writes a group leaderboard depends on.
+- members:<group_id>: a counter bumped with every group_members write of that group, so
+  processes that cached a membership row (authz.py) notice it changed.
+- picks:<group_id>:<user_id>: a counter bumped with every prediction upsert of that member
+  (updated_at alone is CURRENT_TIMESTAMP, one-second resolution on SQLite).
+"""
+from datetime import datetime, timezone
+from sqlalchemy import text, bindparam
+
+BUMP_SQL = text("""
+  insert into data_versions (key, version, updated_at) values (:k, 1, :ts)
+  on conflict (key) do update set version = data_versions.version + 1, updated_at = excluded.updated_at
+""")
+
+GET_SQL = text("select key, version from data_versions where key in :keys").bindparams(
+    bindparam("keys", expanding=True))
+
+MATCHES_VERSION_SQL = text("select max(updated_at) from matches")
+
+
+def scores_key(group_id) -> str:
+    return f"scores:{int(group_id)}"
+
+def members_key(group_id) -> str:
+    return f"members:{int(group_id)}"
+
+def picks_key(group_id, user_id) -> str:
+    return f"picks:{int(group_id)}:{int(user_id)}"
+
+
+def bump(s, keys):
+    """Bump `keys` inside the caller's transaction (sorted, so concurrent writers lock in one order)."""
+    keys = sorted(set(keys))
+    if keys:
+        now = datetime.now(timezone.utc)
+        s.execute(BUMP_SQL, [{"k": k, "ts": now} for k in keys])
+
+def bump_scores(s, group_ids):
+    bump(s, [scores_key(g) for g in group_ids])
+
+def bump_members(s, group_ids):
+    bump(s, [members_key(g) for g in group_ids])
+
+def bump_user_groups(s, user_id):
+    """Bump every group `user_id` is an approved member of (their name shows on its leaderboard)."""
+    bump_scores(s, [g for (g,) in s.execute(text(
+        "select group_id from group_members where user_id=:u and status='approved'"), {"u": user_id})])
+
+
+def get(s, keys) -> tuple:
+    """Current versions of `keys`, in order; 0 for a key never bumped."""
+    keys = list(keys)
+    found = dict(s.execute(GET_SQL, {"keys": keys}).all()) if keys else {}
+    return tuple(found.get(k, 0) for k in keys)
+
+def matches_version(s) -> str:
+    return str(s.execute(MATCHES_VERSION_SQL).scalar())
@@ -0,0 +1,76 @@
+"""
+Group page load: eight separate requests vs one /groups/<id>/dashboard call.
+
+    python -m bench.bench_dashboard --members 200
+
+Uses Flask's test client against a throwaway SQLite file, so it measures server-side
+work per page load (sessions, membership checks, queries, serialization), not network.
+"""
+import argparse, os, random, statistics, tempfile, time
+from datetime import date, datetime, timedelta, timezone
+
+FANOUT = ["/groups/{g}", "/groups/{g}/predictions/window", "/groups/{g}/predictions/matches",
+          "/groups/{g}/predictions/others", "/groups/{g}/predictions/stats", "/groups/{g}/leaderboard",
+          "/groups/{g}/leaderboard/highlights", "/api/upcoming"]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--members", type=int, default=200)
+    ap.add_argument("--matches", type=int, default=10)
+    ap.add_argument("--reps", type=int, default=30)
+    args = ap.parse_args()
+
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="epl-bench-"), "bench.db")
+    os.environ["SESSION_COOKIE_SECURE"] = "0"
+    from sqlalchemy import text
+    from backend import create_app, db
+    from backend.routes.predictions import windows
+
+    app = create_app()
+    client = app.test_client()
+    client.post("/auth/register", json={"email": "me@bench", "password": "password123"})
+    client.post("/auth/login", json={"email": "me@bench", "password": "password123"})
+    gid = client.post("/groups", json={"name": "bench"}).json["group_id"]
+
+    rnd, now = random.Random(5), datetime.now(timezone.utc)
+    (cur_s, _), _ = windows(date.today())
+    with db.engine.begin() as c:
+        c.execute(text("insert into users (id,email,password_hash,created_at) values (:id,:e,'x',:t)"),
+                  [{"id": 1000 + u, "e": f"u{u}@bench", "t": now} for u in range(args.members)])
+        c.execute(text("insert into group_members (group_id,user_id,status,is_admin) values (:g,:u,'approved',0)"),
+                  [{"g": gid, "u": 1000 + u} for u in range(args.members)])
+        c.execute(text("insert into matches (match_id,status,competition,season,home,away,utc_kickoff,local_kickoff,"
+                       "date,time,updated_at) values (:id,'SCHEDULED','Premier League','2025/26',:h,:a,:k,:k,:d,'15:00',:k)"),
+                  [{"id": i, "h": f"H{i}", "a": f"A{i}", "k": now + timedelta(days=1), "d": cur_s + timedelta(days=i % 7)}
+                   for i in range(args.matches)])
+        c.execute(text("insert into predictions (group_id,user_id,match_id,home_pred,away_pred,created_at,updated_at) "
+                       "values (:g,:u,:m,:hp,:ap,:t,:t)"),
+                  [{"g": gid, "u": 1000 + u, "m": m, "hp": rnd.randint(0, 3), "ap": rnd.randint(0, 3), "t": now}
+                   for u in range(args.members) for m in range(args.matches)])
+        c.execute(text("insert into weekly_scores (group_id,user_id,week_start,points,updated_at) values (:g,:u,:w,:p,:t)"),
+                  [{"g": gid, "u": 1000 + u, "w": cur_s - timedelta(days=7 * k), "p": rnd.randint(0, 20), "t": now}
+                   for u in range(args.members) for k in range(1, 6)])
+
+    def fanout():
+        for path in FANOUT:
+            client.get(path.format(g=gid))
+
+    def combined():
+        client.get(f"/groups/{gid}/dashboard")
+
+    def timed(fn):
+        fn()  # warm
+        out = []
+        for _ in range(args.reps):
+            t0 = time.perf_counter(); fn(); out.append((time.perf_counter() - t0) * 1000)
+        return statistics.median(out)
+
+    f, d = timed(fanout), timed(combined)
+    print(f"{args.members} members, {args.matches} matches (median of {args.reps} page loads)")
+    print(f"fan-out ({len(FANOUT)} requests)    : {f:7.2f} ms")
+    print(f"dashboard (1 request)   : {d:7.2f} ms   ({f / d:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+SSE under load, on the production server: N open /groups/<id>/events streams on gunicorn
+(gunicorn.conf.py, once per SERVER_MODE), then JSON API latency and event fan-out.
+
+    python -m bench.bench_events --modes gevent --workers 2 --subscribers 1000 --events 10
+    python -m bench.bench_events --modes gthread,gevent --workers 1 --subscribers 200
+
+The streams spread over `--workers` processes (WEB_CONCURRENCY) as the kernel hands out
+connections, and each pick is saved through whichever worker takes the POST. Every
+subscriber only gets every event if the broker (`--broker`, EVENTS_BROKER) crosses
+processes. With `--broker local` and more than one worker, each event reaches only the
+streams on the worker that saved it. For each mode it
+  1. opens `--subscribers` streams (each gives up after --connect-timeout),
+  2. times `--probes` GET /groups/mine requests while they stay open; on gthread a stream
+     holds one of WEB_THREADS threads for up to EVENTS_MAX_SECONDS, so once the streams
+     outnumber the threads the JSON API queues behind them,
+  3. saves `--events` picks (each publishes a `predictions` event) and reports how long
+     each takes to reach every subscriber.
+"""
+import argparse, http.client, json, os, signal, subprocess, sys, tempfile, threading, time
+
+from bench.bench_serving import _seed, _wait_up
+
+
+def _pct(xs, q):
+    return xs[max(0, int(len(xs) * q) - 1)] if xs else float("nan")
+
+
+def run_mode(mode, port, args, env):
+    import requests
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "wsgi:app", "-c", "gunicorn.conf.py",
+                             "--log-level", "warning"],
+                            env={**env, "SERVER_MODE": mode, "PORT": str(port)},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        _wait_up(port)
+        base = f"http://127.0.0.1:{port}"
+        http_s = requests.Session()
+        email = f"{mode}@bench"
+        http_s.post(f"{base}/auth/register", json={"email": email, "password": "password123"})
+        http_s.post(f"{base}/auth/login", json={"email": email, "password": "password123"})
+        gid = http_s.post(f"{base}/groups", json={"name": f"bench-{mode}"}).json()["group_id"]
+        cookie = "; ".join(f"{k}={v}" for k, v in http_s.cookies.items())
+
+        received = [[] for _ in range(args.events)]   # per event: arrival timestamps
+        lock = threading.Lock()
+        connected, failed = threading.Semaphore(0), []
+
+        def subscriber():
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=args.connect_timeout)
+                conn.request("GET", f"/groups/{gid}/events", headers={"Cookie": cookie})
+                resp = conn.getresponse()
+                assert resp.status == 200, resp.status
+                resp.fp.readline(); resp.fp.readline()        # retry: hint
+                conn.sock.settimeout(args.events * args.interval + 30)
+            except Exception as e:
+                failed.append(repr(e))
+                connected.release()
+                return
+            connected.release()
+            got = 0
+            try:
+                while got < args.events:
+                    line = resp.fp.readline()
+                    if not line:
+                        break
+                    if line.startswith(b"data: "):
+                        n = json.loads(line[6:])["predictions"][0]["home_pred"]
+                        with lock:
+                            received[n].append(time.perf_counter())
+                        got += 1
+            except OSError:
+                pass
+            conn.close()
+
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=subscriber, daemon=True) for _ in range(args.subscribers)]
+        for t in threads:
+            t.start()
+        for _ in threads:
+            connected.acquire()
+        open_streams = args.subscribers - len(failed)
+        print(f"{mode:8s} {open_streams}/{args.subscribers} streams open after "
+              f"{time.perf_counter() - t0:.1f}s ({len(failed)} gave up)")
+
+        lat, errors = [], 0
+        for _ in range(args.probes):
+            t1 = time.perf_counter()
+            try:
+                ok = http_s.get(f"{base}/groups/mine", timeout=args.probe_timeout).ok
+            except requests.RequestException:
+                ok = False
+            if ok:
+                lat.append((time.perf_counter() - t1) * 1000)
+            else:
+                errors += 1
+        lat.sort()
+        print(f"{'':8s} GET /groups/mine with streams open: p50={_pct(lat, 0.5):.1f}ms "
+              f"p99={_pct(lat, 0.99):.1f}ms  timed out {errors}/{args.probes}")
+
+        sent = []
+        for n in range(args.events):
+            sent.append(time.perf_counter())
+            try:
+                http_s.post(f"{base}/groups/{gid}/predictions?allow_early=1",
+                            json={"predictions": [{"match_id": 1, "home_pred": n, "away_pred": 0}]},
+                            timeout=args.probe_timeout)
+            except requests.RequestException:
+                pass                                          # counted as undelivered below
+            time.sleep(args.interval)
+        deadline = time.monotonic() + 5          # streams still waiting then won't get the rest
+        for t in threads:
+            t.join(timeout=max(0, deadline - time.monotonic()))
+
+        per = [(ts - sent[n]) * 1000 for n in range(args.events) for ts in received[n]]
+        full = [(max(received[n]) - sent[n]) * 1000 for n in range(args.events) if received[n]]
+        per.sort()
+        print(f"{'':8s} delivered {len(per)}/{open_streams * args.events} events  "
+              f"p50={_pct(per, 0.5):.1f}ms p99={_pct(per, 0.99):.1f}ms  "
+              f"all subscribers max={max(full) if full else float('nan'):.1f}ms")
+    finally:
+        proc.send_signal(signal.SIGINT)     # quick shutdown; open streams would hold a graceful one
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)     # master and workers
+            proc.wait()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modes", default="gthread,gevent")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--broker", choices=("db", "local"), default="db")
+    ap.add_argument("--subscribers", type=int, default=1000)
+    ap.add_argument("--events", type=int, default=10)
+    ap.add_argument("--interval", type=float, default=0.5)
+    ap.add_argument("--probes", type=int, default=20)
+    ap.add_argument("--probe-timeout", type=float, default=5)
+    ap.add_argument("--connect-timeout", type=float, default=10)
+    ap.add_argument("--port", type=int, default=8775)
+    args = ap.parse_args()
+
+    db_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="epl-bench-"), "bench.db")
+    _seed(db_url, 5)
+    env = {**os.environ, "DATABASE_URL": db_url, "WEB_CONCURRENCY": str(args.workers), "SESSION_COOKIE_SECURE": "0",
+           "ENABLE_SCHEDULER": "0", "EVENTS_MAX_SECONDS": "600", "EVENTS_BROKER": args.broker}
+
+    print(f"{args.subscribers} SSE subscribers, {args.workers} worker(s), EVENTS_BROKER={args.broker}, "
+          f"WEB_THREADS={env.get('WEB_THREADS', 32)} for gthread")
+    for i, mode in enumerate(m.strip() for m in args.modes.split(",")):
+        run_mode(mode, args.port + i, args, env)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Weekly scoring benchmark: per-group recompute_week loop vs recompute_week_all.
+
+    python -m bench.bench_scoring --groups 10000 --members 20
+
+Runs against a throwaway SQLite file unless DATABASE_URL is given with --db.
+The per-group loop is timed on a sample of groups and extrapolated, because
+running it over 10k groups takes far longer than the set-based pass.
+"""
+import argparse, os, random, tempfile, time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+WEEK = date(2025, 8, 14)
+
+
+def _seed(db, n_groups, n_members, n_matches, seed=7):
+    rnd = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with db.engine.begin() as c:
+        c.execute(text("""
+          insert into matches (match_id,status,competition,season,home,away,utc_kickoff,local_kickoff,
+                               date,time,home_score,away_score,updated_at)
+          values (:id,'FINISHED','Premier League','2025/26',:h,:a,:k,:k,:d,'15:00',:hs,:as,:k)
+        """), [{"id": i, "h": f"H{i}", "a": f"A{i}", "k": now, "d": WEEK + timedelta(days=2 + i % 5),
+                "hs": rnd.randint(0, 3), "as": rnd.randint(0, 3)} for i in range(n_matches)])
+        c.execute(text("insert into users (id,email,password_hash,created_at) values (:id,:e,'x',:t)"),
+                  [{"id": u, "e": f"u{u}@bench", "t": now} for u in range(1, n_groups * n_members + 1)])
+        c.execute(text("insert into groups (id,name,owner_id,invite_code,is_public,join_policy,created_at) "
+                       "values (:id,:n,1,:c,0,'invite_only',:t)"),
+                  [{"id": g, "n": f"g{g}", "c": f"c{g}", "t": now} for g in range(1, n_groups + 1)])
+        batch = []
+        for g in range(1, n_groups + 1):
+            for k in range(n_members):
+                u = (g - 1) * n_members + k + 1
+                for m in range(n_matches):
+                    batch.append({"g": g, "u": u, "m": m, "hp": rnd.randint(0, 3), "ap": rnd.randint(0, 3), "t": now})
+            if len(batch) > 50_000:
+                c.execute(text("insert into predictions (group_id,user_id,match_id,home_pred,away_pred,created_at,updated_at) "
+                               "values (:g,:u,:m,:hp,:ap,:t,:t)"), batch)
+                batch = []
+        if batch:
+            c.execute(text("insert into predictions (group_id,user_id,match_id,home_pred,away_pred,created_at,updated_at) "
+                           "values (:g,:u,:m,:hp,:ap,:t,:t)"), batch)
+        c.execute(text("create unique index if not exists uq_weekly_score on weekly_scores (group_id,user_id,week_start)"))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--groups", type=int, default=10_000)
+    ap.add_argument("--members", type=int, default=20)
+    ap.add_argument("--matches", type=int, default=10)
+    ap.add_argument("--sample", type=int, default=50, help="groups to time with the per-group loop")
+    ap.add_argument("--db", default=None)
+    args = ap.parse_args()
+
+    url = args.db or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="epl-bench-"), "bench.db")
+    from backend import db
+    from backend.db import init_db, Base
+    from backend import models  # noqa: F401  (register tables)
+    from backend.scoring import recompute_week, recompute_week_all
+
+    init_db(url)
+    Base.metadata.create_all(db.engine)
+    t0 = time.perf_counter()
+    _seed(db, args.groups, args.members, args.matches)
+    print(f"seeded {args.groups} groups x {args.members} members x {args.matches} matches "
+          f"in {time.perf_counter() - t0:.1f}s")
+
+    with db.engine.begin() as c:
+        c.execute(text("delete from weekly_scores"))
+    sample = min(args.sample, args.groups)
+    t0 = time.perf_counter()
+    for g in range(1, sample + 1):
+        recompute_week(g, WEEK)
+    loop_s = (time.perf_counter() - t0) / sample * args.groups
+    with db.engine.begin() as c:
+        legacy = dict(((g, u), p) for g, u, p in c.execute(text("select group_id,user_id,points from weekly_scores")))
+        c.execute(text("delete from weekly_scores"))
+
+    t0 = time.perf_counter()
+    out = recompute_week_all(WEEK)
+    bulk_s = time.perf_counter() - t0
+    with db.engine.begin() as c:
+        bulk = dict(((g, u), p) for g, u, p in c.execute(text(
+            "select group_id,user_id,points from weekly_scores where group_id <= :n"), {"n": sample}))
+
+    assert bulk == legacy, "bulk totals differ from recompute_week"
+    print(f"per-group loop : {loop_s:8.2f}s (extrapolated from {sample} groups)")
+    print(f"bulk           : {bulk_s:8.2f}s ({out['rows']} rows)")
+    print(f"speedup        : {loop_s / bulk_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Serving modes under load: requests/sec and latency for sync vs gthread (vs gevent) workers.
+
+    python -m bench.bench_serving --modes sync,gthread --clients 32 --seconds 10 --slow 4
+
+Starts gunicorn with gunicorn.conf.py once per SERVER_MODE against the same seeded SQLite
+file, then runs `--clients` keep-alive client threads against `--path` for `--seconds`.
+`--slow` extra clients each open a connection and then trickle their request, the way a
+slow mobile client or an idle keep-alive socket does; on sync workers each of them pins a
+whole worker process.
+"""
+import argparse, os, socket, subprocess, sys, tempfile, threading, time
+from datetime import datetime, timedelta, timezone
+
+
+def _seed(db_url, matches):
+    os.environ["DATABASE_URL"] = db_url
+    from sqlalchemy import text
+    from backend import create_app, db
+    create_app()
+    now = datetime.now(timezone.utc)
+    with db.engine.begin() as c:
+        c.execute(text("""
+          insert into matches (match_id,status,competition,season,home,away,utc_kickoff,local_kickoff,date,time,updated_at)
+          values (:id,'SCHEDULED','Premier League','2025/26',:h,:a,:k,:k,:d,'20:00',:k)"""),
+          [{"id": i, "h": f"H{i}", "a": f"A{i}", "k": now + timedelta(hours=i),
+            "d": (now + timedelta(hours=i)).date()} for i in range(1, matches + 1)])
+
+
+def _wait_up(port, timeout=20):
+    import requests
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/api/health", timeout=1).ok:
+                return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not come up")
+
+
+def _slow_client(port, stop):
+    s = socket.create_connection(("127.0.0.1", port))
+    s.sendall(b"GET /api/health HTTP/1.1\r\nHost: x\r\n")
+    while not stop.is_set():          # never finish the headers
+        s.sendall(b"X-a: b\r\n")
+        stop.wait(1)
+    s.close()
+
+
+def run_mode(mode, port, args, env):
+    import requests
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "wsgi:app", "-c", "gunicorn.conf.py",
+                             "--log-level", "warning"],
+                            env={**env, "SERVER_MODE": mode, "PORT": str(port)},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_up(port)
+        stop = threading.Event()
+        slow = [threading.Thread(target=_slow_client, args=(port, stop), daemon=True) for _ in range(args.slow)]
+        for t in slow:
+            t.start()
+        time.sleep(0.5)
+
+        lat, errors, lock = [], [0], threading.Lock()
+        deadline = time.monotonic() + args.seconds
+
+        def client():
+            http_s = requests.Session()
+            mine = []
+            while time.monotonic() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    ok = http_s.get(f"http://127.0.0.1:{port}{args.path}", timeout=args.seconds).ok
+                except Exception:
+                    ok = False
+                if ok:
+                    mine.append((time.perf_counter() - t0) * 1000)
+                else:
+                    with lock:
+                        errors[0] += 1
+            with lock:
+                lat.extend(mine)
+
+        workers = [threading.Thread(target=client) for _ in range(args.clients)]
+        t0 = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        stop.set()
+
+        lat.sort()
+        p = lambda q: lat[max(0, int(len(lat) * q) - 1)] if lat else float("nan")
+        print(f"{mode:8s} {len(lat) / elapsed:8.1f} req/s   p50={p(0.5):7.1f}ms  p99={p(0.99):7.1f}ms  "
+              f"errors={errors[0]}")
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modes", default="sync,gthread")
+    ap.add_argument("--clients", type=int, default=32)
+    ap.add_argument("--slow", type=int, default=0)
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--path", default="/api/upcoming")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    db_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="epl-bench-"), "bench.db")
+    _seed(db_url, 50)
+    env = {**os.environ, "DATABASE_URL": db_url, "WEB_CONCURRENCY": str(args.workers),
+           "SESSION_COOKIE_SECURE": "0", "ENABLE_SCHEDULER": "0"}
+
+    print(f"{args.clients} clients + {args.slow} slow clients, {args.workers} workers, "
+          f"{args.seconds:.0f}s on {args.path}")
+    for i, mode in enumerate(m.strip() for m in args.modes.split(",")):
+        run_mode(mode, args.port + i, args, env)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Cold-start cost of the web app: process start to a ready `create_app()`.
+
+    python -m bench.bench_startup --runs 10 --top 15
+
+Each run is a fresh interpreter against the same (already migrated) SQLite file, so it
+measures what a gunicorn worker restart pays. Also prints the slowest imports from
+`python -X importtime` and how long a full schema `migrate()` pass would add.
+"""
+import argparse, os, statistics, subprocess, sys, tempfile
+
+PROBE = """
+import time
+t0 = time.perf_counter()
+from backend import create_app
+t1 = time.perf_counter()
+create_app()
+t2 = time.perf_counter()
+from backend import db
+from backend.migrations import migrate
+t3 = time.perf_counter()
+migrate(db.engine)
+t4 = time.perf_counter()
+print(f"{(t1 - t0) * 1000:.1f} {(t2 - t1) * 1000:.1f} {(t4 - t3) * 1000:.1f}")
+"""
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--top", type=int, default=15)
+    args = ap.parse_args()
+
+    env = {**os.environ, "SESSION_COOKIE_SECURE": "0",
+           "DATABASE_URL": "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="epl-bench-"), "bench.db")}
+    subprocess.run([sys.executable, "-c", "from backend import create_app; create_app()"], env=env, check=True)
+
+    imports, boots, migrates = [], [], []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], env=env, check=True,
+                             capture_output=True, text=True).stdout.split()
+        imports.append(float(out[0])); boots.append(float(out[1])); migrates.append(float(out[2]))
+    print(f"{args.runs} cold starts (median): import backend {statistics.median(imports):.1f}ms, "
+          f"create_app {statistics.median(boots):.1f}ms; a full migrate() pass would add "
+          f"{statistics.median(migrates):.1f}ms")
+
+    prof = subprocess.run([sys.executable, "-X", "importtime", "-c", "from backend import create_app; create_app()"],
+                          env=env, check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in prof.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cum_us), int(self_us), name.rstrip()))
+    print("\nslowest imports (cumulative ms, self ms):")
+    for cum, own, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"  {cum / 1000:8.1f} {own / 1000:8.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
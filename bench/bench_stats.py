@@ -0,0 +1,90 @@
+"""
+Prediction stats benchmark: the old three-query version vs stats.compute_stats vs a cache hit.
+
+    python -m bench.bench_stats --members 500
+
+The old score query used concat(), which SQLite lacks; on SQLite it is run with `||`.
+"""
+import argparse, os, random, statistics, tempfile, time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+START = date(2025, 8, 14)
+END = START + timedelta(days=6)
+
+LEGACY = [
+    """with picks as (
+         select p.match_id,
+                case when p.home_pred > p.away_pred then 'home'
+                     when p.home_pred = p.away_pred then 'draw' else 'away' end as outcome
+         from predictions p join matches m on m.match_id = p.match_id
+         where p.group_id=:g and m.date between :a and :b)
+       select match_id, outcome, count(*) as c from picks group by match_id, outcome order by match_id""",
+    """select p.match_id, {score} as score, count(*) as c
+       from predictions p join matches m on m.match_id = p.match_id
+       where p.group_id=:g and m.date between :a and :b
+       group by p.match_id, score order by p.match_id""",
+    "select match_id, home, away from matches where date between :a and :b",
+]
+
+
+def _time(fn, reps):
+    out = []
+    for _ in range(reps):
+        t0 = time.perf_counter(); fn(); out.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(out)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--members", type=int, default=500)
+    ap.add_argument("--groups", type=int, default=50, help="other groups sharing the tables")
+    ap.add_argument("--matches", type=int, default=10)
+    ap.add_argument("--reps", type=int, default=50)
+    ap.add_argument("--db", default=None)
+    args = ap.parse_args()
+
+    url = args.db or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="epl-bench-"), "bench.db")
+    from backend import db
+    from backend.db import init_db
+    from backend.migrations import migrate
+    from backend.stats import compute_stats, closed_window_stats
+
+    init_db(url); migrate(db.engine)
+    rnd, now = random.Random(3), datetime.now(timezone.utc)
+    with db.engine.begin() as c:
+        c.execute(text("insert into matches (match_id,status,competition,season,home,away,utc_kickoff,local_kickoff,"
+                       "date,time,updated_at) values (:id,'SCHEDULED','Premier League','2025/26',:h,:a,:k,:k,:d,'15:00',:k)"),
+                  [{"id": i, "h": f"H{i}", "a": f"A{i}", "k": now, "d": START + timedelta(days=2 + i % 5)}
+                   for i in range(args.matches)])
+        c.execute(text("insert into predictions (group_id,user_id,match_id,home_pred,away_pred,created_at,updated_at) "
+                       "values (:g,:u,:m,:hp,:ap,:t,:t)"),
+                  [{"g": g, "u": u, "m": m, "hp": rnd.randint(0, 4), "ap": rnd.randint(0, 4), "t": now}
+                   for g in range(1, args.groups + 1) for u in range(args.members) for m in range(args.matches)])
+
+    score = "concat(p.home_pred,'-',p.away_pred)" if db.engine.dialect.name != "sqlite" else "p.home_pred || '-' || p.away_pred"
+    p = {"g": 1, "a": START, "b": END}
+
+    def legacy():
+        with db.SessionLocal() as s:
+            for q in LEGACY:
+                s.execute(text(q.format(score=score)), p).all()
+
+    def single():
+        with db.SessionLocal() as s:
+            compute_stats(s, 1, START, END)
+
+    def cached():
+        with db.SessionLocal() as s:
+            closed_window_stats(s, 1, START, END)
+
+    cached()  # warm
+    print(f"{args.members} members x {args.matches} matches (median of {args.reps})")
+    print(f"three queries : {_time(legacy, args.reps):7.2f} ms")
+    print(f"single pass   : {_time(single, args.reps):7.2f} ms")
+    print(f"cached        : {_time(cached, args.reps):7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
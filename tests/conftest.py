@@ -0,0 +1,73 @@
+import os, tempfile
+from datetime import date, datetime, timezone
+
+# Point the app at a throwaway SQLite file *before* backend is imported
+# (Config reads DATABASE_URL at import time).
+_TMP = tempfile.mkdtemp(prefix="eplpreds-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_TMP, "test.db")
+os.environ.setdefault("SESSION_COOKIE_SECURE", "0")
+# one process serves and writes everything here; DbBroker has its own tests (test_events.py)
+os.environ.setdefault("EVENTS_BROKER", "local")
+
+import pytest
+
+from backend import create_app
+from backend import db
+from backend.cache import clear_all
+from backend.match_calendar import calendar
+from backend.models import Match
+from backend.ranking import global_ranks
+
+
+@pytest.fixture(scope="session")
+def app():
+    app = create_app()
+    app.config.update(TESTING=True)
+    return app
+
+
+@pytest.fixture
+def session(app):
+    """Fresh tables (and empty in-process caches) for every test."""
+    with db.engine.begin() as c:
+        for t in reversed(db.Base.metadata.sorted_tables):
+            c.execute(t.delete())
+    clear_all()
+    global_ranks.wait()     # a refresh started by the previous test
+    global_ranks.reset()
+    calendar.reset()
+    with db.SessionLocal() as s:
+        yield s
+
+
+@pytest.fixture
+def client(app, session):
+    return app.test_client()
+
+
+def login(client, email, password="password123", username=None):
+    """Register (if needed) and log in; returns the user's id."""
+    body = {"email": email, "password": password}
+    if username:
+        body["username"] = username
+    client.post("/auth/register", json=body)
+    assert client.post("/auth/login", json={"email": email, "password": password}).status_code == 200
+    return client.get("/auth/me").json["id"]
+
+
+def match_item(mid, when=date(2025, 8, 16), status="SCHEDULED", score=(None, None)):
+    """A football-data.org match object. `when` is an ISO UTC string, a datetime, or a date (14:00 UTC)."""
+    if isinstance(when, datetime):
+        when = when.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    elif isinstance(when, date):
+        when = f"{when.isoformat()}T14:00:00Z"
+    return {"id": mid, "utcDate": when, "status": status,
+            "homeTeam": {"name": f"H{mid}"}, "awayTeam": {"name": f"A{mid}"},
+            "score": {"fullTime": {"home": score[0], "away": score[1]}}}
+
+
+def match_row(mid, kickoff, d=None, status="SCHEDULED"):
+    """A `matches` row kicking off at `kickoff`; `d` is its local date (the kickoff's date by default)."""
+    return Match(match_id=mid, status=status, season="2025/26", home=f"H{mid}", away=f"A{mid}",
+                 utc_kickoff=kickoff, local_kickoff=kickoff, date=d or kickoff.date(),
+                 time=kickoff.strftime("%H:%M"), updated_at=kickoff)
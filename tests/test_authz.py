@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from backend import db
+from conftest import login
+
+
+@contextmanager
+def count_queries(needle):
+    seen = []
+    def before(conn, cursor, statement, *a):
+        if needle in statement:
+            seen.append(statement)
+    event.listen(db.engine, "before_cursor_execute", before)
+    try:
+        yield seen
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before)
+
+
+def test_one_membership_query_per_request_then_cached(client):
+    login(client, "owner@x")
+    gid = client.post("/groups", json={"name": "G"}).json["group_id"]
+
+    with count_queries("group_members") as q:
+        assert client.get(f"/groups/{gid}").json["is_admin"] is True   # member + admin check
+    assert len(q) == 1
+    with count_queries("group_members") as q:
+        client.get(f"/groups/{gid}")
+    assert q == []
+    with count_queries("from users") as q:
+        client.get("/auth/me")
+    assert q == []
+
+
+def test_membership_changes_take_effect_immediately(app, client):
+    login(client, "owner2@x")
+    gid = client.post("/groups", json={"name": "Private"}).json["group_id"]
+    code = client.get(f"/groups/{gid}").json["invite_code"]
+
+    other = app.test_client()
+    uid = login(other, "joiner@x")
+    assert other.post("/groups/join", json={"code": code}).json["status"] == "pending"
+    assert other.get(f"/groups/{gid}/leaderboard").status_code == 403
+
+    assert client.post(f"/groups/{gid}/requests/{uid}", json={"action": "approve"}).json["ok"]
+    assert other.get(f"/groups/{gid}/leaderboard").status_code == 200
+
+    assert other.post(f"/groups/{gid}/leave").json["ok"]
+    assert other.get(f"/groups/{gid}/leaderboard").status_code == 403
+
+
+def test_revocation_in_another_process_is_seen_on_the_next_request(app, client, session):
+    from sqlalchemy import text
+    from backend import versions
+
+    login(client, "owner3@x")
+    gid = client.post("/groups", json={"name": "Shared"}).json["group_id"]
+    other = app.test_client()
+    uid = login(other, "member3@x")
+    code = client.get(f"/groups/{gid}").json["invite_code"]
+    other.post("/groups/join", json={"code": code})
+    client.post(f"/groups/{gid}/requests/{uid}", json={"action": "approve"})
+    assert other.get(f"/groups/{gid}/leaderboard").status_code == 200     # cached here now
+
+    # what leave/kick does in another worker: write + bump, but this process's cache isn't told
+    session.execute(text("delete from group_members where group_id=:g and user_id=:u"), {"g": gid, "u": uid})
+    versions.bump_members(session, [gid])
+    session.commit()
+    assert other.get(f"/groups/{gid}/leaderboard").status_code == 403
@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+import pytest
+
+from backend.backfill import backfill, plan_ranges
+
+
+def _items(a, b):
+    d, out = date.fromisoformat(a), []
+    while d <= date.fromisoformat(b):
+        out.append({"id": d.toordinal(), "utcDate": f"{d.isoformat()}T06:00:00Z", "status": "SCHEDULED",
+                    "homeTeam": {"name": "H"}, "awayTeam": {"name": "A"}})
+        d += timedelta(days=1)
+    return out
+
+
+def test_plan_ranges_cover_inclusively():
+    r = plan_ranges(date(2025, 8, 1), date(2025, 8, 25), 10)
+    assert r == [(date(2025, 8, 1), date(2025, 8, 10)), (date(2025, 8, 11), date(2025, 8, 20)),
+                 (date(2025, 8, 21), date(2025, 8, 25))]
+
+
+def test_resume_from_checkpoint(session, tmp_path):
+    cp = str(tmp_path / "cp.json")
+    calls = []
+
+    def flaky(date_from=None, date_to=None, season=None):
+        calls.append(date_from)
+        if len(calls) == 2:
+            raise RuntimeError("upstream went away")
+        return _items(date_from, date_to)
+
+    kw = dict(date_from=date(2025, 8, 1), date_to=date(2025, 8, 30), span_days=10,
+              chunk_size=4, checkpoint=cp, log=lambda *_: None)
+    with pytest.raises(RuntimeError):
+        backfill(flaky, **kw)
+
+    report = backfill(flaky, resume=True, **kw)
+    assert calls == ["2025-08-01", "2025-08-11", "2025-08-11", "2025-08-21"]
+    assert report["inserted"] == 30 and report["upstream_calls"] == 2
+    assert report["weeks_scored"] == 5
@@ -0,0 +1,60 @@
+from datetime import date
+
+from backend.cache import TTLCache, leaderboard_cache
+from backend.models import Group, GroupMember
+from backend.scoring import _write_weekly_scores
+from conftest import login
+
+
+def test_ttl_cache_lru_and_expiry():
+    c = TTLCache("t", maxsize=2, ttl=60)
+    c.set("a", 1); c.set("b", 2)
+    assert c.get("a") == 1
+    c.set("c", 3)                      # evicts b (least recently used)
+    assert c.get("b") is None
+    c.set("a", 9, ttl=-1)              # already expired
+    assert c.get("a") is None
+    st = c.stats()
+    assert (st["hits"], st["misses"], st["evictions"]) == (1, 2, 1)
+
+
+def test_leaderboard_cached_and_invalidated_by_scoring(client, session):
+    uid = login(client, "a@x")
+    g = Group(name="g", owner_id=uid, invite_code="lb1")
+    session.add(g); session.flush()
+    session.add(GroupMember(group_id=g.id, user_id=uid, status="approved", is_admin=True))
+    session.commit()
+    leaderboard_cache.clear()
+
+    assert client.get(f"/groups/{g.id}/leaderboard").json["leaderboard"] == []
+    hits = leaderboard_cache.hits
+    client.get(f"/groups/{g.id}/leaderboard")
+    assert leaderboard_cache.hits == hits + 1
+
+    _write_weekly_scores(session, [{"g": g.id, "u": uid, "ws": date(2025, 8, 14), "p": 4}])
+    session.commit()
+    rows = client.get(f"/groups/{g.id}/leaderboard").json["leaderboard"]
+    assert [(r["user_id"], r["total_points"]) for r in rows] == [(uid, 4)]
+
+
+def test_scoring_invalidates_leaderboard_only_after_commit(session):
+    leaderboard_cache.set(7, ["old"])
+    _write_weekly_scores(session, [{"g": 7, "u": 1, "ws": date(2025, 8, 14), "p": 2}])
+    assert leaderboard_cache.get(7) == ["old"]      # readers still see committed data
+    session.rollback()
+    assert leaderboard_cache.get(7) == ["old"]
+
+    _write_weekly_scores(session, [{"g": 7, "u": 1, "ws": date(2025, 8, 14), "p": 2}])
+    session.commit()
+    assert leaderboard_cache.get(7) is None
+
+
+def test_unknown_user_id_is_not_cached(app, session):
+    from backend.models import User
+    from backend.routes.auth import load_user
+
+    with app.app_context():
+        assert load_user("4242") is None
+        session.add(User(id=4242, email="late@x", password_hash="x"))
+        session.commit()
+        assert load_user("4242").email == "late@x"
@@ -0,0 +1,27 @@
+from conftest import login
+from test_authz import count_queries
+
+
+def test_dashboard_sections_etags_and_304(client):
+    login(client, "d@x")
+    gid = client.post("/groups", json={"name": "Dash"}).json["group_id"]
+
+    with count_queries("from group_members where group_id") as q:
+        r = client.get(f"/groups/{gid}/dashboard")
+    assert r.status_code == 200 and len(q) == 1
+    sections = r.json["sections"]
+    assert set(sections) == {"group", "window", "matches", "others", "stats", "leaderboard",
+                             "highlights", "upcoming"}
+    assert sections["group"]["data"]["name"] == "Dash"
+    assert sections["leaderboard"]["data"] == {"leaderboard": []}
+
+    # whole-response revalidation
+    assert client.get(f"/groups/{gid}/dashboard", headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+
+    # per-section revalidation
+    tag = sections["group"]["etag"]
+    r2 = client.get(f"/groups/{gid}/dashboard?sections=group,window&etags=group:{tag}")
+    assert r2.json["sections"]["group"] == {"etag": tag, "not_modified": True}
+    assert "data" in r2.json["sections"]["window"]
+
+    assert client.get(f"/groups/{gid}/dashboard?sections=nope").status_code == 400
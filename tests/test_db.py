@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import NullPool
+
+from backend import db
+from backend.cache import user_cache
+from conftest import login
+
+
+def test_pool_profiles_and_env_overrides(monkeypatch):
+    pg = make_url("postgresql+psycopg://u@h/db")
+    assert db.pool_options(pg)["pool_pre_ping"] is False
+    assert db.pool_options(pg, "worker")["pool_pre_ping"] is True
+    assert db.pool_options(pg, "pgbouncer")["poolclass"] is NullPool
+    monkeypatch.setenv("DB_POOL_SIZE", "32")
+    assert db.pool_options(pg)["pool_size"] == 32
+    assert "pool_size" not in db.pool_options(pg, "pgbouncer")
+    with pytest.raises(ValueError):
+        db.pool_options(pg, "nope")
+
+
+def test_sqlite_pragmas(session):
+    assert session.execute(text("pragma journal_mode")).scalar() == "wal"
+    assert session.execute(text("pragma busy_timeout")).scalar() == db.SQLITE_PRAGMAS["busy_timeout"]
+
+
+def test_one_connection_per_request(client):
+    login(client, "pool@x")
+    gid = client.post("/groups", json={"name": "Pool"}).json["group_id"]
+    user_cache.clear()          # user loader, membership check and route all hit the DB
+    before = db.pool_stats()["checkouts"]
+    assert client.get(f"/groups/{gid}/dashboard").status_code == 200
+    stats = db.pool_stats()
+    assert stats["checkouts"] - before == 1 and stats["checked_out"] == 0
@@ -0,0 +1,75 @@
+import json
+from datetime import date
+
+from backend import db, events
+from backend.events import DbBroker, LocalBroker, channel
+from backend.scoring import recompute_week
+from conftest import login
+
+
+def test_slow_subscriber_drops_oldest():
+    broker = LocalBroker(queue_size=2)
+    with broker.subscribe("c") as sub:
+        for i in range(3):
+            assert broker.publish("c", {"n": i}) == 1
+        assert [sub.get(0)["n"], sub.get(0)["n"], sub.get(0)] == [1, 2, None]
+        assert sub.dropped == 1
+    assert broker.stats()["subscribers"] == 0
+
+
+def test_db_broker_relays_between_processes(session):
+    from sqlalchemy import text
+
+    web, scheduler = DbBroker(poll=3600), DbBroker(poll=3600)   # two processes' brokers; relay by hand
+    with web.subscribe(channel(3)) as sub:
+        scheduler.publish(channel(3), events.make_event("results", {"deltas": [1]}))
+        scheduler.publish(channel(4), events.make_event("results", {}))
+        assert web.relay() == 2
+        ev = sub.get(0)
+        assert (ev["type"], ev["data"]) == ("results", {"deltas": [1]}) and sub.get(0) is None
+
+        # an id that commits after a higher one was relayed is still delivered, once
+        last = web.stats()["last_id"]
+        insert = text("insert into event_log (id, channel, type, data, created_at) "
+                      "values (:id, 'group:3', 'scores', :d, CURRENT_TIMESTAMP)")
+        session.execute(insert, {"id": last + 2, "d": '{"n": 2}'}); session.commit()
+        web.relay()
+        session.execute(insert, {"id": last + 1, "d": '{"n": 1}'}); session.commit()
+        web.relay(); web.relay()
+        assert [sub.get(0)["data"]["n"], sub.get(0)["data"]["n"], sub.get(0)] == [2, 1, None]
+        assert web.stats()["gaps"] == 0
+    assert scheduler.stats()["polls"] == 0      # never subscribed, never polls
+
+
+def test_events_published_only_after_commit(session):
+    with events.get_broker().subscribe(channel(7)) as sub:
+        with db.SessionLocal() as s:
+            events.publish_after_commit(s, 7, "scores", {"x": 1})
+            s.rollback()
+        assert sub.get(0) is None
+
+        recompute_week(7, date(2025, 1, 2))     # no predictions -> nothing written, nothing sent
+        assert sub.get(0) is None
+        with db.SessionLocal() as s:
+            events.publish_after_commit(s, 7, "scores", {"x": 2})
+            s.commit()
+        assert sub.get(0)["data"] == {"x": 2}
+
+
+def test_group_stream(client, monkeypatch):
+    monkeypatch.setattr(events, "MAX_STREAM_SECONDS", 0.3)
+    monkeypatch.setattr(events, "HEARTBEAT_SECONDS", 0.1)
+    login(client, "e@x")
+    gid = client.post("/groups", json={"name": "Live"}).json["group_id"]
+
+    r = client.get(f"/groups/{gid}/events", buffered=False)
+    assert r.status_code == 200 and r.mimetype == "text/event-stream"
+    events.publish(gid, "scores", {"scores": []})
+    body = r.get_data(as_text=True)
+    assert body.startswith("retry: ")
+    frame = next(f for f in body.split("\n\n") if f.startswith("id: "))
+    assert "event: scores" in frame and json.loads(frame.split("data: ", 1)[1]) == {"scores": []}
+    assert events.get_broker().stats()["subscribers"] == 0
+
+    login(client, "other@x")
+    assert client.get(f"/groups/{gid}/events").status_code == 403
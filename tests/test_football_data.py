@@ -0,0 +1,95 @@
+import json
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from backend.services import football_data
+from backend.services.football_data import FootballDataClient, TokenBucket
+
+
+class StubTransport(BaseAdapter):
+    """Replays canned (status, headers, body) responses instead of calling football-data.org."""
+    def __init__(self, responses):
+        super().__init__()
+        self.responses, self.sent = list(responses), []
+
+    def send(self, request, **kw):
+        self.sent.append(request)
+        status, headers, body = self.responses.pop(0)
+        r = requests.Response()
+        r.status_code, r.request, r.url = status, request, request.url
+        r.headers.update(headers)
+        r._content = json.dumps(body).encode() if body is not None else b""
+        return r
+
+    def close(self):
+        pass
+
+
+def _client(responses):
+    s = requests.Session()
+    transport = StubTransport(responses)
+    s.mount("https://", transport)
+    return FootballDataClient("tok", session=s, per_minute=100), transport
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(football_data.time, "sleep", lambda s: None)
+
+
+def test_retries_429_then_revalidates_with_etag():
+    payload = {"matches": [{"id": 1}]}
+    c, t = _client([
+        (429, {"X-Requests-Available-Minute": "0", "X-RequestCounter-Reset": "3"}, {"message": "slow down"}),
+        (200, {"ETag": '"v1"', "X-Requests-Available-Minute": "8"}, payload),
+        (304, {"X-Requests-Available-Minute": "7"}, None),
+    ])
+    acquired = []
+    c.bucket.acquire = lambda: acquired.append(c.bucket.blocked_until)
+    assert c.matches("PL", "2025-08-01", "2025-08-07") == [{"id": 1}]
+    assert acquired[1] > 0                      # the 429 paused the bucket until the counter reset
+    assert c.matches("PL", "2025-08-01", "2025-08-07") == [{"id": 1}]
+    assert t.sent[-1].headers["If-None-Match"] == '"v1"'
+    assert t.sent[-1].headers["X-Auth-Token"] == "tok"
+
+    m = c.metrics()
+    assert (m["requests"], m["rate_limited"], m["retries"], m["not_modified"]) == (3, 1, 1, 1)
+    assert m["bytes_received"] > 0
+
+
+def test_gives_up_after_max_retries():
+    c, _ = _client([(503, {}, {})] * 4)
+    with pytest.raises(requests.HTTPError):
+        c.matches("PL")
+
+
+def test_bucket_follows_server_budget():
+    b = TokenBucket(10)
+    b.sync(available=2, reset_in=None)
+    assert b.tokens == 2
+    b.sync(available=0, reset_in=30)
+    assert b.blocked_until > 0
+
+
+def test_429_waits_in_the_bucket_only(monkeypatch):
+    slept = []
+    monkeypatch.setattr(football_data.time, "sleep", slept.append)
+    c, _ = _client([(429, {"X-Requests-Available-Minute": "0", "X-RequestCounter-Reset": "3"}, {}),
+                    (200, {}, {"matches": []})])
+    paused = []
+    c.bucket.acquire = lambda: paused.append(c.bucket.blocked_until)
+    assert c.matches("PL") == []
+    assert slept == [] and paused[1] > 0
+
+    m = c.metrics()
+    assert 0 < m["latency_max_ms"] <= m["latency_total_ms"]
+
+
+def test_validator_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(football_data, "VALIDATOR_CACHE_SIZE", 2)
+    c, _ = _client([(200, {"ETag": f'"v{i}"'}, {"matches": [{"id": i}]}) for i in range(3)])
+    for i in range(3):
+        c.matches("PL", season=2020 + i)
+    assert c._validators.stats()["size"] == 2
@@ -1,8 +1,15 @@
-from backend import create_app
-
-def test_health():
-    app = create_app()
+def test_health(app):
     client = app.test_client()
     r = client.get("/api/health")
     assert r.status_code == 200
     assert r.json["ok"] is True
+
+
+def test_boot_does_not_import_the_sync_path(tmp_path):
+    import os, subprocess, sys
+    probe = ("import sys; from backend import create_app; create_app(); "
+             "print(sorted(m for m in ('backend.ingest', 'backend.services.sync', "
+             "'backend.services.football_data', 'requests') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True,
+                         env={**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'boot.db'}"})
+    assert out.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,140 @@
+from datetime import date, datetime, timedelta, timezone
+
+from backend import http_cache
+from backend.cache import response_cache
+from backend.models import Group, GroupMember, Match, Prediction
+from backend.routes import api
+from backend.scoring import recompute_week_all
+from backend.tasks.weekly import upsert_matches
+from backend.util import week_start_thu
+from conftest import login, match_item
+
+
+def _counting(monkeypatch, module, name):
+    calls = []
+    real = getattr(module, name)
+    def wrapped(*a, **kw):
+        calls.append(1)
+        return real(*a, **kw)
+    monkeypatch.setattr(module, name, wrapped)
+    return calls
+
+
+def test_results_304_until_matches_change(client, monkeypatch):
+    monkeypatch.setattr(api.get_match_sync(), "fetch", lambda a, b, status: [])
+    yesterday = date.today() - timedelta(days=1)
+    upsert_matches([match_item(1, yesterday, "FINISHED", (1, 0))])
+    client.get("/api/results"); api.get_match_sync().wait()
+    queries = _counting(monkeypatch, api, "_db_results")
+
+    r = client.get("/api/results")
+    etag = r.headers["ETag"]
+    assert r.status_code == 200 and etag.startswith('W/"')
+    assert r.headers["Cache-Control"] == "public, no-cache" and "Cookie" in r.headers["Vary"]
+
+    r = client.get("/api/results", headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.headers["ETag"] == etag and not r.data
+    assert len(queries) == 1
+
+    upsert_matches([match_item(1, yesterday, "FINISHED", (2, 0))])
+    r = client.get("/api/results", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["ETag"] != etag
+    assert r.json["results"][0]["home_score"] == 2
+
+
+def test_leaderboard_version_follows_scores_and_membership(client, session):
+    uid = login(client, "etag@x")
+    g = Group(name="g", owner_id=uid, invite_code="etag1")
+    session.add(g); session.flush()
+    session.add(GroupMember(group_id=g.id, user_id=uid, status="approved", is_admin=True))
+    week = week_start_thu(date.today())
+    kick = datetime.now(timezone.utc)
+    session.add(Match(match_id=5, status="FINISHED", season="2025/26", home="H", away="A", utc_kickoff=kick,
+                      local_kickoff=kick, date=week, time="15:00", home_score=1, away_score=0, updated_at=kick))
+    session.add(Prediction(group_id=g.id, user_id=uid, match_id=5, home_pred=1, away_pred=0))
+    session.commit()
+    url = f"/groups/{g.id}/leaderboard"
+
+    first = client.get(url)
+    assert first.headers["Cache-Control"] == "private, no-cache" and first.json["leaderboard"] == []
+    assert client.get(url, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    recompute_week_all(week)
+    r = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert r.status_code == 200 and r.json["leaderboard"][0]["total_points"] == 3
+
+    client.post("/auth/username", json={"username": "renamed"})
+    r2 = client.get(url, headers={"If-None-Match": r.headers["ETag"]})
+    assert r2.status_code == 200 and r2.json["leaderboard"][0]["username"] == "renamed"
+
+    other = client.application.test_client()
+    login(other, "etag2@x")
+    assert other.get(url, headers={"If-None-Match": r2.headers["ETag"]}).status_code == 403
+
+
+def test_server_side_response_cache(client, monkeypatch):
+    monkeypatch.setattr(http_cache, "SERVER_CACHE", True)
+    monkeypatch.setattr(response_cache, "maxsize", 2)
+    monkeypatch.setattr(api.get_match_sync(), "fetch", lambda a, b, status: [])
+    client.get("/api/upcoming"); api.get_match_sync().wait()
+    queries = _counting(monkeypatch, api, "_db_upcoming")
+    upsert_matches([match_item(9, date.today() + timedelta(days=2))])
+
+    a = client.get("/api/upcoming")
+    b = client.get("/api/upcoming")
+    assert a.json == b.json and [m["match_id"] for m in a.json["items"]] == [9]
+    assert a.headers["ETag"] == b.headers["ETag"] and len(queries) == 1
+
+    for limit in (1, 2, 3):     # LRU keeps the two most recent
+        client.get(f"/api/upcoming?limit={limit}")
+    assert response_cache.stats()["size"] == 2 and response_cache.evictions >= 2
+
+
+def test_prediction_matches_revalidate_on_own_picks(client, session, monkeypatch):
+    from backend.routes import predictions as preds_routes
+    from backend.routes.predictions import windows
+
+    now = datetime.now(timezone.utc)
+    monkeypatch.setattr(preds_routes, "_open_close_times_local", lambda d: (
+        *windows(d)[0], now - timedelta(days=1), now + timedelta(days=1)))
+    uid = login(client, "pm@x")
+    g = Group(name="g", owner_id=uid, invite_code="etag3")
+    session.add(g); session.flush()
+    session.add(GroupMember(group_id=g.id, user_id=uid, status="approved", is_admin=True))
+    (cur_s, _), _ = windows(date.today())
+    kick = now + timedelta(days=1)
+    session.add(Match(match_id=11, status="SCHEDULED", season="2025/26", home="H", away="A", utc_kickoff=kick,
+                      local_kickoff=kick, date=cur_s, time="15:00", updated_at=now))
+    session.commit()
+    url = f"/groups/{g.id}/predictions/matches"
+
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    client.post(f"/groups/{g.id}/predictions", json={"predictions": [{"match_id": 11, "home_pred": 1, "away_pred": 1}]})
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.json["matches"][0]["my_home_pred"] == 1
+
+
+def test_leaderboard_body_matches_version_after_another_process_writes(client, session):
+    from sqlalchemy import text
+    from backend import versions
+
+    uid = login(client, "stale@x")
+    g = Group(name="g", owner_id=uid, invite_code="stale1")
+    session.add(g); session.flush()
+    session.add(GroupMember(group_id=g.id, user_id=uid, status="approved", is_admin=True))
+    session.commit()
+    url = f"/groups/{g.id}/leaderboard"
+    first = client.get(url)
+    assert first.json["leaderboard"] == []          # now in this process's leaderboard_cache
+
+    # a scoring write from another process: same tables and bump, but this cache never hears of it
+    session.execute(text("insert into weekly_scores (group_id,user_id,week_start,points,updated_at) "
+                         "values (:g,:u,:ws,7,CURRENT_TIMESTAMP)"),
+                    {"g": g.id, "u": uid, "ws": week_start_thu(date.today())})
+    versions.bump_scores(session, [g.id])
+    session.commit()
+
+    r = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert r.status_code == 200 and r.headers["ETag"] != first.headers["ETag"]
+    assert r.json["leaderboard"][0]["total_points"] == 7
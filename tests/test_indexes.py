@@ -0,0 +1,102 @@
+"""
+EXPLAIN QUERY PLAN checks (SQLite) for the hot queries in routes/*.py and scoring:
+every table access must be an index SEARCH, never a full SCAN.
+"""
+import pytest
+from datetime import date, datetime
+from sqlalchemy import event
+
+from backend import db
+from backend.migrations import migrate, migrate_if_needed
+from backend import authz, events, versions, scoring, stats
+from backend.routes import api, groups, leaderboard, predictions
+
+# every bind any of the statements below uses; a statement ignores the ones it doesn't
+P = {"g": 1, "u": 2, "a": date(2025, 8, 14), "b": date(2025, 8, 20), "ws": date(2025, 8, 14),
+     "from": date(2025, 8, 14), "to": date(2025, 8, 20), "ts": datetime(2025, 8, 15), "id": 10, "n": 3,
+     "ids": [1, 2], "gids": [1, 2], "uids": [1, 2], "after": 10, "gaps": [3, 4], "keys": ["scores:1", "scores:2"]}
+
+# the module-level statements the routes and scoring actually execute
+HOT_QUERIES = {
+    "membership": authz.MEMBERSHIP_SQL,
+    "leaderboard": leaderboard.LEADERBOARD_SQL,
+    "leaderboard_range": leaderboard.RANGE_SQL,
+    "rank_history": leaderboard.HISTORY_SQL,
+    "highlights": leaderboard.HIGHLIGHTS_SQL,
+    "topweeks": leaderboard.TOP_WEEKS_SQL,
+    "usernames": leaderboard.USERNAMES_SQL,
+    "prediction_matches": predictions.MATCHES_SQL,
+    "prediction_locks": predictions.MATCH_LOCKS_SQL,
+    "others": predictions.OTHERS_SQL,
+    **{f"others_page{'_after' if after else ''}{'_limit' if limit else ''}": stmt
+       for (after, limit), stmt in predictions.OTHERS_PAGE_SQL.items()},
+    "db_results": api.RESULTS_SQL,
+    "db_fixtures": api.FIXTURES_SQL,
+    "db_upcoming_rows": api.MATCHES_BY_ID_SQL,
+    "matches_version": versions.MATCHES_VERSION_SQL,
+    "data_versions": versions.GET_SQL,
+    "my_groups": groups.MY_GROUPS_SQL,
+    "scoring_week": scoring.WEEK_POINTS_SQL,
+    "scoring_week_groups": scoring.WEEK_POINTS_GROUPS_SQL,
+    "scoring_group_week": scoring.GROUP_WEEK_SQL,
+    "scoring_member_week": scoring.MEMBER_WEEK_POINTS_SQL,
+    "scoring_stored_week": scoring.STORED_WEEK_POINTS_SQL,
+    "window_stats": stats.STATS_SQL,
+    "event_relay": events.RELAY_SQL,
+}
+
+
+def _plan(c, stmt):
+    """EXPLAIN QUERY PLAN of `stmt` exactly as SQLAlchemy compiles and binds it."""
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        return "explain query plan " + statement, parameters
+    event.listen(c, "before_cursor_execute", explain, retval=True)
+    try:
+        return [r[3] for r in c.execute(stmt, P)]
+    finally:
+        event.remove(c, "before_cursor_execute", explain)
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_index(app, name):
+    if db.engine.dialect.name != "sqlite":
+        pytest.skip("plan assertions are written for SQLite")
+    with db.engine.connect() as c:
+        plan = _plan(c, HOT_QUERIES[name])
+    scans = [step for step in plan if step.startswith("SCAN")]
+    assert not scans, f"{name}: {plan}"
+    assert any(step.startswith("SEARCH") for step in plan), f"{name}: {plan}"
+
+
+def test_migrate_is_idempotent(app):
+    assert migrate(db.engine) == []
+
+
+def test_migrate_upgrades_legacy_sqlite(tmp_path):
+    """The checked-in epl.db predates several columns and every constraint."""
+    import pathlib, shutil
+    from sqlalchemy import create_engine, inspect
+
+    legacy = pathlib.Path(__file__).resolve().parent.parent / "epl.db"
+    shutil.copy(legacy, tmp_path / "legacy.db")
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+
+    applied = migrate(engine)
+    assert {"uq_member", "uq_prediction", "uq_weekly_score", "group_members.status"} <= set(applied)
+    assert "is_admin" in {c["name"] for c in inspect(engine).get_columns("group_members")}
+    assert migrate(engine) == []
+    engine.dispose()
+
+
+def test_boot_skips_migration_when_schema_unchanged(tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+    import backend.migrations as migrations
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert migrate_if_needed(engine) == []            # first boot: create_all, nothing to upgrade
+    monkeypatch.setattr(migrations, "migrate", lambda e: pytest.fail("schema unchanged, no migration expected"))
+    assert migrate_if_needed(engine) is None
+    monkeypatch.setattr(migrations, "schema_fingerprint", lambda: "changed")
+    monkeypatch.setattr(migrations, "migrate", lambda e: [])
+    assert migrate_if_needed(engine) == []
+    engine.dispose()
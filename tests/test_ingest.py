@@ -0,0 +1,59 @@
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+
+from backend.ingest import ingest_matches
+from backend.models import Match
+from conftest import match_item
+
+
+def test_counts_and_skips_unchanged_payloads(session):
+    assert ingest_matches([match_item(1), match_item(2)]) == {
+        "inserted": 2, "updated": 0, "unchanged": 0, "rescored_matches": 0}
+    stamp = session.execute(text("select updated_at from matches where match_id=1")).scalar()
+
+    report = ingest_matches([match_item(1), match_item(2, status="FINISHED", score=(2, 0)), match_item(3)])
+    assert (report["inserted"], report["updated"], report["unchanged"]) == (1, 1, 1)
+    assert report["rescored_matches"] == 1
+    assert session.execute(text("select updated_at from matches where match_id=1")).scalar() == stamp
+
+
+def test_normalizes_local_kickoff_and_status(session):
+    ingest_matches([match_item(9, "2025-08-16T20:00:00Z", "IN_PLAY", (1, 1))])
+    m = session.get(Match, 9)
+    assert m.status == "IN_PLAY"
+    assert (m.home_score, m.away_score) == (None, None)     # the score so far isn't a result
+    assert m.date == date(2025, 8, 17)           # 04:00 next day in Asia/Singapore
+    assert m.time == "04:00"
+    assert m.local_kickoff.replace(tzinfo=None) == datetime(2025, 8, 17, 4, 0)
+    assert m.utc_kickoff.replace(tzinfo=timezone.utc) == datetime(2025, 8, 16, 20, 0, tzinfo=timezone.utc)
+
+
+def test_overlapping_ingests_of_one_result_score_it_once(session):
+    from sqlalchemy import event
+    from backend import db
+    from backend.models import Group, Prediction, User
+
+    u = User(email="o@x", username="o", password_hash="x")
+    session.add(u); session.flush()
+    g = Group(name="g", owner_id=u.id, invite_code="overlap")
+    session.add(g); session.commit()
+    ingest_matches([match_item(1)])
+    session.add(Prediction(group_id=g.id, user_id=u.id, match_id=1, home_pred=2, away_pred=0))
+    session.commit()
+
+    # the second ingest has read the stored (unscored) row; the first one commits before it writes
+    done = []
+    def overlap(conn, cursor, statement, *_):
+        if statement.lstrip().startswith("insert into matches") and not done:
+            done.append(1)
+            ingest_matches([match_item(1, status="FINISHED", score=(2, 0))])
+    event.listen(db.engine, "before_cursor_execute", overlap)
+    try:
+        ingest_matches([match_item(1, status="FINISHED", score=(2, 0))])
+    finally:
+        event.remove(db.engine, "before_cursor_execute", overlap)
+
+    assert done
+    assert session.execute(text("select points from weekly_scores")).scalars().all() == [3]
+    assert session.execute(text("select cum_points from cumulative_scores")).scalars().all() == [3]
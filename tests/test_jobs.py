@@ -0,0 +1,49 @@
+import time
+
+from backend import jobs
+
+
+def test_lease_is_exclusive_until_released_or_expired(session):
+    assert jobs.acquire_lease("j", "a", ttl=60)
+    assert not jobs.acquire_lease("j", "b", ttl=60)
+    assert jobs.acquire_lease("j", "a", ttl=60)          # renewal by the holder
+    jobs.release_lease("j", "a")
+    assert jobs.acquire_lease("j", "b", ttl=-1)          # already expired
+    assert jobs.acquire_lease("j", "c", ttl=60)
+
+
+def test_runs_are_recorded_and_overlaps_skipped(session, monkeypatch):
+    monkeypatch.setitem(jobs.JOBS, "weekly_scrape",
+                        lambda: {"fixtures": {"inserted": 3, "updated": 1}, "results": {"updated": 2}})
+    run = jobs.run_job("weekly_scrape", requested_by="test")
+    assert run["status"] == "succeeded" and run["rows"] == 6 and run["duration_ms"] is not None
+    assert run["result"]["fixtures"]["inserted"] == 3
+
+    assert jobs.acquire_lease("weekly_scrape", "someone-else")
+    assert jobs.run_job("weekly_scrape")["status"] == "skipped"
+    jobs.release_lease("weekly_scrape", "someone-else")
+
+    def boom():
+        raise RuntimeError("upstream down")
+    monkeypatch.setitem(jobs.JOBS, "weekly_scrape", boom)
+    failed = jobs.run_job("weekly_scrape")
+    assert failed["status"] == "failed" and "upstream down" in failed["error"]
+    assert jobs.acquire_lease("weekly_scrape", "next")     # released even on failure
+
+
+def test_admin_run_scrape_enqueues(client, monkeypatch):
+    monkeypatch.setitem(jobs.JOBS, "weekly_scrape", lambda: {"fixtures": {"inserted": 1}})
+    assert client.post("/admin/run-scrape").status_code == 403
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert client.post("/admin/run-scrape", headers={"X-Admin-Token": "nope"}).status_code == 403
+
+    r = client.post("/admin/run-scrape", headers={"X-Admin-Token": "s3cret"})
+    assert r.status_code == 202
+    url = r.json["status_url"]
+    for _ in range(50):
+        job = client.get(url, headers={"Authorization": "Bearer s3cret"}).json["job"]
+        if job["status"] in ("succeeded", "failed", "skipped"):
+            break
+        time.sleep(0.05)
+    assert job["status"] == "succeeded" and job["rows"] == 1 and job["requested_by"] == "token"
+    assert client.get("/admin/jobs/999999", headers={"X-Admin-Token": "s3cret"}).status_code == 404
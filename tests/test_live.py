@@ -0,0 +1,89 @@
+from datetime import date, datetime, timedelta, timezone
+
+from backend import jobs
+from backend.models import Group, GroupMember, Match, Prediction, WeeklyScore
+from backend.routes import api
+from backend.tasks import live
+from backend.tasks.live import LivePoller, poll_interval, run_live_poll
+from backend.tasks.weekly import upsert_matches
+from conftest import login, match_item, match_row
+
+NOW = datetime(2025, 8, 16, 15, 0, tzinfo=timezone.utc)
+
+
+def test_poll_interval_adapts_and_respects_budget():
+    assert poll_interval(1, per_minute=10) == live.MAX_INTERVAL
+    assert poll_interval(4, per_minute=10) < poll_interval(2, per_minute=10) < live.MAX_INTERVAL
+    assert poll_interval(50, per_minute=10) == live.MIN_INTERVAL
+    assert poll_interval(50, per_minute=1) == 120          # one call per minute at a 50% share
+
+
+def test_polls_only_live_fixtures_then_sleeps_until_next_kickoff(session):
+    session.add_all([match_row(1, NOW - timedelta(minutes=80), status="IN_PLAY"),
+                     match_row(2, NOW - timedelta(hours=4), status="IN_PLAY"),      # stale status, out of window
+                     match_row(3, NOW - timedelta(minutes=30), status="FINISHED"),
+                     match_row(4, NOW + timedelta(hours=2))])
+    session.commit()
+
+    calls = []
+    def fetch(a, b):
+        calls.append((a, b))
+        return [{"id": 1, "utcDate": (NOW - timedelta(minutes=80)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                 "status": "FINISHED", "homeTeam": {"name": "H1"}, "awayTeam": {"name": "A1"},
+                 "score": {"fullTime": {"home": 2, "away": 0}}}]
+
+    poller = LivePoller(fetch=fetch, ingest=upsert_matches, per_minute=10)
+    report = poller.tick(NOW)
+    assert report["live"] == 1 and calls == [("2025-08-16", "2025-08-16")]
+    assert report["ingest"]["updated"] == 1 and report["next_in"] == live.MAX_INTERVAL
+    session.expire_all()
+    assert session.get(Match, 1).home_score == 2
+
+    idle = poller.tick(NOW)                  # match 1 is finished now: nothing to poll
+    assert idle["live"] == 0 and len(calls) == 1
+    assert idle["next_in"] == int(live.IDLE_RECHECK.total_seconds())
+    soon = poller.tick(NOW + timedelta(hours=1, minutes=45))
+    assert soon["next_in"] == int((timedelta(minutes=15) - live.PRE_KICKOFF).total_seconds())
+
+
+def test_in_play_scores_are_neither_scored_nor_listed(client, session, monkeypatch):
+    monkeypatch.setattr(api.get_match_sync(), "fetch", lambda a, b, status: [])
+    uid = login(client, "l@x")
+    g = Group(name="g", owner_id=uid, invite_code="live1")
+    session.add(g); session.flush()
+    session.add(GroupMember(group_id=g.id, user_id=uid, status="approved", is_admin=True))
+    session.add(Prediction(group_id=g.id, user_id=uid, match_id=1, home_pred=1, away_pred=0))
+    session.commit()
+    yesterday = date.today() - timedelta(days=1)
+
+    upsert_matches([match_item(1, yesterday, "IN_PLAY", (1, 0))])
+    assert session.query(WeeklyScore).count() == 0
+    client.get("/api/results"); api.get_match_sync().wait()
+    assert client.get("/api/results").json["results"] == []
+
+    upsert_matches([match_item(1, yesterday, "FINISHED", (1, 0))])
+    assert session.query(WeeklyScore).one().points == 3
+    assert [r["match_id"] for r in client.get("/api/results").json["results"]] == [1]
+
+
+def test_live_poll_runs_under_the_job_lease_and_waits_for_the_last_poll(session, monkeypatch):
+    now = datetime.now(timezone.utc)
+    session.add(match_row(1, now - timedelta(minutes=10), status="IN_PLAY"))
+    session.commit()
+    calls = []
+    poller = LivePoller(fetch=lambda a, b: calls.append((a, b)) or [], ingest=upsert_matches, per_minute=10)
+    monkeypatch.setattr(live, "_default_poller", lambda: poller)
+
+    first = jobs.run_job("live_poll", requested_by="test")
+    assert first["status"] == "succeeded" and first["result"]["live"] == 1 and len(calls) == 1
+
+    # another scheduler process right after: the lease is free, but the next poll isn't due
+    again = jobs.run_job("live_poll", requested_by="test")
+    assert again["result"]["deferred"] and 0 < again["result"]["next_in"] <= live.MAX_INTERVAL
+    assert len(calls) == 1
+
+    assert jobs.acquire_lease("live_poll", "someone-else")
+    assert jobs.run_job("live_poll")["status"] == "skipped"
+
+    later = run_live_poll(now + timedelta(seconds=live.MAX_INTERVAL + 1), poller)
+    assert later["live"] == 1 and len(calls) == 2
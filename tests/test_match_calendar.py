@@ -0,0 +1,43 @@
+from datetime import date, datetime, timedelta, timezone
+
+from backend.match_calendar import calendar
+from backend.tasks.weekly import upsert_matches
+from conftest import match_item, match_row
+
+THU = date(2025, 8, 14)
+NOW = datetime(2025, 8, 16, 12, 0, tzinfo=timezone.utc)
+
+
+def test_window_first_kickoff_and_locks_from_arrays(session):
+    session.add_all([
+        match_row(1, NOW - timedelta(hours=2), THU + timedelta(days=2), "FINISHED"),
+        match_row(2, NOW + timedelta(hours=3), THU + timedelta(days=2)),
+        match_row(3, NOW + timedelta(days=1), THU + timedelta(days=3)),
+        match_row(4, NOW + timedelta(days=6), THU + timedelta(days=7)),   # next window
+        match_row(5, NOW - timedelta(days=3), THU - timedelta(days=1), "FT"),   # previous window
+    ])
+    session.commit()
+
+    end = THU + timedelta(days=6)
+    assert sorted(calendar.window(THU, end)) == [1, 2, 3]
+    assert calendar.first_kickoff(THU, end) == NOW - timedelta(hours=2)
+    assert calendar.first_kickoff(date(2030, 1, 3), date(2030, 1, 9)) is None
+    assert calendar.in_window(3, THU, end) and not calendar.in_window(4, THU, end)
+    assert calendar.is_locked(1, NOW) and not calendar.is_locked(2, NOW)
+    assert calendar.kickoff(4) == NOW + timedelta(days=6)
+    assert calendar.upcoming(NOW, 2) == [2, 3]
+    assert calendar.upcoming(NOW - timedelta(days=10), 10) == [2, 3, 4]   # finished ones skipped
+    assert calendar.loads == 1
+
+    assert calendar.in_window(99, THU, end) is None and calendar.is_locked(99, NOW) is None
+    assert calendar.loads == 1      # a miss right after loading doesn't reload
+
+
+def test_ingest_refreshes_calendar(session):
+    kick = datetime.now(timezone.utc) + timedelta(days=2)
+    upsert_matches([match_item(7, kick)])
+    assert calendar.is_locked(7) is False
+
+    upsert_matches([match_item(7, "2020-01-01T15:00:00Z")])
+    assert calendar.is_locked(7) is True
+    assert calendar.kickoff(7) == datetime(2020, 1, 1, 15, 0, tzinfo=timezone.utc)
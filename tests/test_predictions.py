@@ -0,0 +1,228 @@
+import base64
+from datetime import date, datetime, timedelta, timezone
+
+from backend.models import Group, GroupMember, Match, Prediction
+from backend.routes import predictions as preds_routes
+from backend.routes.predictions import windows
+from conftest import login, match_item, match_row
+
+
+def _group(session, uid):
+    g = Group(name="g", owner_id=uid, invite_code=f"p{uid}")
+    session.add(g); session.flush()
+    session.add(GroupMember(group_id=g.id, user_id=uid, status="approved", is_admin=True))
+    session.commit()
+    return g
+
+
+def test_submit_batch_reports_each_entry(client, session, monkeypatch):
+    now = datetime.now(timezone.utc)
+    monkeypatch.setattr(preds_routes, "_open_close_times_local", lambda d: (
+        *windows(d)[0], now - timedelta(days=1), now + timedelta(days=1)))
+    uid = login(client, "p@x")
+    g = _group(session, uid)
+
+    (cur_s, cur_e), _ = windows(date.today())
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    past = datetime.now(timezone.utc) - timedelta(hours=1)
+    session.add_all([match_row(1, future, cur_s), match_row(2, past, cur_s),
+                     match_row(3, future, cur_e + timedelta(days=1))])
+    session.commit()
+
+    r = client.post(f"/groups/{g.id}/predictions", json={"predictions": [
+        {"match_id": 1, "home_pred": 2, "away_pred": 1},
+        {"match_id": 2, "home_pred": 0, "away_pred": 0},
+        {"match_id": 3, "home_pred": 1, "away_pred": 1},
+        {"match_id": 99, "home_pred": 1, "away_pred": 1},
+        {"match_id": 1, "home_pred": "x"},
+    ]})
+    assert r.status_code == 200
+    body = r.json
+    assert body["ok"] is True and body["saved"] == 1
+    assert [(e["match_id"], e["ok"]) for e in body["results"]] == [
+        (1, True), (2, False), (3, False), (99, False), (1, False)]
+
+    # resubmitting updates in place
+    client.post(f"/groups/{g.id}/predictions", json={"predictions": [{"match_id": 1, "home_pred": 0, "away_pred": 3}]})
+    session.expire_all()
+    preds = session.query(Prediction).all()
+    assert [(p.match_id, p.home_pred, p.away_pred) for p in preds] == [(1, 0, 3)]
+
+
+def test_submit_rechecks_kickoff_behind_a_stale_calendar(client, session):
+    from backend.match_calendar import calendar
+
+    uid = login(client, "k@x")
+    g = _group(session, uid)
+    (cur_s, _), _ = windows(date.today())
+    session.add(match_row(1, datetime.now(timezone.utc) + timedelta(days=1), cur_s))
+    session.commit()
+    assert calendar.is_locked(1) is False
+
+    # another process moves the kickoff into the past; this process's calendar isn't told
+    session.query(Match).filter_by(match_id=1).update(
+        {"utc_kickoff": datetime.now(timezone.utc) - timedelta(minutes=5)})
+    session.commit()
+    assert calendar.is_locked(1) is False
+
+    r = client.post(f"/groups/{g.id}/predictions?allow_early=1",
+                    json={"predictions": [{"match_id": 1, "home_pred": 1, "away_pred": 0}]})
+    assert r.json["saved"] == 0
+    assert r.json["results"] == [{"match_id": 1, "ok": False, "reason": "match has kicked off"}]
+    assert session.query(Prediction).count() == 0
+    assert calendar.is_locked(1) is True
+
+
+def test_window_schedule_cached_until_matches_upserted(client, session):
+    from backend.cache import window_cache
+    from backend.tasks.weekly import upsert_matches
+
+    uid = login(client, "w@x")
+    g = _group(session, uid)
+    window_cache.clear()
+
+    first = client.get(f"/groups/{g.id}/predictions/window").json
+    misses = window_cache.misses
+    assert client.get(f"/groups/{g.id}/predictions/window").json == first
+    assert window_cache.misses == misses
+
+    (cur_s, _), _ = windows(date.today())
+    upsert_matches([match_item(7, cur_s + timedelta(days=2))])
+    close_at = client.get(f"/groups/{g.id}/predictions/window").json["current"]["close_at"]
+    assert close_at != first["current"]["close_at"]
+    assert close_at.startswith((cur_s + timedelta(days=2)).isoformat())
+
+
+def test_stats_single_pass_and_cached_after_close(client, session, monkeypatch):
+    from backend.cache import stats_cache
+
+    uid = login(client, "s@x")
+    g = _group(session, uid)
+    (cur_s, cur_e), _ = windows(date.today())
+    now = datetime.now(timezone.utc)
+    monkeypatch.setattr(preds_routes, "_open_close_times_local", lambda d: (
+        *windows(d)[0], now - timedelta(days=2), now - timedelta(days=1)))
+    session.add_all([match_row(1, now, cur_s), match_row(2, now, cur_s)])
+    session.add_all([Prediction(group_id=g.id, user_id=uid, match_id=1, home_pred=2, away_pred=1),
+                     Prediction(group_id=g.id, user_id=uid + 100, match_id=1, home_pred=2, away_pred=1),
+                     Prediction(group_id=g.id, user_id=uid + 101, match_id=1, home_pred=0, away_pred=0)])
+    session.commit()
+    stats_cache.clear()
+
+    body = client.get(f"/groups/{g.id}/predictions/stats").json
+    m1, m2 = body["matches"]
+    assert m1["outcomes"] == {"home": 2, "draw": 1, "away": 0}
+    assert m1["scores"] == [{"score": "2-1", "count": 2}, {"score": "0-0", "count": 1}]
+    assert m2["outcomes"] == {"home": 0, "draw": 0, "away": 0} and m2["scores"] == []
+
+    hits = stats_cache.hits
+    assert client.get(f"/groups/{g.id}/predictions/stats").json == body
+    assert stats_cache.hits == hits + 1
+
+
+def test_others_keyset_pages_and_ndjson(client, session):
+    import json
+    from backend.models import User
+
+    uid = login(client, "o@x")
+    g = _group(session, uid)
+    (cur_s, _), _ = windows(date.today())
+    kickoff = datetime.now(timezone.utc) + timedelta(days=1)
+    session.add_all([match_row(i, kickoff, cur_s) for i in range(1, 4)])
+    others = [User(email=f"u{i}@x", username=f"u{i}", password_hash="x") for i in range(2)]
+    session.add_all(others); session.flush()
+    same_ts = datetime(2025, 1, 1, 12, 0)
+    session.add_all([Prediction(group_id=g.id, user_id=u.id, match_id=m, home_pred=m, away_pred=0, updated_at=same_ts)
+                     for u in others for m in range(1, 4)])
+    session.commit()
+
+    full = client.get(f"/groups/{g.id}/predictions/others").json
+    assert len(full["predictions"]) == 6 and "next_cursor" not in full
+
+    seen, cursor = [], None
+    while True:
+        page = client.get(f"/groups/{g.id}/predictions/others",
+                          query_string={"limit": 4, **({"cursor": cursor} if cursor else {})}).json
+        seen += [(p["username"], p["match_id"]) for p in page["predictions"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(seen) == sorted((p["username"], p["match_id"]) for p in full["predictions"])
+
+    compact = client.get(f"/groups/{g.id}/predictions/others?compact=1").json
+    assert len(compact["matches"]) == 3 and len(compact["users"]) == 2 and len(compact["predictions"]) == 6
+
+    r = client.get(f"/groups/{g.id}/predictions/others?format=ndjson&compact=1")
+    assert r.mimetype == "application/x-ndjson"
+    lines = [json.loads(l) for l in r.data.decode().splitlines()]
+    assert [l["type"] for l in lines].count("pick") == 6
+    assert [l["type"] for l in lines].count("user") == 2
+
+    assert client.get(f"/groups/{g.id}/predictions/others?cursor=!!").status_code == 400
+
+
+def test_others_pages_across_timestamp_formats(client, session):
+    from sqlalchemy import text
+    from backend import db
+    from backend.migrations import migrate
+    from backend.models import User
+
+    uid = login(client, "f@x")
+    g = _group(session, uid)
+    (cur_s, _), _ = windows(date.today())
+    session.add_all([match_row(i, datetime.now(timezone.utc) + timedelta(days=1), cur_s) for i in range(1, 4)])
+    others = [User(email=f"f{i}@x", username=f"f{i}", password_hash="x") for i in range(2)]
+    session.add_all(others); session.flush()
+    # ORM rows carry microseconds; the upsert used to store CURRENT_TIMESTAMP, which migrate rewrites
+    session.add_all([Prediction(group_id=g.id, user_id=others[0].id, match_id=m, home_pred=1, away_pred=0,
+                                updated_at=datetime.now(timezone.utc) - timedelta(seconds=m)) for m in range(1, 4)])
+    session.execute(text("""
+      insert into predictions (group_id,user_id,match_id,home_pred,away_pred,created_at,updated_at)
+      select :g, :u, match_id, 0, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP from matches
+    """), {"g": g.id, "u": others[1].id})
+    session.commit()
+    assert "predictions.updated_at (3 normalized)" in migrate(db.engine)
+
+    seen, cursor = [], None
+    while True:
+        page = client.get(f"/groups/{g.id}/predictions/others",
+                          query_string={"limit": 1, **({"cursor": cursor} if cursor else {})}).json
+        seen += [(p["username"], p["match_id"]) for p in page["predictions"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 6
+
+
+def test_others_cursor_survives_the_cursor_pick_being_resaved(client, session):
+    from backend.models import User
+
+    uid = login(client, "r@x")
+    g = _group(session, uid)
+    (cur_s, _), _ = windows(date.today())
+    session.add_all([match_row(i, datetime.now(timezone.utc) + timedelta(days=1), cur_s) for i in range(1, 4)])
+    others = [User(email=f"r{i}@x", username=f"r{i}", password_hash="x") for i in range(2)]
+    session.add_all(others); session.flush()
+    base = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    session.add_all([Prediction(group_id=g.id, user_id=u.id, match_id=m, home_pred=m, away_pred=0,
+                                updated_at=base + timedelta(minutes=m)) for u in others for m in range(1, 4)])
+    session.commit()
+
+    url = f"/groups/{g.id}/predictions/others"
+    first = client.get(url, query_string={"limit": 2}).json
+    last = first["predictions"][-1]
+    # the pick the cursor points at is re-saved before the next page is fetched
+    p = session.query(Prediction).filter_by(group_id=g.id, match_id=last["match_id"],
+                                            user_id=next(u.id for u in others if u.username == last["username"])).one()
+    p.home_pred, p.updated_at = 9, datetime.now(timezone.utc)
+    session.commit()
+
+    seen, cursor = [(r["username"], r["match_id"]) for r in first["predictions"]], first["next_cursor"]
+    while cursor:
+        page = client.get(url, query_string={"limit": 2, "cursor": cursor}).json
+        seen += [(r["username"], r["match_id"]) for r in page["predictions"]]
+        cursor = page["next_cursor"]
+    assert len(seen) == len(set(seen)) == 6
+
+    old_style = base64.urlsafe_b64encode(str(p.id).encode()).decode()
+    assert client.get(url, query_string={"cursor": old_style}).status_code == 400
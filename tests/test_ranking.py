@@ -0,0 +1,109 @@
+import random
+from datetime import date
+
+from backend import db
+from backend.models import Group, User
+from backend.ranking import RankIndex, _SortedKeys, global_ranks
+from backend.scoring import _write_weekly_scores
+from conftest import login
+
+WEEK = date(2025, 8, 14)
+
+
+def test_rank_index_ties_and_neighbours():
+    ix = RankIndex()
+    for uid, pts in [(1, 10), (2, 30), (3, 20), (4, 20), (5, 5), (6, 0)]:
+        ix.upsert(uid, pts)
+    assert ix.rank(4) == (2, 20) and ix.rank(3) == (2, 20) and ix.rank(1) == (4, 10)
+    assert [e["user_id"] for e in ix.around(1, 2)] == [4, 1, 5]
+    assert [e["user_id"] for e in ix.around(2, 2)] == [2, 3, 4]        # clamped at the top
+    assert [e["user_id"] for e in ix.around(6, 2)] == [1, 5, 6]        # and at the bottom
+    ix.upsert(6, 100)
+    ix.remove(2)
+    assert [(e["rank"], e["user_id"]) for e in ix.top(3)] == [(1, 6), (2, 3), (2, 4)]
+    assert ix.rank(2) is None and len(ix) == 5
+    built = RankIndex.from_scores({1: 10, 3: 20, 4: 20, 5: 5, 6: 100})
+    assert built.top(10) == ix.top(10) and built.around(5, 2) == ix.around(5, 2)
+
+
+def test_sorted_keys_match_a_plain_sorted_list(monkeypatch):
+    monkeypatch.setattr(_SortedKeys, "LOAD", 4)      # small buckets, so splits and empties happen
+    rng = random.Random(7)
+    keys, ref = _SortedKeys(), []
+    for _ in range(2000):
+        k = (rng.randint(-50, 0), rng.randint(1, 40))
+        if k in ref:
+            keys.remove(k); ref.remove(k)
+        else:
+            keys.add(k); ref.append(k); ref.sort()
+        probe = (rng.randint(-55, 5),)
+        lo = rng.randint(0, len(ref)); hi = lo + rng.randint(0, 12)
+        assert len(keys) == len(ref)
+        assert keys.bisect_left(probe) == sum(1 for r in ref if r < probe)
+        assert keys.slice(lo, hi) == ref[lo:hi]
+
+
+def _refreshed(client, url):
+    """GET `url` once the background refresh that the first GET starts has finished."""
+    client.get(url)
+    global_ranks.wait()
+    return client.get(url).json
+
+
+def test_global_leaderboard_refreshes_with_scoring(client, session):
+    me = login(client, "glob@x", username="glob_me")
+    others = [User(email=f"g{i}@x", username=f"g{i}", password_hash="x") for i in range(3)]
+    session.add_all(others); session.flush()
+    pub = Group(name="pub", owner_id=me, invite_code="pub", is_public=True)
+    priv = Group(name="priv", owner_id=me, invite_code="priv")
+    session.add_all([pub, priv]); session.commit()
+
+    with db.SessionLocal() as s:
+        _write_weekly_scores(s, [
+            {"g": pub.id, "u": me, "ws": WEEK, "p": 4}, {"g": priv.id, "u": me, "ws": WEEK, "p": 10},
+            {"g": pub.id, "u": others[0].id, "ws": WEEK, "p": 6},
+            {"g": priv.id, "u": others[1].id, "ws": WEEK, "p": 8},
+            {"g": pub.id, "u": others[2].id, "ws": WEEK, "p": 1}])
+        s.commit()
+
+    best = client.get("/leaderboard/global").json
+    assert best["me"] == {"rank": 1, "points": 10} and best["total"] == 4
+    assert [e["username"] for e in best["top"]] == ["glob_me", "g1", "g0", "g2"]
+
+    avg = client.get("/leaderboard/global?metric=avg&around=2").json
+    assert avg["me"] == {"rank": 2, "points": 7.0}
+    assert [e["user_id"] for e in avg["around"]] == [others[1].id, me, others[0].id]
+
+    public = client.get("/leaderboard/global?scope=public").json
+    assert public["me"]["rank"] == 2 and public["total"] == 3
+
+    with db.SessionLocal() as s:      # a later write moves the ranking without a reload
+        _write_weekly_scores(s, [{"g": pub.id, "u": others[2].id, "ws": WEEK, "p": 20}])
+        s.commit()
+    assert _refreshed(client, "/leaderboard/global?scope=public")["top"][0]["user_id"] == others[2].id
+    assert client.get("/leaderboard/global?scope=nope").status_code == 400
+
+    # making priv public brings my 10 there, and g1, into the public scope
+    assert client.post(f"/groups/{priv.id}/settings", json={"is_public": True}).status_code == 200
+    public = _refreshed(client, "/leaderboard/global?scope=public")
+    assert public["me"] == {"rank": 2, "points": 10} and public["total"] == 4
+    client.post(f"/groups/{priv.id}/settings", json={"is_public": False})
+    assert _refreshed(client, "/leaderboard/global?scope=public")["total"] == 3
+
+
+def test_full_reload_runs_off_the_request_path(session):
+    from datetime import datetime, timezone
+    from sqlalchemy import text
+
+    insert = text("insert into global_scores (scope,user_id,best_points,avg_points,groups,updated_at) "
+                  "values ('all', :u, :p, :p, 1, :ts)")
+    session.execute(insert, {"u": 1, "p": 5, "ts": datetime.now(timezone.utc)}); session.commit()
+    assert global_ranks.standings(session)["total"] == 1          # the first lookup loads
+
+    # a row too old for the incremental pull's window only arrives with the full rebuild
+    session.execute(insert, {"u": 2, "p": 9, "ts": datetime(2020, 1, 1, tzinfo=timezone.utc)}); session.commit()
+    global_ranks._loaded_at -= 10_000
+    with global_ranks._refresh_lock:                  # hold the rebuild: lookups are still answered
+        assert global_ranks.standings(session)["total"] == 1
+    global_ranks.wait()
+    assert global_ranks.standings(session)["top"][0] == {"rank": 1, "user_id": 2, "points": 9}
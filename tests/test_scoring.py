@@ -0,0 +1,191 @@
+from datetime import date, datetime, timezone
+import random
+
+from sqlalchemy import text
+
+from backend.models import Match, User, Group, Prediction
+from backend.scoring import recompute_week, recompute_week_all
+from backend.util import points_for
+from conftest import match_item
+
+WEEK = date(2025, 8, 14)  # a Thursday
+
+
+def _seed(s, n_groups=3, n_members=6, seed=1):
+    rnd = random.Random(seed)
+    kick = datetime(2025, 8, 16, 14, 0, tzinfo=timezone.utc)
+    matches = []
+    for i in range(8):
+        hs, as_ = (rnd.randint(0, 3), rnd.randint(0, 3)) if i < 6 else (None, None)
+        matches.append(Match(match_id=100 + i, status="FINISHED" if hs is not None else "SCHEDULED",
+                             season="2025/26", home=f"H{i}", away=f"A{i}",
+                             utc_kickoff=kick, local_kickoff=kick, date=date(2025, 8, 16 + i % 5),
+                             time="14:00", home_score=hs, away_score=as_, updated_at=kick))
+    s.add_all(matches)
+    users = [User(email=f"u{i}@x", password_hash="x") for i in range(n_members)]
+    s.add_all(users); s.flush()
+    groups = [Group(name=f"g{i}", owner_id=users[0].id, invite_code=f"code{i}") for i in range(n_groups)]
+    s.add_all(groups); s.flush()
+    for g in groups:
+        for u in users:
+            for m in matches:
+                if rnd.random() < 0.8:
+                    s.add(Prediction(group_id=g.id, user_id=u.id, match_id=m.match_id,
+                                     home_pred=rnd.randint(0, 3), away_pred=rnd.randint(0, 3)))
+    s.commit()
+    return matches, groups
+
+
+def _scores(s):
+    return {(g, u): p for g, u, p in s.execute(text(
+        "select group_id, user_id, points from weekly_scores where week_start=:ws"), {"ws": WEEK})}
+
+
+def test_bulk_matches_per_group_recompute(session):
+    matches, groups = _seed(session)
+
+    for g in groups:
+        recompute_week(g.id, WEEK)
+    expected = _scores(session)
+    session.execute(text("delete from weekly_scores")); session.commit()
+
+    out = recompute_week_all(WEEK)
+    assert out["groups"] == len(groups)
+    assert _scores(session) == expected
+
+    # sanity check against the python rules directly
+    by_id = {m.match_id: m for m in matches}
+    manual = {}
+    for p in session.query(Prediction):
+        m = by_id[p.match_id]
+        key = (p.group_id, p.user_id)
+        manual[key] = manual.get(key, 0) + points_for(p.home_pred, p.away_pred, m.home_score, m.away_score)
+    assert expected == manual
+
+
+def test_bulk_restricted_to_groups(session):
+    _, groups = _seed(session)
+    out = recompute_week_all(WEEK, group_ids=[groups[0].id])
+    assert out["groups"] == 1
+    assert {g for g, _ in _scores(session)} == {groups[0].id}
+    assert recompute_week_all(WEEK, group_ids=[])["rows"] == 0
+
+
+def test_incremental_deltas_match_full_rescore(session):
+    from backend.tasks.weekly import upsert_matches
+
+    matches, _ = _seed(session)
+    recompute_week_all(WEEK)
+
+    # one new result, one corrected result, one untouched
+    upsert_matches([match_item(m.match_id, m.date, "FINISHED", score)
+                    for m, score in ((matches[7], (2, 1)), (matches[0], (0, 0)),
+                                     (matches[1], (matches[1].home_score, matches[1].away_score)))])
+    incremental = _scores(session)
+
+    session.execute(text("delete from weekly_scores")); session.commit()
+    recompute_week_all(WEEK)
+    assert incremental == _scores(session)
+
+
+def test_result_moved_to_another_week_rescored_there(session):
+    from datetime import timedelta
+    from backend.tasks.weekly import upsert_matches
+
+    matches, _ = _seed(session)
+    recompute_week_all(WEEK)
+    moved = matches[0]
+    upsert_matches([match_item(moved.match_id, moved.date + timedelta(days=7), "FINISHED", (3, 3))])
+    incremental = {k: v for k, v in _all_scores(session).items() if v}
+
+    session.execute(text("delete from weekly_scores")); session.commit()
+    recompute_week_all(WEEK); recompute_week_all(WEEK + timedelta(days=7))
+    assert incremental == {k: v for k, v in _all_scores(session).items() if v}
+
+
+def test_weekly_job_reconciles_last_week(session, monkeypatch):
+    from datetime import timedelta
+    from backend.tasks import weekly
+    from backend.util import week_start_thu
+
+    monkeypatch.setattr(weekly, "fetch_matches", lambda *a, **kw: [])
+    last_week = week_start_thu(date.today()) - timedelta(days=7)
+    kick = datetime.combine(last_week, datetime.min.time(), timezone.utc)
+    session.add(Match(match_id=1, status="FINISHED", season="2025/26", home="H", away="A", utc_kickoff=kick,
+                      local_kickoff=kick, date=last_week, time="00:00", home_score=2, away_score=0, updated_at=kick))
+    session.add(User(id=1, email="r@x", password_hash="x"))
+    session.add(Group(id=1, name="g", owner_id=1, invite_code="rec"))
+    session.commit()
+    # stored after the result, so no ingest delta ever scored it
+    session.add(Prediction(group_id=1, user_id=1, match_id=1, home_pred=2, away_pred=0)); session.commit()
+
+    out = weekly.run_weekly_job()
+    assert out["reconciled"]["rows"] == 1
+    assert session.execute(text("select points from weekly_scores where user_id=1")).scalar() == 3
+
+
+def _all_scores(s):
+    return {(g, u, str(ws)): p for g, u, ws, p in s.execute(text(
+        "select group_id, user_id, week_start, points from weekly_scores"))}
+
+
+def _cumulative(s):
+    return {(g, u, str(ws)): (p, c) for g, u, ws, p, c in s.execute(text(
+        "select group_id, user_id, week_start, points, cum_points from cumulative_scores"))}
+
+
+def test_cumulative_totals_follow_every_write(session):
+    from datetime import timedelta
+    from backend import db
+    from backend.scoring import _write_weekly_scores, rebuild_cumulative
+
+    rnd = random.Random(3)
+    weeks = [WEEK + timedelta(days=7 * i) for i in range(6)]
+    for _ in range(40):      # random weeks, out of order, overwriting earlier values
+        with db.SessionLocal() as s:
+            _write_weekly_scores(s, [{"g": 1, "u": u, "ws": rnd.choice(weeks), "p": rnd.randint(0, 9)}
+                                     for u in rnd.sample(range(1, 6), 3)])
+            s.commit()
+    incremental = _cumulative(session)
+
+    with db.SessionLocal() as s:
+        rebuild_cumulative(s); s.commit()
+    rebuilt = _cumulative(session)
+    assert incremental == rebuilt
+
+
+def test_leaderboard_range_and_rank_history(client, session):
+    from datetime import timedelta
+    from backend import db
+    from backend.scoring import _write_weekly_scores
+    from conftest import login
+
+    me = login(client, "lb@x")
+    gid = client.post("/groups", json={"name": "LB"}).json["group_id"]
+    other = User(email="o@x", password_hash="x"); session.add(other)
+    blank = User(email="z@x", password_hash="x"); session.add(blank); session.flush()
+    for u in (other.id, blank.id):
+        session.execute(text("insert into group_members (group_id,user_id,status,is_admin) values (:g,:u,'approved',0)"),
+                        {"g": gid, "u": u})
+    session.commit()
+    w = [WEEK + timedelta(days=7 * i) for i in range(3)]
+    with db.SessionLocal() as s:
+        _write_weekly_scores(s, [{"g": gid, "u": me, "ws": w[0], "p": 5}, {"g": gid, "u": other.id, "ws": w[0], "p": 1},
+                                 {"g": gid, "u": me, "ws": w[1], "p": 0}, {"g": gid, "u": other.id, "ws": w[1], "p": 3},
+                                 {"g": gid, "u": other.id, "ws": w[2], "p": 4}, {"g": gid, "u": blank.id, "ws": w[0], "p": 0}])
+        s.commit()
+
+    full = client.get(f"/groups/{gid}/leaderboard").json["leaderboard"]
+    assert [(r["user_id"], r["total_points"]) for r in full] == [(other.id, 8), (me, 5), (blank.id, 0)]
+    ranged = client.get(f"/groups/{gid}/leaderboard?from={w[1] + timedelta(days=2)}&to={w[1]}").json
+    assert ranged["from"] == ranged["to"] == w[1].isoformat()
+    assert [(r["user_id"], r["total_points"]) for r in ranged["leaderboard"]] == [(other.id, 3), (me, 0), (blank.id, 0)]
+
+    hist = client.get(f"/groups/{gid}/leaderboard/history").json
+    assert hist["weeks"] == [d.isoformat() for d in w]
+    mine = next(u["history"] for u in hist["users"] if u["user_id"] == me)
+    assert [(h["points"], h["rank"]) for h in mine] == [(5, 1), (5, 1), (5, 2)]
+    zero = next(u["history"] for u in hist["users"] if u["user_id"] == blank.id)
+    assert [(h["points"], h["rank"]) for h in zero] == [(0, 3), (0, 3), (0, 3)]
+    assert client.get(f"/groups/{gid}/leaderboard?from=nope").status_code == 400
+
@@ -0,0 +1,87 @@
+import threading, time
+from datetime import date, timedelta
+
+from backend.routes import api
+from backend.services.sync import MatchSync
+from backend.tasks.weekly import upsert_matches
+from conftest import match_item
+
+
+class StubAPI:
+    """Local stand-in for football-data.org."""
+    def __init__(self, items, delay=0.0):
+        self.items, self.delay, self.calls = items, delay, 0
+
+    def __call__(self, date_from, date_to, status):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.items
+
+
+def test_concurrent_refreshes_collapse_into_one_call(session):
+    stub = StubAPI([match_item(1, date.today() + timedelta(days=1))], delay=0.2)
+    sync = MatchSync(fetch=stub, ingest=lambda items, status: upsert_matches(items))
+    a, b = date.today(), date.today() + timedelta(days=7)
+
+    threads = [threading.Thread(target=sync.ensure_fresh, args=(a, b, "SCHEDULED")) for _ in range(10)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    sync.wait()
+
+    assert stub.calls == 1
+    assert sync.is_fresh(a, b, "SCHEDULED")
+    assert sync.ensure_fresh(a, b, "SCHEDULED") is True
+    assert stub.calls == 1
+
+
+def test_failed_refresh_keeps_serving_db(session):
+    def boom(*_):
+        raise RuntimeError("429")
+    sync = MatchSync(fetch=boom, ingest=lambda items, status: 0)
+    out = sync.refresh(date.today(), date.today(), "FINISHED")
+    assert out["ok"] is False
+    assert not sync.is_fresh(date.today(), date.today(), "FINISHED")
+
+
+def test_handlers_answer_from_db_and_refresh_in_background(client, monkeypatch):
+    stub = StubAPI([match_item(5, date.today() + timedelta(days=2))], delay=0.1)
+    monkeypatch.setattr(api.get_match_sync(), "fetch", stub)
+    monkeypatch.setattr(api.get_match_sync(), "ingest", lambda items, status: upsert_matches(items))
+
+    r = client.get("/api/upcoming")
+    assert r.json["source"] == "db" and r.json["stale"] is True
+    api.get_match_sync().wait()
+
+    r = client.get("/api/upcoming")
+    assert r.json["stale"] is False
+    assert [m["match_id"] for m in r.json["items"]] == [5]
+    assert client.get("/api/fixtures").json["fixtures"][0]["home"] == "H5"
+    assert stub.calls == 1
+
+
+def test_failed_range_backs_off_before_retrying(session):
+    calls = []
+    def boom(*args):
+        calls.append(args)
+        raise RuntimeError("503")
+    sync = MatchSync(fetch=boom, ingest=lambda items, status: 0, retry_cooldown=60, max_backoff=600)
+    a = date.today()
+
+    assert sync.refresh(a, a, "FINISHED")["ok"] is False
+    assert sync.ensure_fresh(a, a, "FINISHED") is False
+    assert "skipped" in sync.refresh(a, a, "FINISHED") and len(calls) == 1
+
+    k = sync.key(a, a, "FINISHED")
+    fetched, attempted, failures = sync._state(k)
+    assert failures == 1 and sync.retry_at((fetched, attempted, 1)) == attempted + timedelta(seconds=60)
+    assert sync.retry_at((fetched, attempted, 3)) == attempted + timedelta(seconds=240)
+    assert sync.retry_at((fetched, attempted, 10)) == attempted + timedelta(seconds=600)
+
+
+def test_requested_ranges_map_to_bounded_week_spans():
+    thu = date.today() - timedelta(days=(date.today().weekday() - 3) % 7)
+    assert MatchSync.key(thu + timedelta(days=1), thu + timedelta(days=2), "SCHEDULED") == \
+        f"SCHEDULED:{thu.isoformat()}:{(thu + timedelta(days=6)).isoformat()}"
+    wide = MatchSync.key(thu, thu + timedelta(days=365), None)
+    assert wide == f"ANY:{thu.isoformat()}:{(thu + timedelta(weeks=5) - timedelta(days=1)).isoformat()}"
+    assert MatchSync.key(date(1900, 1, 1), date(1900, 1, 2), None) is None